@@ -1,9 +1,12 @@
 import pandas as pd
 import streamlit as st
-import io
-import matplotlib.pyplot as plt
-import numpy as np
 import re
+from etl_core.charts import year_histogram, year_histogram_report
+from etl_core.ingest import combine_frames
+from etl_core.perf import PerfRecorder, format_mib, stage, summary_table
+from etl_core.preview import st_paged_preview
+from etl_core.reader import parse_column_letters, read_sheet_columns
+from etl_core.schema import add_date_column, apply_schema
 
 def extract_date_from_filename(filename):
     match = re.search(r'\d{4}\.\d{2}\.\d{2}', filename)
@@ -12,17 +15,23 @@ def extract_date_from_filename(filename):
         return int(year), int(month), int(day)
     return None, None, None
 
+def report_mismatch(file, message):
+    st.warning(f"Schema mismatch in {file}: {message}")
+
 def process_files(files, columns_range, start_row):
     all_data = []
     for file in files:
         try:
-            df = pd.read_excel(file, sheet_name="ITEM_O", skiprows=start_row-1, usecols=columns_range)
+            # Lectura en streaming: solo las columnas pedidas y desde la fila de inicio
+            with stage('lectura_xlsx', bytes=getattr(file, 'size', None)) as timing:
+                df = read_sheet_columns(file, parse_column_letters(columns_range), start_row, sheet_name="ITEM_O", header=True)
+                timing.rows = len(df)
             filename = file.name
             year, month, day = extract_date_from_filename(filename)
             if year is not None:
-                df['ANIO'] = year
-                df['MES'] = month
-                df['DIA'] = day
+                # Fecha en una sola columna y columnas tipadas (etl_core.schema)
+                df = apply_schema(add_date_column(df, year, month, day))
+                df.attrs['source'] = filename
                 all_data.append(df)
             else:
                 st.warning(f"Filename {filename} does not match the expected date format.")
@@ -30,53 +39,28 @@ def process_files(files, columns_range, start_row):
             st.error(f"Error processing file {file.name}: {e}")
 
     if all_data:
-        combined_df = pd.concat(all_data, ignore_index=True)
+        with stage('concatenacion', rows=sum(len(df) for df in all_data)):
+            combined_df = combine_frames(all_data, on_mismatch=report_mismatch)
         st.write(f"Processed {len(all_data)} files.")
         return combined_df
     else:
         st.warning("No data was processed from the provided files.")
         return pd.DataFrame()  # Return an empty DataFrame if no data is processed
 
+# El resumen y el histograma por año se generan en etl_core.charts, sin pyplot. Los conteos
+# por año (bordes comunes, un solo bincount) se guardan en la sesión hasta el próximo ETL.
 def save_with_report_and_graphs(df):
     try:
-        # Create a summary report
-        summary = df.describe(include='all')
-
-        # Identify the numeric columns
-        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-        if not numeric_columns:
-            raise ValueError("No numeric columns found in the dataframe")
-
-        # Use the first numeric column for the graph
-        value_column = numeric_columns[0]
-        year_column = 'ANIO' if 'ANIO' in df.columns else 'AÑO'
-
-        # Create the histogram with customized style
-        plt.style.use('dark_background')
-        plt.figure(figsize=(12, 8))
-        for year in df[year_column].unique():
-            year_data = df[df[year_column] == year]
-            plt.hist(year_data[value_column], bins=20, alpha=0.5, label=str(year), color='green')
-        
-        plt.title(f"Histograma de {value_column} por Año", color='white')
-        plt.xlabel(value_column, color='white')
-        plt.ylabel("Frecuencia", color='white')
-        plt.legend(title="Año")
-        plt.grid(True, color='white')
-        
-        # Save plot to BytesIO object
-        img_stream = io.BytesIO()
-        plt.savefig(img_stream, format='png')
-        plt.close()
-        img_stream.seek(0)
-
-        return summary, img_stream
+        if st.session_state.get('year_histogram') is None:
+            st.session_state.year_histogram = year_histogram(df)
+        return year_histogram_report(df, st.session_state.year_histogram)
     except Exception as e:
         st.error(f"Error generating report: {e}")
         return None, None
 
 def main():
     st.title("Procesos ETL Rotherick")
+    perf = PerfRecorder('ETL', profile=st.session_state.get('perf_profile', False)).start()
 
     # File uploader
     uploaded_files = st.file_uploader("Carga Archivos Excel", type="xlsx", accept_multiple_files=True)
@@ -90,8 +74,9 @@ def main():
                 df_final = process_files(uploaded_files, columns_range, start_row)
                 if not df_final.empty:
                     st.write("Data Preview:")
-                    st.dataframe(df_final)
+                    st_paged_preview(df_final, key='etl_preview')
                     st.session_state.df_final = df_final  # Save the dataframe to session state
+                    st.session_state.year_histogram = None
                     st.success("Datos Procesados Satisfactoriamente!")
                 else:
                     st.warning("Datos No Encontrados. Revisa el contenido del archivo.")
@@ -105,8 +90,21 @@ def main():
                 st.write("Resumen de Reporte:")
                 st.write(summary)
                 st.image(img_stream)
+                st.download_button("Descargar conteos por año (CSV)",
+                                   st.session_state.year_histogram.to_frame(group_name='anio').to_csv(index=False),
+                                   file_name="histograma_por_anio.csv", mime="text/csv")
         else:
             st.warning("No datos disponibles para generar reporte. Primeramente ejecute el proceso ETL.")
 
+    # Panel de rendimiento de esta ejecución; el registro también se añade a .perf/perf_log.jsonl
+    perf_entry = perf.finish()
+    with st.expander("Rendimiento"):
+        st.write(f"Tiempo total de la ejecución: {perf_entry['seconds']:.3f} s — "
+                 f"memoria residente máxima: {format_mib(perf_entry['max_rss_bytes'])}")
+        st.dataframe(summary_table(perf))
+        if perf.profile_path:
+            st.write(f"Perfil cProfile guardado en {perf.profile_path}")
+        st.checkbox("Perfilar las próximas ejecuciones con cProfile", key='perf_profile')
+
 if __name__ == "__main__":
     main()
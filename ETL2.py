@@ -1,93 +1,230 @@
+import base64
 import pandas as pd
 import tkinter as tk
-from tkinter import filedialog, simpledialog, messagebox
+from tkinter import filedialog, simpledialog, messagebox, ttk
 import os
-import re
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from etl_core import consolidate_folder, save_outputs
+from etl_core.charts import (
+    DATE_COLUMNS,
+    averages_pie_figure,
+    chart_columns,
+    histogram_boxplot_summary,
+    means_pie_figure,
+)
+from etl_core.outofcore import column_means, consolidate_to_store, stream_statistics
+from etl_core.perf import PerfRecorder
+from etl_core.preview import FramePager
+from etl_core.render import ChartRenderJob
+from etl_core.store import BACKENDS, DEFAULT_BACKEND, latest_store_path, load_dataset, numeric_columns
 
-# Función para extraer año, mes y día del nombre del archivo
-def extract_date_from_filename(filename):
-    match = re.search(r'\.(\d{4})\.(\d{2})\.(\d{2})\.', filename)
-    if match:
-        return match.groups()
-    return ("", "", "")
-
-# Función para procesar archivos Excel
-def process_files(folder_path, columns_range, start_row):
-    dataset = pd.DataFrame()
+# Función para procesar archivos Excel con el núcleo etl_core; con workers > 1 se leen en un
+# pool de procesos y en modo incremental solo se leen los archivos nuevos o modificados.
+def process_files(folder_path, columns_range, start_row, workers=1, incremental=False):
+    def report_error(file, error):
+        messagebox.showerror("Error", f"Error al procesar el archivo {file}: {error}")
     
-    # Obtener lista de archivos Excel en la carpeta
-    files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx')]
+    mismatches = []
+    def report_mismatch(file, message):
+        mismatches.append(f"{file}: {message}")
     
-    if not files:
-        messagebox.showerror("Error", "No se encontraron archivos Excel en la carpeta.")
-        return dataset
+    try:
+        dataset, summary = consolidate_folder(folder_path, columns_range, start_row, workers, incremental,
+                                              on_error=report_error, on_mismatch=report_mismatch)
+    except FileNotFoundError as e:
+        messagebox.showerror("Error", str(e))
+        return pd.DataFrame()
     
-    # Iterar sobre cada archivo Excel
-    for file in files:
-        file_path = os.path.join(folder_path, file)
-        
-        try:
-            # Leer solo la primera hoja con nombre "ITEM_O"
-            df = pd.read_excel(file_path, sheet_name="ITEM_O", header=None, skiprows=start_row-1)
-            
-            # Seleccionar columnas especificadas
-            columns = list(range(columns_range[0], columns_range[1] + 1))
-            df = df.iloc[:, columns]
-            
-            # Extraer fecha del nombre del archivo
-            year, month, day = extract_date_from_filename(file)
-            df['ANIO'] = year
-            df['MES'] = month
-            df['DIA'] = day
-            
-            # Concatenar al dataset final
-            dataset = pd.concat([dataset, df], ignore_index=True)
-        
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al procesar el archivo {file}: {e}")
+    # Las diferencias de esquema se muestran juntas en un solo aviso
+    if mismatches:
+        messagebox.showwarning("Esquemas distintos", "\n".join(mismatches))
     
+    if summary is not None:
+        messagebox.showinfo("Modo incremental", f"Nuevos: {len(summary['added'])}, modificados: {len(summary['changed'])}, "
+                                                f"eliminados: {len(summary['removed'])}, sin cambios: {len(summary['unchanged'])}")
     return dataset
 
-# Función para guardar el dataset en un archivo Excel
-def save_to_excel(dataset):
+# Función para consolidar en modo por bloques: cada archivo se escribe en el dataset al
+# leerlo y solo se conservan las primeras filas para mostrarlas
+def process_files_out_of_core(folder_path, columns_range, start_row, workers, backend):
+    def report_error(file, error):
+        messagebox.showerror("Error", f"Error al procesar el archivo {file}: {error}")
+    
+    mismatches = []
+    def report_mismatch(file, message):
+        mismatches.append(f"{file}: {message}")
+    
+    try:
+        preview, rows, path = consolidate_to_store(folder_path, columns_range, start_row, workers, backend,
+                                                   on_error=report_error, on_mismatch=report_mismatch)
+    except (FileNotFoundError, ValueError) as e:
+        messagebox.showerror("Error", str(e))
+        return
+    
+    if mismatches:
+        messagebox.showwarning("Esquemas distintos", "\n".join(mismatches))
+    if rows:
+        show_dataset(preview, f"Primeras {len(preview)} de {rows} filas")
+        messagebox.showinfo("Éxito", f"{rows} filas guardadas correctamente en '{path}'.")
+    else:
+        messagebox.showwarning("Aviso", "No se obtuvieron datos de los archivos.")
+
+# Función para guardar el dataset consolidado en el backend elegido y, si se pide, en Excel
+def save_output(dataset, backend, export_xlsx):
     try:
-        dataset.to_excel('Out.xlsx', index=False)
-        messagebox.showinfo("Éxito", "El dataset se ha guardado correctamente en 'Out.xlsx'.")
+        paths = save_outputs(dataset, backend, export_xlsx)
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo guardar el archivo: {e}")
+        messagebox.showerror("Error", f"No se pudo guardar el dataset: {e}")
+        return
+    
+    messagebox.showinfo("Éxito", "El dataset se ha guardado correctamente en " + ", ".join(f"'{path}'" for path in paths) + ".")
 
-# Función para mostrar el dataset en una ventana emergente
-def show_dataset(dataset):
+# Función para mostrar el dataset en una ventana emergente, paginado (etl_core.preview):
+# la tabla solo tiene las filas de la página visible. Un clic en el encabezado de una
+# columna ordena por ella (otro clic invierte el orden).
+def show_dataset(dataset, title="Dataset Final"):
+    pager = FramePager(dataset)
+    columns = [str(col) for col in dataset.columns]
+    by_name = dict(zip(columns, dataset.columns))
+    page = tk.IntVar(value=0)
+    
     top = tk.Toplevel()
-    top.title("Dataset Final")
-    text = tk.Text(top)
-    text.pack(expand=True, fill='both')
-    text.insert(tk.END, dataset.to_string())
-    scroll = tk.Scrollbar(top, command=text.yview)
-    scroll.pack(side=tk.RIGHT, fill=tk.Y)
-    text.config(yscrollcommand=scroll.set)
-
-# Función para generar y mostrar gráficos estadísticos con barras de desplazamiento
-def generate_and_show_charts(root, dataset):
+    top.title(title)
+    
+    # Filtro por columna
+    filter_bar = tk.Frame(top)
+    filter_bar.pack(fill=tk.X, padx=5, pady=5)
+    filter_column_var = tk.StringVar(value=columns[0] if columns else "")
+    filter_text_var = tk.StringVar()
+    tk.Label(filter_bar, text="Filtrar columna:").pack(side=tk.LEFT)
+    if columns:
+        tk.OptionMenu(filter_bar, filter_column_var, *columns).pack(side=tk.LEFT)
+    tk.Entry(filter_bar, textvariable=filter_text_var, width=30).pack(side=tk.LEFT, padx=5)
+    
+    # Tabla con barras de desplazamiento
+    table_frame = tk.Frame(top)
+    table_frame.pack(expand=True, fill=tk.BOTH)
+    tree = ttk.Treeview(table_frame, columns=columns, show='headings')
+    v_scroll = tk.Scrollbar(table_frame, orient=tk.VERTICAL, command=tree.yview)
+    h_scroll = tk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=tree.xview)
+    tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+    v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+    h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+    tree.pack(expand=True, fill=tk.BOTH)
+    
+    # Navegación entre páginas
+    nav = tk.Frame(top)
+    nav.pack(fill=tk.X, padx=5, pady=5)
+    status_var = tk.StringVar()
+    
+    def show_page():
+        page.set(min(max(page.get(), 0), pager.page_count - 1))
+        tree.delete(*tree.get_children())
+        for row in pager.page(page.get()).itertuples(index=False):
+            tree.insert('', tk.END, values=['' if pd.isna(value) else str(value) for value in row])
+        status_var.set(pager.describe(page.get()))
+    
+    def move(step):
+        page.set(page.get() + step)
+        show_page()
+    
+    def sort_by(name):
+        ascending = not (pager.sort_column == by_name[name] and pager.ascending)
+        pager.set_sort(by_name[name], ascending)
+        for col in columns:
+            arrow = (" ▲" if ascending else " ▼") if col == name else ""
+            tree.heading(col, text=col + arrow)
+        page.set(0)
+        show_page()
+    
+    def apply_filter():
+        try:
+            pager.set_filter(by_name.get(filter_column_var.get()), filter_text_var.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=top)
+            return
+        page.set(0)
+        show_page()
+    
+    for col in columns:
+        tree.heading(col, text=col, command=lambda name=col: sort_by(name))
+        tree.column(col, width=120, stretch=False)
+    tk.Button(filter_bar, text="Filtrar", command=apply_filter).pack(side=tk.LEFT)
+    tk.Button(nav, text="<< Anterior", command=lambda: move(-1)).pack(side=tk.LEFT)
+    tk.Button(nav, text="Siguiente >>", command=lambda: move(1)).pack(side=tk.LEFT)
+    tk.Label(nav, textvariable=status_var).pack(side=tk.LEFT, padx=10)
+    show_page()
+
+# Milisegundos entre revisiones de los gráficos terminados en segundo plano
+CHART_POLL_MS = 100
+
+# Vista de gráficos abierta: trabajo de renderizado, contenedor, imágenes y revisión pendiente
+chart_view = None
+
+# Función para generar y mostrar gráficos estadísticos con barras de desplazamiento. Los
+# resúmenes y las figuras se calculan en segundo plano (etl_core.render).
+def generate_and_show_charts(root, dataset, workers=1):
     if dataset.empty:
         messagebox.showerror("Error", "El dataset está vacío.")
         return
 
-    numeric_cols = dataset.select_dtypes(include=[float, int]).columns
+    # Histograma y boxplot de cada columna
+    columns = chart_columns(dataset)
+    show_figures(root, ((col, histogram_boxplot_summary(dataset, col)) for col in columns), len(columns), workers)
+
+# Función para mostrar los gráficos estadísticos calculados por bloques, sin cargar el dataset;
+# las dos pasadas por el dataset también se hacen en segundo plano
+def generate_and_show_charts_out_of_core(root, path, workers=1):
+    columns = numeric_columns(path)
+    
+    def summaries():
+        report = stream_statistics(path, columns)
+        if report['rows']:
+            yield from report['columns'].items()
+    
+    show_figures(root, summaries(), len(columns), workers)
+
+# Función para cerrar la vista de gráficos abierta: cancela su renderizado y libera sus imágenes
+def close_charts():
+    global chart_view
+    if chart_view is None:
+        return
+    chart_view['job'].cancel()
+    if chart_view['after_id'] is not None:
+        chart_view['container'].after_cancel(chart_view['after_id'])
+    chart_view['images'].clear()
+    chart_view['container'].destroy()
+    chart_view = None
+
+# Función para mostrar figuras una debajo de otra en un Canvas con barras de desplazamiento.
+# Se dibujan en un pool de procesos a PNG; cada una aparece en su lugar al terminar y el
+# renderizado se puede cancelar. Cada clic reemplaza (y libera) la vista anterior.
+def show_figures(root, summaries, total, workers=1):
+    global chart_view
+    close_charts()
+    
+    container = tk.Frame(root)
+    container.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    
+    # Progreso y botón para cancelar
+    header = tk.Frame(container)
+    header.pack(side=tk.TOP, fill=tk.X)
+    status_var = tk.StringVar(value=f"Generando gráficos: 0 de {total}")
+    tk.Label(header, textvariable=status_var).pack(side=tk.LEFT, padx=10)
+    cancel_button = tk.Button(header, text="Cancelar", command=lambda: job.cancel())
+    cancel_button.pack(side=tk.LEFT)
     
     # Crear el Canvas
-    canvas = tk.Canvas(root)
-    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    canvas = tk.Canvas(container)
     
     # Crear la barra de desplazamiento vertical
-    v_scrollbar = tk.Scrollbar(root, orient=tk.VERTICAL, command=canvas.yview)
+    v_scrollbar = tk.Scrollbar(container, orient=tk.VERTICAL, command=canvas.yview)
     v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
     
     # Crear la barra de desplazamiento horizontal
-    h_scrollbar = tk.Scrollbar(root, orient=tk.HORIZONTAL, command=canvas.xview)
+    h_scrollbar = tk.Scrollbar(container, orient=tk.HORIZONTAL, command=canvas.xview)
     h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
     
     # Configurar el Canvas para usar las barras de desplazamiento
     canvas.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
@@ -104,58 +241,75 @@ def generate_and_show_charts(root, dataset):
     
     chart_frame.bind("<Configure>", update_scrollregion)
     
-    # Mostrar los gráficos en el Frame de gráficos
-    for col in numeric_cols:
-        fig, ax = plt.subplots(2, 1, figsize=(10, 10))  # Dos gráficos por columna
-
-        # Histograma
-        dataset[col].hist(bins=30, ax=ax[0])
-        ax[0].set_title(f'Histograma de {col}')
-        ax[0].set_xlabel(col)
-        ax[0].set_ylabel('Frecuencia')
-
-        # Boxplot
-        dataset.boxplot(column=col, ax=ax[1])
-        ax[1].set_title(f'Boxplot de {col}')
-        
-        # Ajustar el gráfico para que se ajuste al área disponible
-        plt.tight_layout()
-
-        # Crear un canvas para el gráfico y agregarlo al Frame de gráficos
-        graph_canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-        graph_canvas.draw()
-        graph_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Actualizar el tamaño del área de visualización del Canvas
+    job = ChartRenderJob(summaries, workers).start()
+    view = chart_view = {'job': job, 'container': container, 'images': [], 'after_id': None}
+    
+    # Función para mostrar los gráficos terminados; cada uno va en la fila de su columna
+    def poll():
+        view['after_id'] = None
+        for position, col, png in job.drain():
+            image = tk.PhotoImage(data=base64.b64encode(png))
+            view['images'].append(image)
+            tk.Label(chart_frame, image=image).grid(row=position, column=0, padx=10, pady=10)
         chart_frame.update_idletasks()
         update_scrollregion()
+        
+        if not job.done:
+            status_var.set(f"Generando gráficos: {job.rendered} de {total}")
+            view['after_id'] = container.after(CHART_POLL_MS, poll)
+            return
+        cancel_button.config(state=tk.DISABLED)
+        if job.error is not None:
+            status_var.set(f"Gráficos: {job.rendered} de {total} (error)")
+            messagebox.showerror("Error", f"Ocurrió un error al generar los gráficos: {job.error}")
+        elif job.cancelled:
+            status_var.set(f"Gráficos cancelados: {job.rendered} de {total}")
+        elif not job.rendered:
+            status_var.set("Sin gráficos")
+            messagebox.showerror("Error", "El dataset está vacío.")
+        else:
+            status_var.set(f"Gráficos: {job.rendered} de {total}")
+    
+    poll()
 
 # Función para calcular y mostrar los promedios en una torta
 def calculate_and_plot_averages(dataset, chart_frame):
     # Ignorar columnas de fecha
-    cols_to_ignore = ['ANIO', 'MES', 'DIA']
-    numeric_cols = dataset.select_dtypes(include=[float, int]).columns
-    numeric_cols = [col for col in numeric_cols if col not in cols_to_ignore]
+    numeric_cols = chart_columns(dataset, exclude=DATE_COLUMNS)
     
     if not numeric_cols:
         messagebox.showerror("Error", "No hay columnas numéricas (excluyendo fechas) en el dataset.")
         return
 
-    averages = dataset[numeric_cols].mean()
-    
     # Crear y mostrar el gráfico de torta en el Frame de gráficos
-    fig, ax = plt.subplots()
-    ax.pie(averages, labels=averages.index, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')  # Asegurar que el gráfico sea un círculo
-    plt.title('Promedio de Columnas Numéricas (excluyendo fechas)')
-    
-    # Integrar el gráfico en el Frame de gráficos
+    show_pie(averages_pie_figure(dataset, numeric_cols), chart_frame)
+
+# Función para calcular los promedios por bloques y mostrarlos en una torta
+def calculate_and_plot_averages_out_of_core(path, chart_frame):
+    averages = column_means(stream_statistics(path, numeric_columns(path, exclude=DATE_COLUMNS))).dropna()
+    if averages.empty:
+        messagebox.showerror("Error", "No hay columnas numéricas (excluyendo fechas) en el dataset.")
+        return
+
+    show_pie(means_pie_figure(averages), chart_frame)
+
+# Función para integrar el gráfico de torta en el Frame de gráficos; la torta anterior se
+# destruye, así no se acumulan figuras con cada clic
+def show_pie(fig, chart_frame):
+    for widget in chart_frame.winfo_children():
+        widget.destroy()
     chart_canvas = FigureCanvasTkAgg(fig, master=chart_frame)
     chart_canvas.draw()
     chart_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-    # Cerrar el gráfico para liberar memoria
-    plt.close(fig)
+# Función para ejecutar una acción de la interfaz registrando sus etapas en .perf/perf_log.jsonl
+# (ETL_PROFILE=1 guarda además un perfil de cProfile por acción)
+def run_recorded(run_name, action):
+    perf = PerfRecorder(run_name).start()
+    try:
+        action()
+    finally:
+        perf.finish()
 
 # Función principal de la interfaz gráfica
 def main():
@@ -174,24 +328,37 @@ def main():
             if columns_start < 0 or columns_end < 0 or start_row < 1:
                 raise ValueError("Los valores deben ser números positivos enteros.")
             
-            dataset = process_files(folder_path, (columns_start, columns_end), start_row)
+            if out_of_core_var.get():
+                process_files_out_of_core(folder_path, (columns_start, columns_end), start_row, workers_var.get(), backend_var.get())
+                return
+            
+            dataset = process_files(folder_path, (columns_start, columns_end), start_row, workers_var.get(), incremental_var.get())
             
             if not dataset.empty:
                 show_dataset(dataset)
-                save_to_excel(dataset)
+                save_output(dataset, backend_var.get(), export_xlsx_var.get())
         except Exception as e:
             messagebox.showerror("Error", f"Ocurrió un error: {e}")
     
     def generate_charts():
         try:
-            dataset = pd.read_excel('Out.xlsx')
-            generate_and_show_charts(root, dataset)
+            path = latest_store_path()
+            if out_of_core_var.get():
+                generate_and_show_charts_out_of_core(root, path, workers_var.get())
+                return
+            # Leer solo las columnas numéricas del dataset consolidado
+            dataset = load_dataset(path, columns=numeric_columns(path))
+            generate_and_show_charts(root, dataset, workers_var.get())
         except Exception as e:
             messagebox.showerror("Error", f"Ocurrió un error al generar los gráficos: {e}")
 
     def plot_averages():
         try:
-            dataset = pd.read_excel('Out.xlsx')
+            path = latest_store_path()
+            if out_of_core_var.get():
+                calculate_and_plot_averages_out_of_core(path, chart_frame)
+                return
+            dataset = load_dataset(path, columns=numeric_columns(path, exclude=DATE_COLUMNS))
             calculate_and_plot_averages(dataset, chart_frame)
         except Exception as e:
             messagebox.showerror("Error", f"Ocurrió un error al graficar los promedios: {e}")
@@ -201,6 +368,11 @@ def main():
     root.geometry("1200x800")  # Tamaño inicial de la ventana
 
     folder_var = tk.StringVar()
+    workers_var = tk.IntVar(value=os.cpu_count() or 1)
+    incremental_var = tk.BooleanVar(value=False)
+    backend_var = tk.StringVar(value=DEFAULT_BACKEND)
+    export_xlsx_var = tk.BooleanVar(value=False)
+    out_of_core_var = tk.BooleanVar(value=False)
 
     # Crear el Frame para mostrar gráficos
     global chart_frame
@@ -209,9 +381,22 @@ def main():
 
     tk.Button(root, text="Seleccionar Carpeta", command=select_folder).pack(pady=10)
     tk.Label(root, textvariable=folder_var).pack(pady=10)
-    tk.Button(root, text="Iniciar Proceso ETL", command=run_etl_process).pack(pady=10)
-    tk.Button(root, text="Generar Gráficos Estadísticos", command=generate_charts).pack(pady=10)
-    tk.Button(root, text="Graficar Promedios", command=plot_averages).pack(pady=10)
+    tk.Label(root, text="Procesos de lectura:").pack()
+    tk.Spinbox(root, from_=1, to=64, textvariable=workers_var, width=5).pack(pady=5)
+    tk.Checkbutton(root, text="Modo incremental (solo archivos nuevos o modificados)", variable=incremental_var).pack()
+    tk.Label(root, text="Formato del dataset consolidado:").pack()
+    tk.OptionMenu(root, backend_var, *BACKENDS).pack()
+    tk.Checkbutton(root, text="Exportar también a 'Out.xlsx'", variable=export_xlsx_var).pack()
+    tk.Checkbutton(root, text="Modo por bloques (datasets más grandes que la memoria)", variable=out_of_core_var).pack()
+    tk.Button(root, text="Iniciar Proceso ETL", command=lambda: run_recorded('ETL2_etl', run_etl_process)).pack(pady=10)
+    tk.Button(root, text="Generar Gráficos Estadísticos", command=lambda: run_recorded('ETL2_graficos', generate_charts)).pack(pady=10)
+    tk.Button(root, text="Graficar Promedios", command=lambda: run_recorded('ETL2_promedios', plot_averages)).pack(pady=10)
+
+    # Al cerrar la ventana se cancela el renderizado en curso
+    def on_close():
+        close_charts()
+        root.destroy()
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     root.mainloop()
 
@@ -1,64 +1,79 @@
 import pandas as pd
 import streamlit as st
 import os
-import re
-import matplotlib.pyplot as plt
+from etl_core import consolidate_folder, save_outputs
+from etl_core.charts import (
+    DATE_COLUMNS,
+    averages_pie_figure,
+    chart_columns,
+    histogram_boxplot_figure,
+    means_pie_figure,
+    stats_histogram_boxplot_figure,
+)
+from etl_core.outofcore import column_means, consolidate_to_store, stream_statistics, summary_frame
+from etl_core.perf import PerfRecorder, format_mib, summary_table
+from etl_core.preview import st_paged_preview
+from etl_core.store import BACKENDS, DEFAULT_BACKEND, latest_store_path, load_dataset, numeric_columns
 
-# Función para extraer año, mes y día del nombre del archivo
-def extract_date_from_filename(filename):
-    match = re.search(r'\.(\d{4})\.(\d{2})\.(\d{2})\.', filename)
-    if match:
-        return match.groups()
-    return ("", "", "")
-
-# Función para procesar archivos Excel
-def process_files(folder_path, columns_range, start_row):
-    dataset = pd.DataFrame()
-    
-    # Obtener lista de archivos Excel en la carpeta
-    files = [f for f in os.listdir(folder_path) if f.endswith('.xlsx')]
+# Función para procesar archivos Excel con el núcleo etl_core; con workers > 1 se leen en un
+# pool de procesos y en modo incremental solo se leen los archivos nuevos o modificados.
+def process_files(folder_path, columns_range, start_row, workers=1, incremental=False):
+    def report_error(file, error):
+        st.error(f"Error al procesar el archivo {file}: {error}")
     
-    if not files:
-        st.error("No se encontraron archivos Excel en la carpeta.")
-        return dataset
+    def report_mismatch(file, message):
+        st.warning(f"Esquema distinto en {file}: {message}")
     
-    # Iterar sobre cada archivo Excel
-    for file in files:
-        file_path = os.path.join(folder_path, file)
-        
-        try:
-            # Leer solo la primera hoja con nombre "ITEM_O"
-            df = pd.read_excel(file_path, sheet_name="ITEM_O", header=None, skiprows=start_row-1)
-            
-            # Seleccionar columnas especificadas
-            columns = list(range(columns_range[0], columns_range[1] + 1))
-            df = df.iloc[:, columns]
-            
-            # Extraer fecha del nombre del archivo
-            year, month, day = extract_date_from_filename(file)
-            df['ANIO'] = year
-            df['MES'] = month
-            df['DIA'] = day
-            
-            # Concatenar al dataset final
-            dataset = pd.concat([dataset, df], ignore_index=True)
-        
-        except Exception as e:
-            st.error(f"Error al procesar el archivo {file}: {e}")
+    try:
+        dataset, summary = consolidate_folder(folder_path, columns_range, start_row, workers, incremental,
+                                              on_error=report_error, on_mismatch=report_mismatch)
+    except FileNotFoundError as e:
+        st.error(str(e))
+        return pd.DataFrame()
     
+    if summary is not None:
+        st.info(f"Nuevos: {len(summary['added'])}, modificados: {len(summary['changed'])}, "
+                f"eliminados: {len(summary['removed'])}, sin cambios: {len(summary['unchanged'])}")
     return dataset
 
-# Función para guardar el dataset en un archivo Excel
-def save_to_excel(dataset):
+# Función para consolidar en modo por bloques: cada archivo se escribe en el dataset al
+# leerlo y solo se conservan las primeras filas para mostrarlas
+def process_files_out_of_core(folder_path, columns_range, start_row, workers, backend):
+    def report_error(file, error):
+        st.error(f"Error al procesar el archivo {file}: {error}")
+    
+    def report_mismatch(file, message):
+        st.warning(f"Esquema distinto en {file}: {message}")
+    
+    try:
+        preview, rows, path = consolidate_to_store(folder_path, columns_range, start_row, workers, backend,
+                                                   on_error=report_error, on_mismatch=report_mismatch)
+    except (FileNotFoundError, ValueError) as e:
+        st.error(str(e))
+        return
+    
+    if rows:
+        st.write(f"Primeras {len(preview)} de {rows} filas:")
+        show_dataset(preview)
+        st.success(f"El dataset se ha guardado correctamente en '{path}'.")
+    else:
+        st.warning("No se obtuvieron datos de los archivos.")
+
+# Función para guardar el dataset consolidado en el backend elegido y, si se pide, en Excel
+def save_output(dataset, backend, export_xlsx):
     try:
-        dataset.to_excel('Out.xlsx', index=False)
-        st.success("El dataset se ha guardado correctamente en 'Out.xlsx'.")
+        paths = save_outputs(dataset, backend, export_xlsx)
     except Exception as e:
-        st.error(f"No se pudo guardar el archivo: {e}")
+        st.error(f"No se pudo guardar el dataset: {e}")
+        return
+    
+    for path in paths:
+        st.success(f"El dataset se ha guardado correctamente en '{path}'.")
 
-# Función para mostrar el dataset en Streamlit
+# Función para mostrar el dataset en Streamlit, paginado y con orden y filtro por columna
+# (solo se formatean las filas de la página visible)
 def show_dataset(dataset):
-    st.write(dataset)
+    st_paged_preview(dataset, key='dataset_preview')
 
 # Función para generar y mostrar gráficos estadísticos con Streamlit
 def generate_and_show_charts(dataset):
@@ -66,77 +81,101 @@ def generate_and_show_charts(dataset):
         st.error("El dataset está vacío.")
         return
 
-    numeric_cols = dataset.select_dtypes(include=[float, int]).columns
-    
-    for col in numeric_cols:
+    for col in chart_columns(dataset):
         st.subheader(f'Histograma y Boxplot de {col}')
-        
-        # Histograma
-        fig, ax = plt.subplots(2, 1, figsize=(10, 10))  # Dos gráficos por columna
-        dataset[col].hist(bins=30, ax=ax[0])
-        ax[0].set_title(f'Histograma de {col}')
-        ax[0].set_xlabel(col)
-        ax[0].set_ylabel('Frecuencia')
-
-        # Boxplot
-        dataset.boxplot(column=col, ax=ax[1])
-        ax[1].set_title(f'Boxplot de {col}')
-        
-        # Ajustar el gráfico
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.pyplot(histogram_boxplot_figure(dataset, col))
 
 # Función para calcular y mostrar los promedios en una torta
 def calculate_and_plot_averages(dataset):
     # Ignorar columnas de fecha
-    cols_to_ignore = ['ANIO', 'MES', 'DIA']
-    numeric_cols = dataset.select_dtypes(include=[float, int]).columns
-    numeric_cols = [col for col in numeric_cols if col not in cols_to_ignore]
+    numeric_cols = chart_columns(dataset, exclude=DATE_COLUMNS)
     
     if not numeric_cols:
         st.error("No hay columnas numéricas (excluyendo fechas) en el dataset.")
         return
 
-    averages = dataset[numeric_cols].mean()
-    
-    # Crear y mostrar el gráfico de torta
-    fig, ax = plt.subplots()
-    ax.pie(averages, labels=averages.index, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')  # Asegurar que el gráfico sea un círculo
-    plt.title('Promedio de Columnas Numéricas (excluyendo fechas)')
-    
-    st.pyplot(fig)
+    st.pyplot(averages_pie_figure(dataset, numeric_cols))
+
+# Función para mostrar los gráficos estadísticos calculados por bloques, sin cargar el dataset
+def generate_and_show_charts_out_of_core(path):
+    report = stream_statistics(path, numeric_columns(path))
+    if not report['rows']:
+        st.error("El dataset está vacío.")
+        return
+
+    st.write(summary_frame(report))
+    for col, col_stats in report['columns'].items():
+        st.subheader(f'Histograma y Boxplot de {col}')
+        st.pyplot(stats_histogram_boxplot_figure(col, col_stats))
+
+# Función para mostrar la torta de promedios calculados por bloques
+def calculate_and_plot_averages_out_of_core(path):
+    averages = column_means(stream_statistics(path, numeric_columns(path, exclude=DATE_COLUMNS))).dropna()
+    if averages.empty:
+        st.error("No hay columnas numéricas (excluyendo fechas) en el dataset.")
+        return
+
+    st.pyplot(means_pie_figure(averages))
 
 # Función principal de la interfaz de Streamlit
 def main():
     st.title("Proceso ETL")
+    perf = PerfRecorder('ETL_Streamlit', profile=st.session_state.get('perf_profile', False)).start()
     
     folder_path = st.text_input("Ingrese la ruta de la carpeta con archivos Excel:")
     
     columns_start = st.number_input("Ingrese la columna inicial (1-indexed):", min_value=1) - 1
     columns_end = st.number_input("Ingrese la columna final (1-indexed):", min_value=1) - 1
     start_row = st.number_input("Ingrese la fila inicial (1-indexed):", min_value=1)
+    workers = st.number_input("Procesos de lectura en paralelo:", min_value=1, value=os.cpu_count() or 1)
+    incremental = st.checkbox("Modo incremental (solo archivos nuevos o modificados)")
+    backends = list(BACKENDS)
+    backend = st.selectbox("Formato del dataset consolidado:", backends, index=backends.index(DEFAULT_BACKEND))
+    export_xlsx = st.checkbox("Exportar también a 'Out.xlsx'")
+    out_of_core = st.checkbox("Modo por bloques (datasets más grandes que la memoria; sin modo incremental ni Excel)")
     
     if st.button("Iniciar Proceso ETL"):
-        dataset = process_files(folder_path, (columns_start, columns_end), start_row)
-        
-        if not dataset.empty:
-            show_dataset(dataset)
-            save_to_excel(dataset)
+        if out_of_core:
+            process_files_out_of_core(folder_path, (columns_start, columns_end), start_row, workers, backend)
+        else:
+            dataset = process_files(folder_path, (columns_start, columns_end), start_row, workers, incremental)
+            
+            if not dataset.empty:
+                show_dataset(dataset)
+                save_output(dataset, backend, export_xlsx)
     
     if st.button("Generar Gráficos Estadísticos"):
         try:
-            dataset = pd.read_excel('Out.xlsx')
-            generate_and_show_charts(dataset)
+            path = latest_store_path()
+            if out_of_core:
+                generate_and_show_charts_out_of_core(path)
+            else:
+                # Leer solo las columnas numéricas del dataset consolidado
+                dataset = load_dataset(path, columns=numeric_columns(path))
+                generate_and_show_charts(dataset)
         except Exception as e:
             st.error(f"Ocurrió un error al generar los gráficos: {e}")
     
     if st.button("Graficar Promedios"):
         try:
-            dataset = pd.read_excel('Out.xlsx')
-            calculate_and_plot_averages(dataset)
+            path = latest_store_path()
+            if out_of_core:
+                calculate_and_plot_averages_out_of_core(path)
+            else:
+                dataset = load_dataset(path, columns=numeric_columns(path, exclude=DATE_COLUMNS))
+                calculate_and_plot_averages(dataset)
         except Exception as e:
             st.error(f"Ocurrió un error al graficar los promedios: {e}")
 
+    # Panel de rendimiento de esta ejecución; el registro también se añade a .perf/perf_log.jsonl
+    perf_entry = perf.finish()
+    with st.expander("Rendimiento"):
+        st.write(f"Tiempo total de la ejecución: {perf_entry['seconds']:.3f} s — "
+                 f"memoria residente máxima: {format_mib(perf_entry['max_rss_bytes'])}")
+        st.dataframe(summary_table(perf))
+        if perf.profile_path:
+            st.write(f"Perfil cProfile guardado en {perf.profile_path}")
+        st.checkbox("Perfilar las próximas ejecuciones con cProfile", key='perf_profile')
+
 if __name__ == "__main__":
     main()
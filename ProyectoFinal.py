@@ -2,34 +2,101 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+import io
+import json
 import os
-from sklearn.linear_model import LogisticRegression, LinearRegression 
-from sklearn.metrics import r2_score, mean_squared_error
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import make_pipeline
+from sklearn.tree import DecisionTreeClassifier, plot_tree
 import numpy as np
+from analysis_core import dataset_hash, load_hepatitis_data
+from analysis_core.dataset import CATEGORIES, SEXES
+from analysis_core.density import get_histogram_density
+from analysis_core.export import ReportBundle, content_digest, get_exporter
+from analysis_core.model_selection import get_model_selector, select_model
+from analysis_core.models import feature_columns, get_category_classifier
+from analysis_core.plot_cache import get_plot_cache
+from analysis_core.scoring import score_file
+from analysis_core.regression import get_polynomial_sweep
+from analysis_core.stats_cube import ALL, GROUP_COLUMNS, get_stats_cube
+from analysis_core.trend import get_bootstrap_band, get_trend_fits
+from etl_core.lod import (
+    HEXBIN_GRIDSIZE,
+    MAX_POINTS,
+    box_stats,
+    label_figure,
+    scatter_caption,
+    scatter_plan,
+    summary_caption,
+)
+from etl_core.perf import PerfRecorder, format_mib, summary_table
+from etl_core.preview import st_paged_preview
 
-# Function to load the CSV file
-@st.cache_data
+# Highest degree offered by the polynomial regression slider
+MAX_POLYNOMIAL_DEGREE = 150
+
+# Function to load the CSV file. Parsing is cached by content hash in analysis_core.dataset;
+# the hash of each uploaded file is remembered by its file_id so reruns don't rehash it.
 def load_data(file):
-    data = pd.read_csv(file)
+    digests = st.session_state.setdefault('dataset_digests', {})
+    file_id = getattr(file, 'file_id', None)
+    data = load_hepatitis_data(file, digest=digests.get(file_id))
+    if file_id is not None:
+        digests[file_id] = dataset_hash(data)
     return data
 
-# Function to display and save descriptive statistics
-def display_descriptive_stats(data, biomarker):
+# Function to show a figure through the render-once plot cache; returns its PNG bytes
+def show_figure(digest, kind, columns, params, render):
+    png = get_plot_cache().get_or_render(digest, kind, columns, params, render)
+    st.image(png, use_column_width=True)
+    return png
+
+# Function to export a PNG artifact without blocking the rerun: it goes into the report
+# bundle when bundle mode is on, otherwise it is written by the background exporter.
+# Returns where the artifact goes, for the message shown to the user.
+def save_png(filename, png):
+    if report_bundle is not None:
+        report_bundle.add_file(os.path.basename(filename), png)
+        return "el paquete de informe"
+    get_exporter().submit(filename, png)
+    return filename
+
+# Function to export a table as an Excel artifact; the workbook is built in the background
+def save_table(filename, table):
+    if report_bundle is not None:
+        report_bundle.add_table(os.path.splitext(os.path.basename(filename))[0], table)
+        return "el paquete de informe"
+    
+    def excel_bytes():
+        buffer = io.BytesIO()
+        table.to_excel(buffer, index=False)
+        return buffer.getvalue()
+    get_exporter().submit(filename, producer=excel_bytes, key=content_digest(table.to_csv(index=False).encode('utf-8')))
+    return filename
+
+# Function to display and save descriptive statistics (looked up in the precomputed cube)
+def display_descriptive_stats(cube, biomarker):
     st.write(f"## Estadísticas Descriptivas para {biomarker}")
-    stats = data[biomarker].describe()
+    
+    # Optional filters by category and sex for numeric columns
+    category, sex = ALL, ALL
+    if biomarker not in cube.categorical:
+        col1, col2 = st.columns(2)
+        with col1:
+            category = st.selectbox("Filtrar por categoría", [ALL] + CATEGORIES)
+        with col2:
+            sex = st.selectbox("Filtrar por sexo", [ALL] + SEXES)
+    stats = cube.describe(biomarker, category, sex)
     st.write(stats)
     
     # Save descriptive statistics to Excel file
     stats_df = pd.DataFrame(stats).reset_index()
     stats_df.columns = ['Estadística', 'Valor']
-    stats_filename = os.path.join(os.getcwd(), f"{biomarker}_descriptive_stats.xlsx")
-    stats_df.to_excel(stats_filename, index=False)
-    st.write(f"Estadísticas descriptivas guardadas en {stats_filename}")
+    filters = [value for value in (category, sex) if value != ALL]
+    if filters:
+        stats_filename = os.path.join(os.getcwd(), f"{biomarker}_stats_by_category_{'_'.join(filters)}.xlsx")
+    else:
+        stats_filename = os.path.join(os.getcwd(), f"{biomarker}_descriptive_stats.xlsx")
+    destination = save_table(stats_filename, stats_df)
+    st.write(f"Estadísticas descriptivas guardadas en {destination}")
     
     st.write("### Descripción y Explicación del Gráfico")
     st.write(f"Las estadísticas descriptivas para el biomarcador **{biomarker}** incluyen las siguientes medidas:")
@@ -46,14 +113,31 @@ def display_descriptive_stats(data, biomarker):
 # Function to display and save a histogram
 def display_histogram(data, biomarker):
     st.write(f"## Histograma para {biomarker}")
-    fig, ax = plt.subplots()
-    sns.histplot(data[biomarker], kde=True, ax=ax)
-    st.pyplot(fig)
+    # Numeric columns: the counts and the KDE curve come from one binning pass (cached per
+    # dataset, column and bandwidth), so the figure only draws them
+    numeric = pd.api.types.is_numeric_dtype(data[biomarker])
+    
+    # Render the figure only on a cache miss
+    def render():
+        fig, ax = plt.subplots()
+        if numeric:
+            density = get_histogram_density(data, biomarker)
+            # Same bars as histplot(kde=True), which lightens them when the curve is drawn
+            sns.histplot(x=density.edges[:-1], weights=density.counts, bins=len(density.counts),
+                         binrange=(density.edges[0], density.edges[-1]), ax=ax, color='C0',
+                         alpha=0.5 if density.has_density() else 0.75)
+            if density.has_density():
+                ax.plot(*density.curve(), color='C0')
+            ax.set_xlabel(biomarker)
+        else:
+            sns.histplot(data[biomarker], ax=ax)
+        return fig
+    png = show_figure(dataset_hash(data), 'histogram', [biomarker], {'kde': 'binned'}, render)
     
     # Save histogram to PNG file
     hist_filename = os.path.join(os.getcwd(), f"{biomarker}_histogram.png")
-    fig.savefig(hist_filename)
-    st.write(f"Histograma guardado en {hist_filename}")
+    destination = save_png(hist_filename, png)
+    st.write(f"Histograma guardado en {destination}")
     
     st.write("### Descripción y Explicación del Gráfico")
     st.write(f"El histograma para el biomarcador **{biomarker}** muestra la distribución de sus valores en diferentes intervalos. La línea suave (KDE) superpuesta proporciona una estimación de la densidad de la distribución. Este gráfico es útil para visualizar cómo se distribuyen los valores del biomarcador y para identificar patrones como la simetría, la asimetría y la presencia de valores atípicos.")
@@ -61,14 +145,28 @@ def display_histogram(data, biomarker):
 # Function to display and save a box plot
 def display_box_plot(data, biomarker):
     st.write(f"## Diagrama de Caja para {biomarker}")
-    fig, ax = plt.subplots()
-    sns.boxplot(x=data[biomarker], ax=ax)
-    st.pyplot(fig)
+    # Render the figure only on a cache miss
+    # Above MAX_POINTS rows the box is drawn from its precomputed quartiles, with the
+    # outliers thinned out across their range
+    def render():
+        fig, ax = plt.subplots()
+        if pd.api.types.is_numeric_dtype(data[biomarker]) and len(data) > MAX_POINTS:
+            values = data[biomarker].to_numpy(dtype=np.float64, na_value=np.nan)
+            box, outliers = box_stats(values, biomarker)
+            ax.bxp([box], vert=False, widths=0.8, patch_artist=True,
+                   boxprops={'facecolor': sns.color_palette()[0]}, medianprops={'color': 'black'})
+            ax.set_yticks([])
+            ax.set_xlabel(biomarker)
+            label_figure(fig, summary_caption({'count': int((~np.isnan(values)).sum()), 'box': box, 'outliers': outliers}))
+        else:
+            sns.boxplot(x=data[biomarker], ax=ax)
+        return fig
+    png = show_figure(dataset_hash(data), 'box_plot', [biomarker], {'max_points': MAX_POINTS}, render)
     
     # Save box plot to PNG file
     box_filename = os.path.join(os.getcwd(), f"{biomarker}_box_plot.png")
-    fig.savefig(box_filename)
-    st.write(f"Diagrama de caja guardado en {box_filename}")
+    destination = save_png(box_filename, png)
+    st.write(f"Diagrama de caja guardado en {destination}")
     
     st.write("### Descripción y Explicación del Gráfico")
     st.write(f"El diagrama de caja para el biomarcador **{biomarker}** visualiza la distribución de los datos a través de sus cuartiles. Los elementos clave del diagrama de caja incluyen:")
@@ -82,18 +180,52 @@ def display_box_plot(data, biomarker):
 def display_scatter_and_age_plot(data, biomarker):
     st.write(f"## Diagrama de Dispersión (Edad vs {biomarker})")
 
-    # Scatter plot with Age on X-axis and Biomarker on Y-axis
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.scatterplot(x='Age', y=biomarker, data=data, ax=ax, color='green')
-    sns.regplot(x='Age', y=biomarker, data=data, ax=ax, scatter=False, color='red', line_kws={"linewidth":2})
-    ax.set_xlabel('Edad')
-    ax.set_ylabel(biomarker)
-    st.pyplot(fig)
+    # The trend line and its 95% band are fitted in closed form for every biomarker at once;
+    # the bootstrap band (what seaborn's regplot draws) is opt-in and runs in worker processes
+    fits = get_trend_fits(data, 'Age')
+    bootstrap = st.checkbox("Banda de confianza por bootstrap (más lenta)", key='trend_bootstrap')
+    
+    # Level of detail: above MAX_POINTS rows the scatter shows a stratified sample that keeps
+    # every outlier, or a hexbin density map
+    numeric = pd.api.types.is_numeric_dtype(data[biomarker])
+    dense_mode = 'muestra'
+    if numeric and len(data) > MAX_POINTS:
+        dense_mode = st.radio("Representación con muchos puntos", ['muestra', 'densidad'], horizontal=True,
+                              format_func={'muestra': "Muestra estratificada", 'densidad': "Densidad (hexbin)"}.get,
+                              key='scatter_dense_mode')
+    
+    # Scatter plot with Age on X-axis and Biomarker on Y-axis (rendered only on a cache miss)
+    def render():
+        fig, ax = plt.subplots(figsize=(12, 6))
+        if numeric:
+            age = data['Age'].to_numpy(dtype=np.float64, na_value=np.nan)
+            values = data[biomarker].to_numpy(dtype=np.float64, na_value=np.nan)
+            mode, rows, total = scatter_plan(age, values, MAX_POINTS, dense_mode)
+            if mode == 'densidad':
+                hexbin = ax.hexbin(age[rows], values[rows], gridsize=HEXBIN_GRIDSIZE, mincnt=1, cmap='Greens')
+                fig.colorbar(hexbin, ax=ax, label='Puntos')
+            else:
+                sns.scatterplot(x='Age', y=biomarker, data=data.iloc[rows], ax=ax, color='green')
+            label_figure(fig, scatter_caption(mode, len(rows), total))
+        else:
+            sns.scatterplot(x='Age', y=biomarker, data=data, ax=ax, color='green')
+        if fits.has_fit(biomarker):
+            if bootstrap:
+                x, y, lower, upper = get_bootstrap_band(data, 'Age', biomarker)
+            else:
+                x, y, lower, upper = fits.line(biomarker)
+            ax.plot(x, y, color='red', linewidth=2)
+            ax.fill_between(x, lower, upper, color='red', alpha=0.15, linewidth=0)
+        ax.set_xlabel('Edad')
+        ax.set_ylabel(biomarker)
+        return fig
+    png = show_figure(dataset_hash(data), 'scatter_age', [biomarker],
+                      {'bootstrap': bootstrap, 'max_points': MAX_POINTS, 'dense_mode': dense_mode}, render)
     
     # Save scatter plot to PNG file
     scatter_filename = os.path.join(os.getcwd(), f"{biomarker}_scatter_plot.png")
-    fig.savefig(scatter_filename)
-    st.write(f"Diagrama de dispersión con Edad vs {biomarker} guardado en {scatter_filename}")
+    destination = save_png(scatter_filename, png)
+    st.write(f"Diagrama de dispersión con Edad vs {biomarker} guardado en {destination}")
     
     st.write("### Descripción y Explicación del Gráfico")
     st.write(f"El diagrama de dispersión muestra la relación entre la **Edad** y el biomarcador **{biomarker}**. Cada punto azul representa un individuo en el conjunto de datos. La línea roja es una línea de regresión que indica la tendencia general de la relación entre la edad y el biomarcador. Este gráfico es útil para identificar patrones y relaciones lineales entre dos variables numéricas.")
@@ -102,29 +234,15 @@ def display_scatter_and_age_plot(data, biomarker):
 def display_polynomial_regression(data, predictor, target, degree):
     st.write(f"## Análisis de Regresión Polinómica (Grado {degree}) ({predictor} vs {target})")
     
-    # Prepare the data
-    X = data[[predictor]]
-    y = data[target]
-    
     # Eliminate rows with NaN values
     valid_data = data[[predictor, target]].dropna()
-    X = valid_data[[predictor]]
-    y = valid_data[target]
-    
-    # Transform features to polynomial features
-    poly = PolynomialFeatures(degree=degree)
-    X_poly = poly.fit_transform(X)
-    
-    # Fit the polynomial regression model
-    model = LinearRegression()
-    model.fit(X_poly, y)
     
-    # Make predictions
-    y_pred = model.predict(X_poly)
+    # Fit every degree up to the slider maximum once; moving the slider only reads the result
+    sweep = get_polynomial_sweep(data, predictor, target, MAX_POLYNOMIAL_DEGREE)
     
-    # Calculate R-squared and MSE
-    r2 = r2_score(y, y_pred)
-    mse = mean_squared_error(y, y_pred)
+    # R-squared and MSE of the selected degree
+    r2 = sweep.r2[degree]
+    mse = sweep.mse[degree]
     sqrt_r2 = np.sqrt(r2)
     
     # Display R-squared, sqrt(R-squared), and MSE
@@ -132,26 +250,23 @@ def display_polynomial_regression(data, predictor, target, degree):
     st.write(f"Raíz cuadrada de R-cuadrado: {sqrt_r2}")
     st.write(f"Error Cuadrático Medio: {mse}")
     
-    # Plot the polynomial regression line
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.scatterplot(x=predictor, y=target, data=valid_data, ax=ax, color='orange')
-    
-    # Sort values for plotting
-    sorted_data = valid_data.sort_values(predictor)
-    X_sorted = sorted_data[[predictor]]
-    X_sorted_poly = poly.transform(X_sorted)
-    y_sorted_pred = model.predict(X_sorted_poly)
-    
-    sns.lineplot(x=sorted_data[predictor], y=y_sorted_pred, ax=ax, color='red', linewidth=2)
-    ax.set_xlabel(predictor)
-    ax.set_ylabel(target)
-    ax.set_title(f"Regresión Polinómica (Grado {degree}): {predictor} vs {target}")
-    st.pyplot(fig)
+    # Plot the polynomial regression line (rendered only on a cache miss)
+    def render():
+        fig, ax = plt.subplots(figsize=(12, 6))
+        sns.scatterplot(x=predictor, y=target, data=valid_data, ax=ax, color='orange')
+        
+        # Fitted curve over the sorted distinct predictor values
+        sns.lineplot(x=sweep.x_unique, y=sweep.fitted(degree), ax=ax, color='red', linewidth=2)
+        ax.set_xlabel(predictor)
+        ax.set_ylabel(target)
+        ax.set_title(f"Regresión Polinómica (Grado {degree}): {predictor} vs {target}")
+        return fig
+    png = show_figure(dataset_hash(data), 'polynomial_regression', [predictor, target], {'degree': degree}, render)
     
     # Save regression plot to PNG file
     regression_filename = os.path.join(os.getcwd(), f"{target}_polynomial_regression_plot.png")
-    fig.savefig(regression_filename)
-    st.write(f"Gráfico de regresión polinómica guardado en {regression_filename}")
+    destination = save_png(regression_filename, png)
+    st.write(f"Gráfico de regresión polinómica guardado en {destination}")
     
     st.write("### Descripción y Explicación del Análisis")
     st.write(f"En este análisis de regresión polinómica, se muestra la relación entre **{predictor}** y **{target}** utilizando un modelo polinómico de grado **{degree}**. La línea roja representa la predicción del modelo polinómico. Este análisis es útil para capturar relaciones no lineales entre las variables.")
@@ -161,57 +276,50 @@ def display_polynomial_regression(data, predictor, target, degree):
     st.write("- **Error Cuadrático Medio:** Mide la precisión de las predicciones realizadas por el modelo.")
 
 # Function to calculate and display average of all biomarkers
-def display_average_biomarkers(data):
+# (means of the numeric columns other than 'Unnamed: 0', precomputed in the cube)
+def display_average_biomarkers(cube, complete_cases=False):
     st.write("## Promedio de Todos los Biomarcadores")
     
-    # Exclude columns 'Category', 'Unnamed: 0', and 'Sexo'
-    exclude_columns = ['Category', 'Unnamed: 0', 'Sex']
-    biomarker_data = data.drop(columns=exclude_columns, errors='ignore')
-    
-    # Select only numeric columns
-    numeric_biomarkers = biomarker_data.select_dtypes(include=[np.number])
-    
-    # Calculate average of each biomarker
-    biomarker_averages = numeric_biomarkers.mean()
+    biomarker_averages = cube.means(complete_cases)
     st.write(biomarker_averages)
     
-    # Plot the averages
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.barplot(x=biomarker_averages.index, y=biomarker_averages.values, ax=ax)
-    ax.set_xlabel('Biomarcadores')
-    ax.set_ylabel('Promedio')
-    ax.set_title('Promedio de Todos los Biomarcadores')
-    plt.xticks(rotation=90)
-    st.pyplot(fig)
+    # Plot the averages (rendered only on a cache miss)
+    def render():
+        fig, ax = plt.subplots(figsize=(12, 6))
+        sns.barplot(x=biomarker_averages.index, y=biomarker_averages.values, ax=ax)
+        ax.set_xlabel('Biomarcadores')
+        ax.set_ylabel('Promedio')
+        ax.set_title('Promedio de Todos los Biomarcadores')
+        plt.xticks(rotation=90)
+        return fig
+    png = show_figure(cube.content_hash, 'average_biomarkers', [], {'complete_cases': complete_cases}, render)
     
     # Save averages plot to PNG file
     averages_filename = os.path.join(os.getcwd(), "average_biomarkers_plot.png")
-    fig.savefig(averages_filename)
-    st.write(f"Gráfico de promedio de todos los biomarcadores guardado en {averages_filename}")
+    destination = save_png(averages_filename, png)
+    st.write(f"Gráfico de promedio de todos los biomarcadores guardado en {destination}")
     
     st.write("### Descripción y Explicación del Gráfico")
     st.write("En este gráfico se muestra el promedio de cada biomarcador en el conjunto de datos. Cada barra representa el valor promedio de un biomarcador específico. Este análisis es útil para obtener una visión general de los niveles promedio de cada biomarcador y para identificar aquellos que pueden tener valores significativamente diferentes.")
 
 # Function to display a heat map of selected biomarkers
-def display_heatmap(data):
+# (correlation matrix of the biomarkers, precomputed in the cube)
+def display_heatmap(cube, complete_cases=False):
     st.write("## Heat Map de Biomarcadores Seleccionados")
     
-    # Select only the desired biomarkers
-    biomarkers = ['ALB', 'ALP', 'ALT', 'AST', 'BIL', 'CHE', 'CHOL', 'CREA', 'GGT', 'PROT']
-    heatmap_data = data[biomarkers]
-    
-    # Compute the correlation matrix
-    corr = heatmap_data.corr()
+    corr = cube.correlation(complete_cases)
     
-    # Plot the heatmap
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.heatmap(corr, annot=True, cmap='coolwarm', ax=ax)
-    st.pyplot(fig)
+    # Plot the heatmap (rendered only on a cache miss)
+    def render():
+        fig, ax = plt.subplots(figsize=(12, 6))
+        sns.heatmap(corr, annot=True, cmap='coolwarm', ax=ax)
+        return fig
+    png = show_figure(cube.content_hash, 'heatmap', [], {'complete_cases': complete_cases}, render)
     
     # Save heatmap to PNG file
     heatmap_filename = os.path.join(os.getcwd(), "biomarkers_heatmap.png")
-    fig.savefig(heatmap_filename)
-    st.write(f"Heatmap guardado en {heatmap_filename}")
+    destination = save_png(heatmap_filename, png)
+    st.write(f"Heatmap guardado en {destination}")
     
     st.write("### Descripción y Explicación del Heat Map")
     st.write("Este heat map muestra las correlaciones entre diferentes biomarcadores seleccionados. Las correlaciones pueden variar entre -1 y 1, donde los valores cercanos a 1 indican una fuerte correlación positiva, los valores cercanos a -1 indican una fuerte correlación negativa, y los valores cercanos a 0 indican una correlación débil o nula. Este gráfico es útil para identificar relaciones y patrones entre múltiples biomarcadores.")
@@ -219,70 +327,139 @@ def display_heatmap(data):
 # Function to train and predict using a machine learning model
 def train_and_predict_model(data):
     st.write("## Predicción de Estado Basado en Biomarcadores")
+    cube = get_stats_cube(data)
 
-    # Prepare data
-    exclude_columns = ['Category', 'Unnamed: 0', 'Sex']
-    feature_columns = [col for col in data.columns if col not in exclude_columns]
-    X = data[feature_columns]
-    y = data['Category']
-
-    # Handle missing values by dropping rows with NaN values
-    data = data.dropna(subset=feature_columns + ['Category'])
-    X = data[feature_columns]
-    y = data['Category']
-
-    # Split data into train and test sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    # Train a Logistic Regression Classifier
-    model = make_pipeline(StandardScaler(), LogisticRegression(random_state=42))
-    model.fit(X_train, y_train)
+    # Train (or load) the Logistic Regression Classifier; it is fitted once per dataset
+    # and stored in the model registry, so editing an input below doesn't retrain it
+    model = get_category_classifier(data, dataset_hash(data))
 
     # Display model accuracy
-    accuracy = model.score(X_test, y_test)
-    st.write(f"Precisión del modelo: {accuracy:.2f}")
+    st.write(f"Precisión del modelo: {model.accuracy:.2f}")
 
     # User input for biomarker values
     st.write("### Ingrese los valores de los biomarcadores para la predicción")
-    user_input = {col: st.number_input(f"{col}", value=0.0) for col in feature_columns}
-
-    # Convert user input to DataFrame
-    user_input_df = pd.DataFrame([user_input])
+    user_input = {col: st.number_input(f"{col}", value=0.0) for col in model.features}
 
     # Predict using the trained model
-    prediction_prob = model.predict_proba(user_input_df)
-    prediction = model.predict(user_input_df)
+    prediction_prob = model.predict_proba_row(user_input)
     
     # Display prediction probability
-    probability_hepatitis_c = prediction_prob[0][1] * 100  # Convert to percentage
+    probability_hepatitis_c = prediction_prob[1] * 100  # Convert to percentage
     st.write(f"Probabilidad de Hepatitis C: **{probability_hepatitis_c:.2f}%**")
     
-    # Display heatmap of selected biomarkers
-    display_heatmap(data)
+    # Batch scoring of a CSV/Parquet of patients with the same feature columns
+    display_batch_scoring(model)
+    
+    # Display heatmap of selected biomarkers (rows used for training only)
+    display_heatmap(cube, complete_cases=True)
     
     # Display average biomarkers
-    display_average_biomarkers(data)
+    display_average_biomarkers(cube, complete_cases=True)
+
+# Function to score a whole file of patients with the trained model.
+# The file is read, scored and written in chunks, so large lab exports fit in memory.
+def display_batch_scoring(model):
+    st.write("### Diagnóstico por lotes")
+    st.write(f"Columnas requeridas: {', '.join(model.features)}")
+    batch_file = st.file_uploader("Suba un archivo CSV o Parquet de pacientes", type=["csv", "parquet"], key="batch_scoring")
+    if batch_file is None:
+        return
+
+    output = io.BytesIO()
+    try:
+        rows = score_file(model, batch_file, output, destination_format='csv')
+    except ValueError as e:
+        st.error(f"No se pudo procesar el archivo: {e}")
+        return
+    st.write(f"Pacientes evaluados: {rows}")
+
+    output_name = os.path.splitext(batch_file.name)[0] + "_probabilidades.csv"
+    st.download_button("Descargar probabilidades por paciente", output.getvalue(),
+                       file_name=output_name, mime="text/csv")
 
 # Function to display comparison by category
-def display_comparison_by_category(data, biomarker, category_column):
+# (Category and Sex box plots are drawn from the quartiles precomputed in the cube)
+def display_comparison_by_category(data, cube, biomarker, category_column):
     st.write(f"## Comparación de {biomarker} por {category_column}")
 
-    # Create a box plot for the comparison
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.boxplot(x=category_column, y=biomarker, data=data, ax=ax)
-    ax.set_xlabel(category_column)
-    ax.set_ylabel(biomarker)
-    ax.set_title(f"Comparación de {biomarker} por {category_column}")
-    st.pyplot(fig)
+    # Create a box plot for the comparison (rendered only on a cache miss)
+    def render():
+        fig, ax = plt.subplots(figsize=(12, 6))
+        if category_column in GROUP_COLUMNS and biomarker not in cube.categorical:
+            box_stats = cube.box_stats(biomarker, category_column)
+            boxes = ax.bxp(box_stats, patch_artist=True)
+            for patch, color in zip(boxes['boxes'], sns.color_palette(n_colors=len(box_stats))):
+                patch.set_facecolor(color)
+        else:
+            sns.boxplot(x=category_column, y=biomarker, data=data, ax=ax)
+        ax.set_xlabel(category_column)
+        ax.set_ylabel(biomarker)
+        ax.set_title(f"Comparación de {biomarker} por {category_column}")
+        return fig
+    png = show_figure(dataset_hash(data), 'comparison', [biomarker, category_column], {}, render)
     
     # Save the comparison plot to PNG file
     comparison_filename = os.path.join(os.getcwd(), f"{biomarker}_comparison_by_{category_column}.png")
-    fig.savefig(comparison_filename)
-    st.write(f"Gráfico de comparación guardado en {comparison_filename}")
+    destination = save_png(comparison_filename, png)
+    st.write(f"Gráfico de comparación guardado en {destination}")
     
     st.write("### Descripción y Explicación del Gráfico")
     st.write(f"El diagrama de caja compara el biomarcador **{biomarker}** entre las diferentes categorías de **{category_column}**. Cada caja representa la distribución del biomarcador en cada categoría, permitiendo observar diferencias y patrones entre categorías.")
 
+# Function to compare classifiers with stratified k-fold cross-validation and pick the
+# most accurate one within a latency budget. Fold results are cached per dataset, so the
+# comparison is only computed the first time it is requested.
+def display_model_selection(data):
+    st.write("## Selección de Modelos por Validación Cruzada")
+    budget_ms = st.number_input("Presupuesto de latencia por predicción individual (ms)", min_value=0.01, value=1.0)
+    if st.button("Ejecutar validación cruzada"):
+        st.session_state.model_selection_ran = True
+    if not st.session_state.get('model_selection_ran'):
+        st.write("Pulse el botón para comparar Regresión Logística, Árbol de Decisión y modelos de conjunto.")
+        return
+
+    with st.spinner("Evaluando modelos..."):
+        results = get_model_selector().evaluate(data)
+    st.dataframe(results)
+    destination = save_table(os.path.join(os.getcwd(), "model_selection_cv.xlsx"), results)
+    st.write(f"Resultados de la validación cruzada guardados en {destination}")
+
+    # Accuracy against single-row latency (rendered only on a cache miss)
+    def render():
+        fig, ax = plt.subplots(figsize=(12, 6))
+        sns.scatterplot(x='single_row_ms', y='accuracy', hue='modelo', data=results, ax=ax, s=80)
+        ax.axvline(budget_ms, color='red', linestyle='--', label='Presupuesto')
+        ax.set_xscale('log')
+        ax.set_xlabel("Latencia por predicción individual (ms)")
+        ax.set_ylabel("Precisión media (CV)")
+        ax.set_title("Precisión vs Latencia")
+        ax.legend()
+        return fig
+    png = show_figure(dataset_hash(data), 'model_selection', [], {'budget_ms': budget_ms}, render)
+    destination = save_png(os.path.join(os.getcwd(), "model_selection_accuracy_vs_latency.png"), png)
+    st.write(f"Gráfico de selección de modelos guardado en {destination}")
+
+    best = select_model(results, max_single_row_ms=budget_ms)
+    if best is None:
+        st.warning("Ningún modelo cumple el presupuesto de latencia.")
+    else:
+        st.success(f"Modelo recomendado: **{best['modelo']}** {best['parametros']} — precisión {best['accuracy']:.3f}, {best['single_row_ms']:.3f} ms por predicción")
+
+    # Best decision tree refitted on all complete rows
+    tree_row = results[results['modelo'] == 'Árbol de Decisión'].iloc[0]
+    params = json.loads(tree_row['parametros'])
+    def render_tree():
+        features = feature_columns(data)
+        complete = data.dropna(subset=features + ['Category'])
+        tree = DecisionTreeClassifier(random_state=42, **params).fit(complete[features], complete['Category'].astype(str))
+        fig, ax = plt.subplots(figsize=(20, 10))
+        plot_tree(tree, feature_names=features, class_names=list(tree.classes_), filled=True, max_depth=3, fontsize=8, ax=ax)
+        ax.set_title(f"Árbol de Decisión {tree_row['parametros']} (primeros 3 niveles)")
+        return fig
+    png = show_figure(dataset_hash(data), 'decision_tree', [], params, render_tree)
+    destination = save_png(os.path.join(os.getcwd(), "decision_tree.png"), png)
+    st.write(f"Gráfico del árbol de decisión guardado en {destination}")
+
 # Streamlit UI
 st.title("Análisis de Biomarcadores en Pacientes con Hepatitis C")
 
@@ -296,8 +473,25 @@ if 'diagnosis_mode' not in st.session_state:
 # Handle file upload
 uploaded_file = st.file_uploader("Elija un archivo CSV", type="csv")
 
+# Opt-in report bundle: artifacts of this rerun are collected into one zip instead of
+# being written one by one to the working directory
+bundle_mode = st.checkbox("Exportar informe como paquete (zip)")
+report_bundle = ReportBundle() if bundle_mode else None
+
+# Stage timings of this rerun (parse, cube, fits, renders, savefig...). They cost a few
+# microseconds per stage, so they are always on; cProfile is opt-in from the panel below.
+perf = PerfRecorder('ProyectoFinal', profile=st.session_state.get('perf_profile', False)).start()
+
 if uploaded_file is not None:
-    data = load_data(uploaded_file)
+    try:
+        data = load_data(uploaded_file)
+    except ValueError as e:
+        st.error(f"El archivo no tiene el formato esperado: {e}")
+        perf.finish()
+        st.stop()
+    
+    # Statistics are precomputed once per dataset version; widgets only look them up
+    cube = get_stats_cube(data)
     
     col1, col2 = st.columns([1, 1])
     with col1:
@@ -312,7 +506,7 @@ if uploaded_file is not None:
 # Display data preview and analysis if analysis_mode is True
 if st.session_state.analysis_mode:
     st.write("### Vista Previa de los Datos")
-    st.dataframe(data)
+    st_paged_preview(data, key='analysis_preview')
 
     # Filter out 'Unnamed: 0' columns
     columns = [col for col in data.columns if col != 'Unnamed: 0']
@@ -327,13 +521,13 @@ if st.session_state.analysis_mode:
         st.error("La columna predictora y la columna objetivo no pueden ser el mismo biomarcador.")
     else:
         # Display descriptive statistics and plots
-        display_descriptive_stats(data, desc_column)
+        display_descriptive_stats(cube, desc_column)
         display_histogram(data, desc_column)
         display_box_plot(data, desc_column)
         display_scatter_and_age_plot(data, desc_column)
         
         # Polynomial regression
-        degree = st.slider("Seleccione el Grado de la Regresión Polinómica", 1, 150, 2)
+        degree = st.slider("Seleccione el Grado de la Regresión Polinómica", 1, MAX_POLYNOMIAL_DEGREE, 2)
         display_polynomial_regression(data, predictor, target, degree)
         
         # Comparison by category
@@ -341,15 +535,32 @@ if st.session_state.analysis_mode:
         if mode == "Comparación por Categoría":
             category_column = st.selectbox("Seleccione la columna de Categoría", [col for col in data.columns if col != 'Category'])
             biomarker_for_comparison = st.selectbox("Seleccione el biomarcador para comparar", columns)
-            display_comparison_by_category(data, biomarker_for_comparison, category_column)
+            display_comparison_by_category(data, cube, biomarker_for_comparison, category_column)
+        else:
+            display_model_selection(data)
 
 # Display average biomarkers if diagnosis_mode is True
 if st.session_state.diagnosis_mode:
     st.write("### Vista Previa de los Datos")
-    st.dataframe(data)
+    st_paged_preview(data, key='diagnosis_preview')
     
     # Display average biomarkers and heatmap
     
 
     # Run the prediction model
-    train_and_predict_model(data)
\ No newline at end of file
+    train_and_predict_model(data)
+
+# Offer the report bundle collected during this rerun
+if report_bundle is not None and (report_bundle.files or report_bundle.tables):
+    st.download_button("Descargar paquete de informe", report_bundle.to_zip(),
+                       file_name="informe_biomarcadores.zip", mime="application/zip")
+
+# Performance panel of this rerun; the same record is appended to .perf/perf_log.jsonl
+perf_entry = perf.finish()
+with st.expander("Rendimiento"):
+    st.write(f"Tiempo total de la ejecución: {perf_entry['seconds']:.3f} s — "
+             f"memoria residente máxima: {format_mib(perf_entry['max_rss_bytes'])}")
+    st.dataframe(summary_table(perf))
+    if perf.profile_path:
+        st.write(f"Perfil cProfile guardado en {perf.profile_path}")
+    st.checkbox("Perfilar las próximas ejecuciones con cProfile", key='perf_profile')
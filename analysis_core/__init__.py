@@ -0,0 +1,2 @@
+# Headless analysis layer used by ProyectoFinal.py
+from analysis_core.dataset import BIOMARKERS, content_hash, dataset_hash, load_hepatitis_data
@@ -0,0 +1,103 @@
+import hashlib
+import io
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from etl_core.perf import stage
+
+# Schema of HepatitisCdata.csv
+ID_COLUMN = 'Unnamed: 0'
+CATEGORIES = ['0=Blood Donor', '0s=suspect Blood Donor', '1=Hepatitis', '2=Fibrosis', '3=Cirrhosis']
+SEXES = ['f', 'm']
+BIOMARKERS = ['ALB', 'ALP', 'ALT', 'AST', 'BIL', 'CHE', 'CHOL', 'CREA', 'GGT', 'PROT']
+COLUMNS = [ID_COLUMN, 'Category', 'Age', 'Sex'] + BIOMARKERS
+
+# Dtypes applied while parsing, so no float64/object intermediate is ever built
+PARSE_DTYPES = {
+    ID_COLUMN: 'int32',
+    'Category': pd.CategoricalDtype(CATEGORIES),
+    'Age': 'float32',
+    'Sex': pd.CategoricalDtype(SEXES),
+    **{biomarker: 'float32' for biomarker in BIOMARKERS},
+}
+
+# Number of parsed datasets kept in memory
+CACHE_SIZE = 4
+_cache = OrderedDict()
+
+# Function to compute the content hash of a path, bytes or file-like object
+def content_hash(source, block_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+    elif hasattr(source, 'getbuffer'):
+        # BytesIO (and Streamlit's UploadedFile): hash the buffer without copying it
+        digest.update(source.getbuffer())
+    else:
+        position = source.tell()
+        for block in iter(lambda: source.read(block_size), b''):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+# Function to get the content hash a dataset was loaded with (None for other frames)
+def dataset_hash(data):
+    return data.attrs.get('content_hash')
+
+# Function to check the parsed frame against the schema
+def _validate(data):
+    missing = [col for col in COLUMNS if col not in data.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(missing)}")
+
+    # Values outside the known categories would silently become NaN; report them instead
+    for column, known in (('Category', CATEGORIES), ('Sex', SEXES)):
+        unknown = set(data[column].cat.categories) - set(known)
+        if unknown:
+            raise ValueError(f"Valores desconocidos en {column}: {', '.join(sorted(map(str, unknown)))}")
+
+# Function to parse HepatitisCdata.csv into a compact, schema-validated frame:
+# categorical Category/Sex, float32 biomarkers and uint8 Age (float32 if it has gaps)
+def parse_hepatitis_data(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, 'seek'):
+        source.seek(0)
+
+    # Category and Sex are parsed with the categories found in the file, which are
+    # checked and then recoded to the fixed schema categories
+    data = pd.read_csv(source, dtype={**PARSE_DTYPES, 'Category': 'category', 'Sex': 'category'})
+    _validate(data)
+    data['Category'] = data['Category'].astype(PARSE_DTYPES['Category'])
+    data['Sex'] = data['Sex'].astype(PARSE_DTYPES['Sex'])
+
+    age = data['Age']
+    if age.notna().all() and age.between(0, 255).all() and (age == np.floor(age)).all():
+        data['Age'] = age.astype('uint8')
+    return data[COLUMNS]
+
+# Function to load the dataset, parsing it only once per content hash.
+# The cached frame itself is returned (no copy): callers must not modify it in place.
+def load_hepatitis_data(source, digest=None):
+    if digest is None:
+        with stage('hash_csv'):
+            digest = content_hash(source)
+    if digest in _cache:
+        _cache.move_to_end(digest)
+        return _cache[digest]
+
+    with stage('parse_csv') as timing:
+        data = parse_hepatitis_data(source)
+        timing.rows = len(data)
+    data.attrs['content_hash'] = digest
+    _cache[digest] = data
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return data
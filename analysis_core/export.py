@@ -0,0 +1,132 @@
+import hashlib
+import io
+import os
+import queue
+import threading
+import zipfile
+
+# Function to hash artifact bytes for deduplication
+def content_digest(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+# Function to check whether a file on disk already holds exactly these bytes
+def _same_file_content(path, content):
+    if not os.path.exists(path) or os.path.getsize(path) != len(content):
+        return False
+    with open(path, 'rb') as f:
+        return f.read() == content
+
+# Background writer for report artifacts (PNG figures, Excel tables). Writes run in a
+# small thread pool fed by a bounded queue, so the Streamlit script does not wait on disk;
+# when the queue is full the artifact is written right away instead, so none is lost.
+# An artifact whose content was already written (or is queued) for the same path is skipped.
+class ArtifactExporter:
+    def __init__(self, workers=2, max_pending=64):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._written = {}     # path -> digest of the last content written
+        self._pending = set()  # (path, digest) waiting in the queue
+        self.written = 0
+        self.skipped = 0
+        self.inline_writes = 0
+        self.errors = []
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"artifact-writer-{i}", daemon=True).start()
+
+    # Function to queue an artifact. content is the bytes to write; alternatively producer
+    # is a callable that builds the bytes in the worker (e.g. DataFrame.to_excel) and key
+    # identifies its content for deduplication. Returns False if the artifact was skipped.
+    def submit(self, path, content=None, producer=None, key=None):
+        digest = key if key is not None else content_digest(content)
+        with self._lock:
+            if self._written.get(path) == digest or (path, digest) in self._pending:
+                self.skipped += 1
+                return False
+            self._pending.add((path, digest))
+
+        try:
+            self._queue.put_nowait((path, digest, content, producer))
+        except queue.Full:
+            # Writers are behind: write in the caller rather than lose the artifact
+            with self._lock:
+                self.inline_writes += 1
+            self._write(path, digest, content, producer)
+        return True
+
+    # Function to write one artifact (atomically) and record the result
+    def _write(self, path, digest, content, producer):
+        try:
+            if content is None:
+                content = producer()
+            if not _same_file_content(path, content):
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            with self._lock:
+                self._written[path] = digest
+                self.written += 1
+        except Exception as e:
+            with self._lock:
+                self.errors.append((path, str(e)))
+        finally:
+            with self._lock:
+                self._pending.discard((path, digest))
+
+    def _work(self):
+        while True:
+            path, digest, content, producer = self._queue.get()
+            try:
+                self._write(path, digest, content, producer)
+            finally:
+                self._queue.task_done()
+
+    # Function to wait until every queued artifact has been written
+    def flush(self):
+        self._queue.join()
+
+# In-memory collection of the artifacts of one report, exported as a single zip
+# (figures and tables) or as a multi-sheet Excel workbook (tables only).
+class ReportBundle:
+    def __init__(self):
+        self.files = {}   # file name -> bytes
+        self.tables = {}  # sheet name -> DataFrame
+
+    def add_file(self, name, content):
+        self.files[name] = content
+
+    def add_table(self, name, table):
+        self.tables[name] = table
+
+    # Function to build the zip: PNGs are stored as-is (already compressed), tables as one workbook
+    def to_zip(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name, content in self.files.items():
+                compression = zipfile.ZIP_STORED if name.endswith('.png') else zipfile.ZIP_DEFLATED
+                archive.writestr(name, content, compress_type=compression)
+            if self.tables:
+                archive.writestr('tablas.xlsx', self.to_workbook(), compress_type=zipfile.ZIP_STORED)
+        return buffer.getvalue()
+
+    # Function to write every table to its own sheet of one workbook
+    def to_workbook(self):
+        import pandas as pd
+
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            for name, table in self.tables.items():
+                # Excel limits sheet names to 31 characters
+                table.to_excel(writer, sheet_name=name[:31], index=False)
+        return buffer.getvalue()
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+# Function to get the process-wide exporter (kept across Streamlit reruns)
+def get_exporter():
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = ArtifactExporter()
+        return _exporter
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import time
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from analysis_core.dataset import dataset_hash
+from analysis_core.models import MODELS_DIR, feature_columns
+from etl_core.perf import stage
+
+# Folder of the cached fold scores; a subfolder, so the model registry does not read them
+CV_CACHE_DIR = os.path.join(MODELS_DIR, 'cv')
+
+# Cross-validation settings
+N_SPLITS = 5
+RANDOM_STATE = 42
+
+# Calls used to time single-row predictions (what one interactive or HTTP request costs)
+SINGLE_ROW_CALLS = 20
+
+# Function to build the candidate models: name -> (estimator, hyperparameter grid).
+# Grid keys use the estimator's set_params names. scikit-learn is imported here, on
+# first use, rather than when the module is imported.
+def candidate_models():
+    from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import DecisionTreeClassifier
+
+    return {
+        'Regresión Logística': (
+            make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000, random_state=RANDOM_STATE)),
+            {'logisticregression__C': [0.1, 1.0, 10.0]},
+        ),
+        'Árbol de Decisión': (
+            DecisionTreeClassifier(random_state=RANDOM_STATE),
+            {'max_depth': [3, 5, 8, None], 'min_samples_leaf': [1, 5]},
+        ),
+        'Random Forest': (
+            RandomForestClassifier(n_estimators=100, random_state=RANDOM_STATE),
+            {'max_depth': [None, 8]},
+        ),
+        'Extra Trees': (
+            ExtraTreesClassifier(n_estimators=100, random_state=RANDOM_STATE),
+            {'max_depth': [None, 8]},
+        ),
+        'Gradient Boosting': (
+            HistGradientBoostingClassifier(random_state=RANDOM_STATE),
+            {'learning_rate': [0.05, 0.1]},
+        ),
+    }
+
+# Function to expand a grid into the list of parameter dicts
+def grid_points(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in product(*(grid[key] for key in keys))]
+
+# Function to get the stratified folds of a label vector as (train, test) index arrays
+def stratified_folds(y, n_splits=N_SPLITS, random_state=RANDOM_STATE):
+    from sklearn.model_selection import StratifiedKFold
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+# Function to describe an estimator by its class and constructor settings; nested estimators
+# (pipeline steps) appear as their class name, their settings are already in get_params
+def _estimator_settings(estimator):
+    def describe(value):
+        if hasattr(value, 'get_params'):
+            return f"{type(value).__module__}.{type(value).__qualname__}"
+        if isinstance(value, (list, tuple)):
+            return [describe(item) for item in value]
+        return value
+    return [describe(estimator), {key: describe(value) for key, value in estimator.get_params(deep=True).items()}]
+
+# Function to fit and score one (model, parameters, fold) task; run in a worker process
+def _evaluate_fold(estimator, params, X, y, train, test):
+    from sklearn.base import clone
+    from sklearn.metrics import accuracy_score, balanced_accuracy_score
+
+    model = clone(estimator).set_params(**params)
+    started = time.perf_counter()
+    model.fit(X[train], y[train])
+    fit_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    predicted = model.predict(X[test])
+    predict_s = time.perf_counter() - started
+
+    row = X[test[:1]]
+    started = time.perf_counter()
+    for _ in range(SINGLE_ROW_CALLS):
+        model.predict_proba(row)
+    single_row_s = (time.perf_counter() - started) / SINGLE_ROW_CALLS
+
+    return {
+        'accuracy': float(accuracy_score(y[test], predicted)),
+        'balanced_accuracy': float(balanced_accuracy_score(y[test], predicted)),
+        'fit_s': fit_s,
+        'predict_us_per_row': predict_s / len(test) * 1e6,
+        'single_row_ms': single_row_s * 1000,
+    }
+
+# Cross-validated comparison of the candidate models. Every (model, parameters, fold)
+# result is cached in memory and in a JSON file per dataset, so only new combinations
+# are fitted; the missing ones run in parallel across cores.
+class ModelSelector:
+    def __init__(self, candidates=None, n_splits=N_SPLITS, random_state=RANDOM_STATE, cache_dir=CV_CACHE_DIR, n_jobs=-1):
+        self.candidates = candidates or candidate_models()
+        self.n_splits = n_splits
+        self.random_state = random_state
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self._results = {}
+        self._folds = {}
+
+    # Function to build the cache key of one task. It includes the estimator's fixed settings
+    # and the scikit-learn version, so editing a candidate or upgrading sklearn refits it.
+    def task_key(self, name, estimator, params, fold):
+        import sklearn
+
+        payload = json.dumps([name, _estimator_settings(estimator), params, fold, self.n_splits, self.random_state,
+                              sklearn.__version__], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=12).hexdigest()
+
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, f"cv_{digest}.json")
+
+    def _load_cache(self, digest):
+        if digest in self._results:
+            return self._results[digest]
+        results = {}
+        if digest is not None and self.cache_dir and os.path.exists(self._cache_path(digest)):
+            with open(self._cache_path(digest), encoding='utf-8') as f:
+                results = json.load(f)
+        self._results[digest] = results
+        return results
+
+    def _save_cache(self, digest, results):
+        if digest is None or not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._cache_path(digest) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        os.replace(tmp_path, self._cache_path(digest))
+
+    # Function to get the feature matrix, labels and folds of a dataset (folds cached per hash)
+    def prepare(self, data):
+        features = feature_columns(data)
+        complete = data.dropna(subset=features + ['Category'])
+        X = complete[features].to_numpy(dtype=np.float64)
+        y = complete['Category'].astype(str).to_numpy()
+        digest = dataset_hash(data)
+        folds = self._folds.get(digest) if digest is not None else None
+        if folds is None:
+            folds = stratified_folds(y, self.n_splits, self.random_state)
+            if digest is not None:
+                self._folds[digest] = folds
+        return X, y, folds
+
+    # Function to run the comparison; returns one row per (model, parameters) with the
+    # mean/std of the fold scores and the mean timings
+    def evaluate(self, data):
+        digest = dataset_hash(data)
+        X, y, folds = self.prepare(data)
+        results = self._load_cache(digest)
+
+        tasks = []
+        for name, (estimator, grid) in self.candidates.items():
+            for params in grid_points(grid):
+                for fold, (train, test) in enumerate(folds):
+                    key = self.task_key(name, estimator, params, fold)
+                    if key not in results:
+                        tasks.append((key, estimator, params, train, test))
+
+        if tasks:
+            from joblib import Parallel, delayed
+            with stage('cross_validation', rows=len(y) * len(tasks) // len(folds)):
+                computed = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_evaluate_fold)(estimator, params, X, y, train, test)
+                    for _, estimator, params, train, test in tasks)
+            for (key, *_), result in zip(tasks, computed):
+                results[key] = result
+            self._save_cache(digest, results)
+
+        rows = []
+        for name, (estimator, grid) in self.candidates.items():
+            for params in grid_points(grid):
+                scores = pd.DataFrame([results[self.task_key(name, estimator, params, fold)]
+                                       for fold in range(len(folds))])
+                rows.append({
+                    'modelo': name,
+                    'parametros': json.dumps(params, default=str),
+                    'accuracy': scores['accuracy'].mean(),
+                    'accuracy_std': scores['accuracy'].std(),
+                    'balanced_accuracy': scores['balanced_accuracy'].mean(),
+                    'fit_s': scores['fit_s'].mean(),
+                    'predict_us_per_row': scores['predict_us_per_row'].mean(),
+                    'single_row_ms': scores['single_row_ms'].mean(),
+                })
+        return pd.DataFrame(rows).sort_values('accuracy', ascending=False, ignore_index=True)
+
+# Function to pick the most accurate model whose latencies fit the budget
+# (None for a limit means no limit); returns None when nothing fits
+def select_model(results, max_predict_us_per_row=None, max_single_row_ms=None):
+    eligible = results
+    if max_predict_us_per_row is not None:
+        eligible = eligible[eligible['predict_us_per_row'] <= max_predict_us_per_row]
+    if max_single_row_ms is not None:
+        eligible = eligible[eligible['single_row_ms'] <= max_single_row_ms]
+    if eligible.empty:
+        return None
+    return eligible.sort_values(['accuracy', 'balanced_accuracy'], ascending=False).iloc[0]
+
+_selector = None
+
+# Function to get the selector shared by the app
+def get_model_selector():
+    global _selector
+    if _selector is None:
+        _selector = ModelSelector()
+    return _selector
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+from importlib.metadata import version
+
+import numpy as np
+
+from analysis_core.dataset import ID_COLUMN
+from etl_core.perf import stage
+
+# scikit-learn and joblib are imported only when a model is trained or unpickled,
+# so importing this module (e.g. for batch scoring) stays fast
+
+# Folder where fitted models and their metadata are kept
+MODELS_DIR = '.modelos'
+
+# Hyperparameters of the Category classifier shown in the app
+DEFAULT_PARAMS = {'test_size': 0.2, 'random_state': 42, 'C': 1.0, 'max_iter': 100}
+
+# Columns never used as features
+EXCLUDE_COLUMNS = ['Category', ID_COLUMN, 'Sex']
+
+# A fitted pipeline with its metadata (accuracy, features, class labels, ...).
+# The scaler and logistic regression are folded into plain arrays so scoring a single
+# row is a couple of small numpy operations instead of a pass through the pipeline.
+class TrainedModel:
+    def __init__(self, pipeline, metadata):
+        self.pipeline = pipeline
+        self.metadata = metadata
+        self.features = metadata['features']
+        self.classes = metadata['classes']
+        scaler, classifier = pipeline[0], pipeline[-1]
+        self._weights = (classifier.coef_ / scaler.scale_).T
+        self._bias = classifier.intercept_ - scaler.mean_ @ self._weights
+
+    @property
+    def accuracy(self):
+        return self.metadata['accuracy']
+
+    # Function to get the class probabilities of one observation given as {feature: value}
+    def predict_proba_row(self, values):
+        x = np.array([[values[feature] for feature in self.features]], dtype=np.float64)
+        return self.predict_proba(x)[0]
+
+    # Function to get the class probabilities of a matrix of observations (one row each,
+    # columns in the order of self.features); the same values as pipeline.predict_proba
+    def predict_proba(self, X):
+        scores = np.asarray(X, dtype=np.float64) @ self._weights + self._bias
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores))
+            return np.hstack([1.0 - positive, positive])
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+# Function to get the installed scikit-learn version without importing it
+@lru_cache(maxsize=None)
+def sklearn_version():
+    return version('scikit-learn')
+
+# Function to get the feature columns of the classifier
+def feature_columns(data):
+    return [col for col in data.columns if col not in EXCLUDE_COLUMNS]
+
+# Function to train the Category classifier; returns the pipeline and its metadata
+def train_category_classifier(data, params):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    features = feature_columns(data)
+    data = data.dropna(subset=features + ['Category'])
+    X = data[features]
+    y = data['Category'].astype(str)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=params['test_size'], random_state=params['random_state'])
+
+    started = time.perf_counter()
+    pipeline = make_pipeline(
+        StandardScaler(),
+        LogisticRegression(C=params['C'], max_iter=params['max_iter'], random_state=params['random_state']))
+    pipeline.fit(X_train, y_train)
+
+    metadata = {
+        'accuracy': float(pipeline.score(X_test, y_test)),
+        'features': features,
+        'classes': [str(label) for label in pipeline.classes_],
+        'params': params,
+        'train_rows': len(X_train),
+        'test_rows': len(X_test),
+        'fit_seconds': round(time.perf_counter() - started, 4),
+        'sklearn_version': sklearn_version(),
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return pipeline, metadata
+
+# Registry of fitted models keyed by (dataset hash, model kind, hyperparameters).
+# Each model is stored as '<key>.joblib' plus a '<key>.json' with its metadata.
+# Only the small metadata files are read when the registry is created; a pipeline is
+# unpickled the first time it is requested and then kept in memory.
+class ModelRegistry:
+    def __init__(self, directory=MODELS_DIR):
+        self.directory = directory
+        self._models = {}
+        self._metadata = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                # Only metadata written by put(), next to its model file
+                if name.endswith('.json') and os.path.exists(self._path(name[:-len('.json')], 'joblib')):
+                    with open(os.path.join(directory, name), encoding='utf-8') as f:
+                        self._metadata[name[:-len('.json')]] = json.load(f)
+
+    # Function to build the registry key of a model
+    @staticmethod
+    def key(digest, kind, params):
+        payload = json.dumps([digest, kind, params], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    # Function to list the metadata of every stored model without loading them
+    def entries(self):
+        return dict(self._metadata)
+
+    # Function to get a model from memory or disk; None if it is not stored or was
+    # fitted with another scikit-learn version
+    def get(self, key):
+        if key in self._models:
+            return self._models[key]
+        metadata = self._metadata.get(key)
+        if metadata is None or metadata.get('sklearn_version') != sklearn_version():
+            return None
+        import joblib
+        try:
+            with stage('model_load'):
+                pipeline = joblib.load(self._path(key, 'joblib'))
+        except (OSError, EOFError, ValueError):
+            return None
+        self._models[key] = TrainedModel(pipeline, metadata)
+        return self._models[key]
+
+    # Function to store a fitted pipeline and its metadata (written atomically)
+    def put(self, key, pipeline, metadata):
+        import joblib
+        os.makedirs(self.directory, exist_ok=True)
+        model_path = self._path(key, 'joblib')
+        joblib.dump(pipeline, model_path + '.tmp')
+        os.replace(model_path + '.tmp', model_path)
+        metadata_path = self._path(key, 'json')
+        with open(metadata_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(metadata_path + '.tmp', metadata_path)
+        self._metadata[key] = metadata
+        self._models[key] = TrainedModel(pipeline, metadata)
+        return self._models[key]
+
+    # Function to return the model for (digest, kind, params), calling train() only when
+    # it is not stored yet. train must return (pipeline, metadata).
+    # Without a dataset hash the model is always trained and never stored.
+    def get_or_train(self, digest, kind, params, train):
+        if digest is None:
+            return TrainedModel(*train())
+        key = self.key(digest, kind, params)
+        model = self.get(key)
+        if model is None:
+            with stage(f'model_fit_{kind}'):
+                pipeline, metadata = train()
+            metadata = dict(metadata, dataset_hash=digest, kind=kind)
+            model = self.put(key, pipeline, metadata)
+        return model
+
+_registry = None
+
+# Function to get the registry shared by the app
+def get_model_registry():
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
+
+# Function to get the Category classifier of a dataset, trained at most once per
+# dataset hash and hyperparameter set
+def get_category_classifier(data, digest, params=None):
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    return get_model_registry().get_or_train(
+        digest, 'category_logistic_regression', params,
+        lambda: train_category_classifier(data, params))
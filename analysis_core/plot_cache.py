@@ -0,0 +1,125 @@
+import hashlib
+import io
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+from etl_core.perf import stage
+
+# Options used to rasterize figures; the same as st.pyplot uses
+SAVEFIG_KWARGS = {'format': 'png', 'dpi': 200, 'bbox_inches': 'tight'}
+
+# Version of the cached figures: bump it whenever the drawing code changes, so figures
+# already on disk are not served again (the matplotlib and seaborn versions also count)
+CACHE_VERSION = 1
+
+# Function to describe the renderer that produced the cached figures
+@lru_cache(maxsize=None)
+def _renderer_salt():
+    from importlib.metadata import PackageNotFoundError, version
+
+    versions = {}
+    for package in ('matplotlib', 'seaborn'):
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return [CACHE_VERSION, versions, SAVEFIG_KWARGS]
+
+# Render-once cache of PNG figures keyed by (dataset hash, chart kind, columns, parameters),
+# salted with the renderer version.
+# Recently used figures stay in memory (LRU); every figure is also kept on disk.
+class PlotCache:
+    def __init__(self, max_items=64, disk_dir='.plot_cache', max_disk_items=1024):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Function to build the cache key of a figure
+    @staticmethod
+    def key(digest, kind, columns=(), params=None):
+        payload = json.dumps([_renderer_salt(), digest, kind, list(columns), params or {}], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.png")
+
+    # Function to look a figure up in memory, then on disk
+    def get(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            with open(self._disk_path(key), 'rb') as f:
+                png = f.read()
+            self._remember(key, png)
+            return png
+        return None
+
+    # Function to store a figure in memory and on disk
+    def put(self, key, png):
+        self._remember(key, png)
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp_path = self._disk_path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, self._disk_path(key))
+            self._evict_disk()
+
+    def _remember(self, key, png):
+        self._memory[key] = png
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    # Function to remove the least recently written files when the disk tier is full
+    def _evict_disk(self):
+        files = [entry for entry in os.scandir(self.disk_dir) if entry.name.endswith('.png')]
+        if len(files) <= self.max_disk_items:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.max_disk_items]:
+            os.remove(entry.path)
+
+    # Function to return the PNG of a figure, calling render() only on a cache miss.
+    # render must return a matplotlib Figure; it is rasterized and closed here.
+    # Without a dataset hash the figure is always rendered and never cached.
+    def get_or_render(self, digest, kind, columns, params, render):
+        key = self.key(digest, kind, columns, params) if digest is not None else None
+        png = self.get(key) if key is not None else None
+        if png is not None:
+            self.hits += 1
+            return png
+
+        self.misses += 1
+        with stage(f'render_{kind}'):
+            fig = render()
+        png = figure_to_png(fig)
+        if key is not None:
+            self.put(key, png)
+        return png
+
+# Function to rasterize a figure to PNG bytes and release it
+def figure_to_png(fig):
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    with stage('savefig') as timing:
+        fig.savefig(buffer, **SAVEFIG_KWARGS)
+        timing.bytes = buffer.tell()
+    plt.close(fig)
+    return buffer.getvalue()
+
+_plot_cache = None
+
+# Function to get the process-wide plot cache
+def get_plot_cache():
+    global _plot_cache
+    if _plot_cache is None:
+        _plot_cache = PlotCache()
+    return _plot_cache
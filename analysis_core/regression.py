@@ -0,0 +1,138 @@
+from collections import OrderedDict
+
+import numpy as np
+from numpy.polynomial import chebyshev
+
+from analysis_core.dataset import dataset_hash
+from etl_core.perf import stage
+
+# Relative tolerance below which a basis column is treated as linearly dependent
+RANK_TOLERANCE = 1e-10
+
+# Number of sweeps kept in memory
+CACHE_SIZE = 32
+_cache = OrderedDict()
+
+# Least-squares polynomial fits of y on x for every degree 0..max_degree at once.
+# x is scaled to [-1, 1] and expanded in the Chebyshev basis, which stays well
+# conditioned at high degree (unlike raw powers of x). The basis is orthonormalized
+# column by column, so the fit of degree d uses the first d+1 columns and every
+# degree's R² / MSE follows from one decomposition. Columns that add nothing new
+# (degree above the number of distinct x values) are skipped.
+class PolynomialSweep:
+    def __init__(self, x, y, max_degree):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.max_degree = max_degree
+        self.n = len(x)
+        self.x_min, self.x_max = float(x.min()), float(x.max())
+
+        # Fitting on the distinct x values, weighted by their counts, gives the same
+        # least-squares solution as the raw rows and is much smaller for discrete x
+        self.x_unique, inverse, counts = np.unique(x, return_inverse=True, return_counts=True)
+        y_means = np.bincount(inverse, weights=y) / counts
+        within_ss = float(np.sum((y - y_means[inverse]) ** 2))
+        weights = np.sqrt(counts)
+
+        basis = chebyshev.chebvander(self._scale(self.x_unique), max_degree) * weights[:, None]
+        target = y_means * weights
+        q, r, independent = _orthonormalize(basis)
+        self._r = r
+        self._independent = independent
+        self._qty = q.T @ target
+        # Orthonormal basis evaluated at the distinct x values (weights removed)
+        self._q_unique = q / weights[:, None]
+
+        # RSS of degree d = RSS of the constant-only fit minus the explained part of degrees 1..d
+        explained = np.zeros(max_degree + 1)
+        explained[independent] = self._qty ** 2
+        explained = np.cumsum(explained)
+        rss = float(target @ target) - explained + within_ss
+        rss = np.maximum(rss, 0.0)
+        ss_tot = float(np.sum((y - y.mean()) ** 2))
+
+        self.rss = rss
+        self.mse = rss / self.n
+        self.r2 = 1.0 - rss / ss_tot if ss_tot > 0 else np.zeros_like(rss)
+
+    def _scale(self, x):
+        if self.x_max == self.x_min:
+            return np.zeros_like(np.asarray(x, dtype=np.float64))
+        return (2.0 * np.asarray(x, dtype=np.float64) - (self.x_max + self.x_min)) / (self.x_max - self.x_min)
+
+    # Function to evaluate the orthonormal basis functions at new points
+    def _basis_at(self, x):
+        basis = chebyshev.chebvander(self._scale(x), self.max_degree)[:, self._independent]
+        # Solve basis = Q R for Q at the new points (R is upper triangular)
+        return np.linalg.solve(self._r.T, basis.T).T
+
+    # Function to get the fitted values of one degree at the distinct x values; read
+    # straight from Q, so it stays accurate even where R is badly conditioned
+    def fitted(self, degree):
+        used = np.count_nonzero(self._independent[:degree + 1])
+        return self._q_unique[:, :used] @ self._qty[:used]
+
+    # Function to evaluate the fit of one degree at new points
+    def predict(self, x, degree):
+        used = np.count_nonzero(self._independent[:degree + 1])
+        return self._basis_at(x)[:, :used] @ self._qty[:used]
+
+    # Function to evaluate the fits of every degree 0..max_degree in one pass.
+    # Returns an array of shape (max_degree + 1, len(x)).
+    def predict_all(self, x):
+        partial = np.cumsum(self._basis_at(x) * self._qty, axis=1)
+        partial = np.hstack([np.zeros((partial.shape[0], 1)), partial])
+        used = np.cumsum(self._independent)
+        return partial[:, used].T
+
+    # Function to get the Chebyshev coefficients (in the scaled x) of one degree
+    def coefficients(self, degree):
+        used = np.count_nonzero(self._independent[:degree + 1])
+        coefficients = np.zeros(degree + 1)
+        solution = np.linalg.solve(self._r[:used, :used], self._qty[:used])
+        coefficients[np.flatnonzero(self._independent[:degree + 1])] = solution
+        return coefficients
+
+# Function to orthonormalize the columns of a matrix in order (Gram-Schmidt applied twice
+# for stability), skipping columns that are numerically dependent on the previous ones.
+# Returns Q (kept columns), the square R of the kept columns and the mask of kept columns.
+def _orthonormalize(matrix):
+    rows, cols = matrix.shape
+    q = np.zeros((rows, min(rows, cols)))
+    r = np.zeros((min(rows, cols), cols))
+    independent = np.zeros(cols, dtype=bool)
+    kept = 0
+
+    for j in range(cols):
+        column = matrix[:, j].copy()
+        norm = np.linalg.norm(column)
+        for _ in range(2):
+            projection = q[:, :kept].T @ column
+            column -= q[:, :kept] @ projection
+            r[:kept, j] += projection
+        residual = np.linalg.norm(column)
+        if kept < rows and norm > 0 and residual > RANK_TOLERANCE * norm:
+            q[:, kept] = column / residual
+            r[kept, j] = residual
+            independent[j] = True
+            kept += 1
+
+    return q[:, :kept], r[:kept][:, independent], independent
+
+# Function to get the polynomial sweep of target on predictor, fitted once per
+# (dataset hash, predictor, target, max_degree); rows with missing values are dropped
+def get_polynomial_sweep(data, predictor, target, max_degree):
+    digest = dataset_hash(data)
+    key = (digest, predictor, target, max_degree)
+    if digest is not None and key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    valid_data = data[[predictor, target]].dropna()
+    with stage('polynomial_fit', rows=len(valid_data)):
+        sweep = PolynomialSweep(valid_data[predictor].to_numpy(), valid_data[target].to_numpy(), max_degree)
+    if digest is not None:
+        _cache[key] = sweep
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return sweep
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from analysis_core.dataset import ID_COLUMN
+from etl_core.perf import stage
+
+# Rows read, scored and written at a time
+CHUNK_SIZE = 50_000
+
+# Read buffer for Parquet input (bytes)
+PARQUET_BUFFER_SIZE = 1 << 20
+
+# Name of the column holding the most probable class
+PREDICTION_COLUMN = 'prediccion'
+
+# Function to tell the format of a path or uploaded file from its name
+def _file_format(source, fmt=None):
+    if fmt is not None:
+        return fmt
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    return 'parquet' if str(name).lower().endswith(('.parquet', '.pq')) else 'csv'
+
+# Function to read a CSV or Parquet file of patients in chunks, keeping only the
+# given columns (plus the id column when present)
+def iter_patient_chunks(source, features, chunk_size=CHUNK_SIZE, fmt=None):
+    wanted = [ID_COLUMN] + list(features)
+    if _file_format(source, fmt) == 'parquet':
+        import pyarrow.parquet as pq
+        # Without pre_buffer=False pyarrow reads ahead the whole file, not just the current batch
+        parquet_file = pq.ParquetFile(source, pre_buffer=False, buffer_size=PARQUET_BUFFER_SIZE)
+        available = parquet_file.schema_arrow.names
+        _check_columns(available, features)
+        columns = [col for col in wanted if col in available]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        reader = pd.read_csv(source, usecols=lambda col: col in wanted, chunksize=chunk_size)
+        first = True
+        for chunk in reader:
+            if first:
+                _check_columns(chunk.columns, features)
+                first = False
+            yield chunk
+
+def _check_columns(available, features):
+    missing = [col for col in features if col not in available]
+    if missing:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(missing)}")
+
+# Function to name the probability column of each class
+def _probability_columns(model):
+    return [f"prob_{label}" for label in model.classes]
+
+# Function to build the Parquet schema of a scored file. It is fixed before the first chunk,
+# so a chunk whose predictions are all missing (null type) or whose ids were read as floats
+# is still written with the same types as the others.
+def _scored_schema(model, with_id):
+    import pyarrow as pa
+    fields = [pa.field(ID_COLUMN, pa.int64())] if with_id else []
+    fields += [pa.field(column, pa.float64()) for column in _probability_columns(model)]
+    fields.append(pa.field(PREDICTION_COLUMN, pa.string()))
+    return pa.schema(fields)
+
+# Function to convert a scored chunk to an Arrow table with the given schema
+def _scored_table(scored, schema):
+    import pyarrow as pa
+    if ID_COLUMN in scored.columns:
+        ids = pd.to_numeric(scored[ID_COLUMN], errors='coerce')
+        try:
+            ids = ids.astype('Int64')
+        except TypeError:
+            raise ValueError(f"La columna {ID_COLUMN} debe tener identificadores enteros.") from None
+        scored = scored.assign(**{ID_COLUMN: ids})
+    return pa.Table.from_pandas(scored, schema=schema, preserve_index=False)
+
+# Function to score one chunk: the id column (if any), one probability column per class
+# and the predicted class. Rows with missing or non-finite features get no probabilities.
+def score_frame(model, frame):
+    X = frame[model.features].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    complete = np.isfinite(X).all(axis=1)
+    probabilities = np.full((len(frame), len(model.classes)), np.nan)
+    probabilities[complete] = model.predict_proba(X[complete])
+
+    scored = pd.DataFrame(probabilities, columns=_probability_columns(model), index=frame.index)
+    prediction = np.array(model.classes, dtype=object)[probabilities[complete].argmax(axis=1)]
+    scored[PREDICTION_COLUMN] = None
+    scored.loc[complete, PREDICTION_COLUMN] = prediction
+    if ID_COLUMN in frame.columns:
+        scored.insert(0, ID_COLUMN, frame[ID_COLUMN])
+    return scored
+
+# Function to score a whole file chunk by chunk, writing the results to destination
+# (a path or a binary file object) as CSV or Parquet. Returns the number of rows scored.
+def score_file(model, source, destination, chunk_size=CHUNK_SIZE, source_format=None, destination_format=None):
+    destination_format = _file_format(destination, destination_format)
+    rows = 0
+    writer = None
+    try:
+        for chunk in iter_patient_chunks(source, model.features, chunk_size, source_format):
+            with stage('batch_scoring', rows=len(chunk)):
+                scored = score_frame(model, chunk)
+            if destination_format == 'parquet':
+                import pyarrow.parquet as pq
+                if writer is None:
+                    schema = _scored_schema(model, ID_COLUMN in scored.columns)
+                    writer = pq.ParquetWriter(destination, schema)
+                writer.write_table(_scored_table(scored, schema))
+            else:
+                scored.to_csv(destination, mode='a' if rows else 'w', header=rows == 0, index=False)
+            rows += len(scored)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
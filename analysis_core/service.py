@@ -0,0 +1,231 @@
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from analysis_core.dataset import dataset_hash, load_hepatitis_data
+from analysis_core.models import get_category_classifier
+from analysis_core.scoring import PREDICTION_COLUMN, score_frame
+
+# Largest number of rows scored in one predict_proba call, and how long the first
+# queued row waits for others to join its batch
+MAX_BATCH_ROWS = 256
+MAX_WAIT_SECONDS = 0.002
+
+# Number of recent request latencies kept for the percentiles
+LATENCY_WINDOW = 2048
+
+# Counters of the service: requests, rows, batches and recent latencies
+class ServiceMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.batches = 0
+        self.batched_rows = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record_request(self, rows, seconds, error=False):
+        with self._lock:
+            self.requests += 1
+            self.rows += rows
+            self.errors += int(error)
+            self._latencies.append(seconds)
+
+    def record_batch(self, rows):
+        with self._lock:
+            self.batches += 1
+            self.batched_rows += rows
+
+    # Function to get the counters as a JSON-serializable dict
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            uptime = time.time() - self.started
+            snapshot = {
+                'uptime_s': round(uptime, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'rows': self.rows,
+                'rows_per_s': round(self.rows / uptime, 2) if uptime > 0 else 0.0,
+                'requests_per_s': round(self.requests / uptime, 2) if uptime > 0 else 0.0,
+                'micro_batches': self.batches,
+                'mean_micro_batch_rows': round(self.batched_rows / self.batches, 2) if self.batches else 0.0,
+            }
+        if len(latencies):
+            for name, q in (('p50', 50), ('p95', 95), ('p99', 99)):
+                snapshot[f'latency_{name}_ms'] = round(float(np.percentile(latencies, q)), 3)
+            snapshot['latency_max_ms'] = round(float(latencies.max()), 3)
+        return snapshot
+
+# Collects single rows submitted by concurrent requests and scores them together:
+# one worker thread takes the first queued row, waits up to max_wait for more (up to
+# max_rows), stacks them and makes a single predict_proba call for the whole batch.
+class MicroBatcher:
+    def __init__(self, model, metrics, max_rows=MAX_BATCH_ROWS, max_wait=MAX_WAIT_SECONDS):
+        self.model = model
+        self.metrics = metrics
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    # Function to queue one feature vector; returns a Future with its probabilities
+    def submit(self, x):
+        future = Future()
+        self._queue.put((x, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(pending) < self.max_rows:
+                remaining = deadline - time.perf_counter()
+                try:
+                    pending.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                probabilities = self.model.predict_proba(np.vstack([x for x, _ in pending]))
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.metrics.record_batch(len(pending))
+            for row, (_, future) in zip(probabilities, pending):
+                future.set_result(row)
+
+# Function to turn a JSON object {feature: value} into a feature vector
+def row_vector(model, row):
+    if not isinstance(row, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON con un valor por columna.")
+    missing = [feature for feature in model.features if row.get(feature) is None]
+    if missing:
+        raise ValueError(f"Faltan columnas: {', '.join(missing)}")
+    vector = np.array([float(row[feature]) for feature in model.features], dtype=np.float64)
+    invalid = [feature for feature, value in zip(model.features, vector) if not np.isfinite(value)]
+    if invalid:
+        raise ValueError(f"Valores no finitos en: {', '.join(invalid)}")
+    return vector
+
+# Function to parse a batch body (NDJSON or CSV) into a DataFrame
+def parse_batch(body, content_type):
+    if 'csv' in content_type:
+        return pd.read_csv(io.BytesIO(body))
+    rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+    return pd.DataFrame(rows)
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Set by make_server
+    model = None
+    batcher = None
+    metrics = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._send(200, self.metrics.snapshot())
+        elif self.path == '/health':
+            self._send(200, {'status': 'ok', 'model': self.model.metadata})
+        else:
+            self._send(404, {'error': 'Ruta no encontrada'})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        rows = 0
+        try:
+            if self.path == '/predict':
+                probabilities = self.batcher.submit(row_vector(self.model, json.loads(self._body()))).result()
+                rows = 1
+                self._send(200, {
+                    'probabilities': dict(zip(self.model.classes, probabilities.tolist())),
+                    PREDICTION_COLUMN: self.model.classes[int(probabilities.argmax())],
+                })
+            elif self.path == '/predict/batch':
+                content_type = self.headers.get('Content-Type', 'application/x-ndjson')
+                frame = parse_batch(self._body(), content_type)
+                missing = [feature for feature in self.model.features if feature not in frame.columns]
+                if missing:
+                    raise ValueError(f"Faltan columnas: {', '.join(missing)}")
+                # Rows with missing or non-finite values come back without probabilities or
+                # prediction (null), like in batch scoring; a single /predict row is rejected instead
+                scored = score_frame(self.model, frame)
+                rows = len(scored)
+                if 'csv' in content_type:
+                    self._send(200, scored.to_csv(index=False).encode('utf-8'), 'text/csv')
+                else:
+                    self._send(200, scored.to_json(orient='records', lines=True).encode('utf-8'), 'application/x-ndjson')
+            else:
+                self._send(404, {'error': 'Ruta no encontrada'})
+                return
+        except (ValueError, TypeError, KeyError) as e:
+            self.metrics.record_request(rows, time.perf_counter() - started, error=True)
+            self._send(400, {'error': str(e)})
+            return
+        self.metrics.record_request(rows, time.perf_counter() - started)
+
+# Threaded HTTP server with a listen backlog large enough for bursts of concurrent clients
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+# Function to build the HTTP server around a fitted model (loaded once, shared by all threads)
+def make_server(model, host='127.0.0.1', port=8000, max_batch_rows=MAX_BATCH_ROWS, max_wait=MAX_WAIT_SECONDS):
+    metrics = ServiceMetrics()
+    handler = type('BoundScoringHandler', (ScoringHandler,), {
+        'model': model,
+        'metrics': metrics,
+        'batcher': MicroBatcher(model, metrics, max_batch_rows, max_wait),
+    })
+    return ScoringServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP scoring service for the Hepatitis C classifier")
+    parser.add_argument("--data", default="HepatitisCdata.csv", help="Training CSV (the model is loaded from the registry when already fitted)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_SECONDS * 1000)
+    args = parser.parse_args()
+
+    data = load_hepatitis_data(args.data)
+    model = get_category_classifier(data, dataset_hash(data))
+    server = make_server(model, args.host, args.port, args.max_batch_rows, args.max_wait_ms / 1000)
+    print(f"Serving on http://{args.host}:{server.server_port} (accuracy {model.accuracy:.2f})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from analysis_core.dataset import BIOMARKERS, ID_COLUMN, dataset_hash
+from etl_core.perf import stage
+
+# Label used in the cube index for "all categories" / "both sexes"
+ALL = '(todos)'
+GROUP_COLUMNS = ['Category', 'Sex']
+DESCRIBE_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+# Number of cubes kept in memory (one per dataset version)
+CACHE_SIZE = 4
+_cache = OrderedDict()
+
+# Precomputed statistics of one dataset version. Every accessor is a lookup.
+class StatsCube:
+    def __init__(self, content_hash, stats, categorical, histograms, boxes, means, corr):
+        self.content_hash = content_hash  # hash of the dataset the cube was built from
+        self.stats = stats                # (column, Category, Sex) -> describe() stats
+        self.categorical = categorical    # column -> describe() of a categorical column
+        self.histograms = histograms      # column -> (edges, {(Category, Sex): counts})
+        self.boxes = boxes                # (column, group column) -> list of bxp stats
+        self._means = means               # complete_cases -> Series
+        self._corr = corr                 # complete_cases -> DataFrame
+
+    # Function to get the describe() statistics of a column, optionally for one group
+    def describe(self, column, category=ALL, sex=ALL):
+        if column in self.categorical:
+            return self.categorical[column]
+        key = (column, category, sex)
+        if key not in self.stats.index:
+            # Group without rows: count 0 and no statistics
+            return pd.Series([0] + [np.nan] * (len(DESCRIBE_STATS) - 1), index=DESCRIBE_STATS, name=column)
+        return self.stats.loc[key].rename(column)
+
+    # Function to get the mean of every numeric column
+    def means(self, complete_cases=False):
+        return self._means[complete_cases]
+
+    # Function to get the correlation matrix of the biomarkers
+    def correlation(self, complete_cases=False):
+        return self._corr[complete_cases]
+
+    # Function to get the histogram (shared bin edges, counts) of a column for one group
+    def histogram(self, column, category=ALL, sex=ALL):
+        edges, counts = self.histograms[column]
+        return counts[(category, sex)], edges
+
+    # Function to get the box-plot statistics of a column for each value of a group column
+    def box_stats(self, column, group_column):
+        return self.boxes[(column, group_column)]
+
+# Function to list the numeric columns summarized by the cube
+def numeric_columns(data):
+    return [col for col in data.select_dtypes(include=[np.number]).columns if col != ID_COLUMN]
+
+# Function to compute describe() statistics for every grouping of Category and Sex.
+# Every combination of the known categories gets a row, with count 0 if it has no data.
+def _grouped_describe(values, data):
+    tables = [values.describe().T.assign(Category=ALL, Sex=ALL)]
+    for keys in (['Category'], ['Sex'], ['Category', 'Sex']):
+        described = values.groupby([data[key] for key in keys], observed=False).describe()
+        described = described.stack(level=0, future_stack=True).reset_index(level=keys)
+        for key in GROUP_COLUMNS:
+            if key not in keys:
+                described[key] = ALL
+        tables.append(described)
+
+    stats = pd.concat(tables)
+    stats.index.name = 'column'
+    stats['Category'] = stats['Category'].astype(str)
+    stats['Sex'] = stats['Sex'].astype(str)
+    return stats.set_index(['Category', 'Sex'], append=True)[DESCRIBE_STATS].sort_index()
+
+# Function to bin every column once with shared edges and count each group
+def _grouped_histograms(values, data):
+    histograms = {}
+    groups = [((ALL, ALL), np.ones(len(data), dtype=bool))]
+    for category in data['Category'].cat.categories:
+        groups.append(((category, ALL), (data['Category'] == category).to_numpy()))
+    for sex in data['Sex'].cat.categories:
+        groups.append(((ALL, sex), (data['Sex'] == sex).to_numpy()))
+    for category in data['Category'].cat.categories:
+        for sex in data['Sex'].cat.categories:
+            mask = ((data['Category'] == category) & (data['Sex'] == sex)).to_numpy()
+            groups.append(((category, sex), mask))
+
+    for column in values.columns:
+        column_values = values[column].to_numpy()
+        valid = ~np.isnan(column_values)
+        if not valid.any():
+            continue
+        edges = np.histogram_bin_edges(column_values[valid], bins='auto')
+        histograms[column] = (edges, {key: np.histogram(column_values[valid & mask], bins=edges)[0]
+                                      for key, mask in groups})
+    return histograms
+
+# Function to compute matplotlib box-plot statistics (bxp format) per group value
+def _grouped_boxes(values, data):
+    from matplotlib.cbook import boxplot_stats
+
+    boxes = {}
+    for group_column in GROUP_COLUMNS:
+        codes = data[group_column]
+        for column in values.columns:
+            stats = []
+            for value in codes.cat.categories:
+                group = values[column][codes == value].dropna().to_numpy()
+                if len(group):
+                    stats.append(boxplot_stats(group, whis=1.5, labels=[value])[0])
+            boxes[(column, group_column)] = stats
+    return boxes
+
+# Function to build the statistics cube of a dataset (one full pass per statistic)
+def build_stats_cube(data):
+    columns = numeric_columns(data)
+    # Statistics are accumulated in float64 even though the biomarkers are stored as float32
+    values = data[columns].astype('float64')
+
+    categorical = {col: data[col].describe() for col in GROUP_COLUMNS}
+    biomarkers = [col for col in BIOMARKERS if col in values.columns]
+
+    # "Complete cases" are the rows used to train the classifier (no missing feature or label)
+    complete = values.notna().all(axis=1) & data['Category'].notna()
+    means = {False: values.mean(), True: values[complete].mean()}
+    corr = {False: values[biomarkers].corr(), True: values.loc[complete, biomarkers].corr()}
+
+    return StatsCube(dataset_hash(data), _grouped_describe(values, data), categorical, _grouped_histograms(values, data),
+                     _grouped_boxes(values, data), means, corr)
+
+# Function to get the cube of a dataset, built once per content hash
+def get_stats_cube(data):
+    digest = dataset_hash(data)
+    if digest is None:
+        return build_stats_cube(data)
+    if digest not in _cache:
+        with stage('stats_cube', rows=len(data)):
+            _cache[digest] = build_stats_cube(data)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    _cache.move_to_end(digest)
+    return _cache[digest]
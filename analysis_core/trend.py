@@ -0,0 +1,152 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from analysis_core.dataset import dataset_hash
+from etl_core.perf import stage
+
+# Confidence level of the trend band (percent), as seaborn's regplot default
+CONFIDENCE = 95
+
+# Points where the trend line and its band are evaluated (seaborn uses 100)
+GRID_POINTS = 100
+
+# Bootstrap settings: resamples (seaborn's default) and the number of resampled values
+# (resamples x rows) each worker task handles at once, which bounds its memory
+N_BOOT = 1000
+BOOT_BLOCK_VALUES = 4_000_000
+RANDOM_STATE = 42
+
+# Number of fits kept in memory
+CACHE_SIZE = 16
+_cache = OrderedDict()
+_boot_cache = OrderedDict()
+
+# Function to remember a value in an LRU cache
+def _remember(cache, key, value):
+    cache[key] = value
+    while len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+
+# Ordinary least-squares lines of every numeric column against one predictor, all fitted
+# at once from column sums (each column keeps its own rows without missing values). The
+# confidence band of the mean is the closed-form t interval, so no resampling is needed:
+#   yhat(x0) ± t(n-2) * s * sqrt(1/n + (x0 - mean_x)² / Sxx)
+class TrendFits:
+    def __init__(self, x, Y, columns, confidence=CONFIDENCE):
+        from scipy.stats import t
+
+        x = np.asarray(x, dtype=np.float64)
+        Y = np.asarray(Y, dtype=np.float64).reshape(len(x), -1)
+        self.columns = list(columns)
+        self.confidence = confidence
+
+        # Rows where both the predictor and the column are present
+        present = ~np.isnan(Y) & ~np.isnan(x)[:, None]
+        weights = present.astype(np.float64)
+        # The predictor is centered first, so its sums of squares don't cancel out
+        center = np.nanmean(x) if np.isfinite(x).any() else 0.0
+        xc = np.where(np.isnan(x), 0.0, x - center)
+        Y0 = np.where(present, Y, 0.0)
+
+        n = weights.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_xc = (xc @ weights) / n
+            mean_y = Y0.sum(axis=0) / n
+            self.mean_x = mean_xc + center
+            self.sxx = (xc * xc) @ weights - n * mean_xc ** 2
+            sxy = xc @ Y0 - n * mean_xc * mean_y
+            syy = np.einsum('ij,ij->j', Y0, Y0) - n * mean_y ** 2
+
+            self.slope = np.where(self.sxx > 0, sxy / self.sxx, 0.0)
+            self.intercept = mean_y - self.slope * self.mean_x
+            dof = n - 2
+            self.residual_std = np.sqrt(np.maximum(syy - self.slope * sxy, 0.0) / dof)
+            self.t_value = t.ppf(0.5 + confidence / 200, dof)
+        self.n = n.astype(np.int64)
+
+        # Range of the predictor over each column's rows, where its line is drawn
+        self.x_min = np.where(present, x[:, None], np.inf).min(axis=0, initial=np.inf)
+        self.x_max = np.where(present, x[:, None], -np.inf).max(axis=0, initial=-np.inf)
+
+    # Function to check whether a column has enough rows to draw its line and band
+    def has_fit(self, column):
+        i = self.columns.index(column) if column in self.columns else None
+        return i is not None and self.n[i] > 2 and self.sxx[i] > 0
+
+    # Function to get the evaluation grid of one column over the predictor's range
+    def grid(self, column, points=GRID_POINTS):
+        i = self.columns.index(column)
+        return np.linspace(self.x_min[i], self.x_max[i], points)
+
+    # Function to get the fitted line and its band for one column: (x, y, lower, upper)
+    def line(self, column, x=None):
+        i = self.columns.index(column)
+        x = self.grid(column) if x is None else np.asarray(x, dtype=np.float64)
+        y = self.intercept[i] + self.slope[i] * x
+        half = self.t_value[i] * self.residual_std[i] * np.sqrt(1 / self.n[i] + (x - self.mean_x[i]) ** 2 / self.sxx[i])
+        return x, y, y - half, y + half
+
+# Function to fit the bootstrap lines of one block of resamples; runs in a worker process.
+# Returns the lines evaluated on the grid, shape (resamples, grid points).
+def _bootstrap_block(x, y, grid, resamples, seed):
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(x), size=(resamples, len(x)))
+    xs, ys = x[index], y[index]
+    dx = xs - xs.mean(axis=1, keepdims=True)
+    sxx = (dx * dx).sum(axis=1)
+    slope = np.divide((dx * ys).sum(axis=1), sxx, out=np.zeros(resamples), where=sxx > 0)
+    intercept = ys.mean(axis=1) - slope * xs.mean(axis=1)
+    return intercept[:, None] + slope[:, None] * grid
+
+# Function to compute the percentile band of the bootstrap lines (what seaborn draws), with
+# the resamples split in blocks that run in parallel; returns (x, y, lower, upper)
+def bootstrap_band(x, y, n_boot=N_BOOT, confidence=CONFIDENCE, grid=None, random_state=RANDOM_STATE, n_jobs=-1):
+    from joblib import Parallel, delayed
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    grid = np.linspace(x.min(), x.max(), GRID_POINTS) if grid is None else grid
+    per_block = max(1, min(n_boot, BOOT_BLOCK_VALUES // len(x)))
+    blocks = [min(per_block, n_boot - start) for start in range(0, n_boot, per_block)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(blocks))
+    lines = Parallel(n_jobs=n_jobs)(delayed(_bootstrap_block)(x, y, grid, resamples, seed)
+                                    for resamples, seed in zip(blocks, seeds))
+    lines = np.vstack(lines)
+
+    slope, intercept = np.polyfit(x, y, 1)
+    lower, upper = np.percentile(lines, [50 - confidence / 2, 50 + confidence / 2], axis=0)
+    return grid, intercept + slope * grid, lower, upper
+
+# Function to get the trend fits of every numeric column against predictor, computed once
+# per (dataset hash, predictor)
+def get_trend_fits(data, predictor='Age'):
+    digest = dataset_hash(data)
+    key = (digest, predictor)
+    if digest is not None and key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    columns = [col for col in data.select_dtypes('number').columns if col != predictor]
+    with stage('trend_fit', rows=len(data)):
+        fits = TrendFits(data[predictor].to_numpy(dtype=np.float64),
+                         data[columns].to_numpy(dtype=np.float64), columns)
+    if digest is not None:
+        _remember(_cache, key, fits)
+    return fits
+
+# Function to get the bootstrap band of target against predictor, computed once per
+# (dataset hash, predictor, target, resamples)
+def get_bootstrap_band(data, predictor, target, n_boot=N_BOOT):
+    digest = dataset_hash(data)
+    key = (digest, predictor, target, n_boot)
+    if digest is not None and key in _boot_cache:
+        _boot_cache.move_to_end(key)
+        return _boot_cache[key]
+
+    valid_data = data[[predictor, target]].dropna()
+    with stage('trend_bootstrap', rows=len(valid_data) * n_boot):
+        band = bootstrap_band(valid_data[predictor].to_numpy(), valid_data[target].to_numpy(), n_boot)
+    if digest is not None:
+        _remember(_boot_cache, key, band)
+    return band
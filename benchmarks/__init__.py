@@ -0,0 +1 @@
+# Scripts de benchmark; ejecutar desde la raíz del repositorio con `python -m benchmarks.<script>`
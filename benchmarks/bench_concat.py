@@ -0,0 +1,62 @@
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import make_item_o_folder
+from etl_core import combine_frames, iter_frames, list_excel_files
+
+# Acumulación anterior: copia todo el dataset en cada archivo (cuadrática)
+def accumulate_quadratic(frames):
+    dataset = pd.DataFrame()
+    for df in frames:
+        dataset = pd.concat([dataset, df], ignore_index=True)
+    return dataset
+
+# Función para medir tiempo y pico de memoria de una función
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de acumulación de DataFrames en el ETL")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        make_item_o_folder(folder, args.files, args.rows, args.cols)
+        files = list_excel_files(folder)
+        columns_range = (0, args.cols - 1)
+
+        # Se leen los archivos una sola vez para aislar el coste de acumulación
+        frames = list(iter_frames(folder, files, columns_range, 1, args.workers))
+
+        print("Acumulación (sin lectura de xlsx)")
+        print(f"{'archivos':>9} {'cuadrática s':>13} {'streaming s':>12} {'µs/archivo':>11} {'pico MB cuadr.':>15} {'pico MB stream':>15}")
+        sizes = [n for n in (args.files // 8, args.files // 4, args.files // 2, args.files) if n > 0]
+        for n in sizes:
+            _, quadratic_s, quadratic_peak = measure(accumulate_quadratic, frames[:n])
+            _, streaming_s, streaming_peak = measure(combine_frames, iter(frames[:n]))
+            print(f"{n:>9} {quadratic_s:>13.3f} {streaming_s:>12.3f} {streaming_s / n * 1e6:>11.1f} "
+                  f"{quadratic_peak / 2**20:>15.1f} {streaming_peak / 2**20:>15.1f}")
+
+        print("\nProceso completo con streaming (lectura + acumulación)")
+        print(f"{'archivos':>9} {'segundos':>9} {'ms/archivo':>11}")
+        for n in sizes:
+            start = time.perf_counter()
+            dataset = combine_frames(iter_frames(folder, files[:n], columns_range, 1, args.workers))
+            elapsed = time.perf_counter() - start
+            print(f"{n:>9} {elapsed:>9.2f} {elapsed / n * 1e3:>11.2f}   ({len(dataset)} filas)")
+
+if __name__ == "__main__":
+    main()
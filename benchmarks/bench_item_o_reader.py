@@ -0,0 +1,73 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
+
+from benchmarks.synthetic import write_excel_style_workbook, write_header_workbook, write_item_o_workbook
+from etl_core import read_item_o
+from etl_core.reader import _iter_row_chunks, read_sheet_columns
+
+# Función para medir el mejor tiempo de varias repeticiones
+def best_of(repeats, func, *args, **kwargs):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+# Función para comprobar el lector en streaming antes de medirlo: un libro con atributos con
+# prefijo en las filas (como los guarda Excel) debe leerse igual que con pandas, y cortar el
+# XML de la hoja en cualquier posición no debe cambiar las filas encontradas. Con encabezado,
+# los nombres repetidos o vacíos deben quedar como en pd.read_excel.
+def check_stream_reader(folder, rows=49, cols=3, block_size=64):
+    path = os.path.join(folder, "ITEM_O.2024.01.01.excel.xlsx")
+    write_excel_style_workbook(path, rows=rows, cols=cols)
+    expected = read_item_o(path, (0, cols - 1), 1, engine="pandas")
+    result = read_item_o(path, (0, cols - 1), 1, engine="stream")
+    assert result.equals(expected), (result, expected)
+
+    with zipfile.ZipFile(path) as workbook:
+        xml = workbook.read('xl/worksheets/sheet1.xml')
+    reference = list(_iter_row_chunks(io.BytesIO(xml), b''))
+    assert len(reference) == rows, len(reference)
+    for cut in range(len(xml)):
+        chunks = list(_iter_row_chunks(io.BytesIO(xml[cut:]), xml[:cut], block_size))
+        assert chunks == reference, (cut, len(chunks))
+
+    for header in (['x', 'x', None, 'y'], ['x', 'x.1', 'x', 'x', 'y']):
+        path = os.path.join(folder, "encabezado.xlsx")
+        write_header_workbook(path, header)
+        expected = pd.read_excel(path, sheet_name="ITEM_O")
+        result = read_sheet_columns(path, range(len(header)), sheet_name="ITEM_O", header=True)
+        assert result.equals(expected), (list(result.columns), list(expected.columns))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del lector de la hoja ITEM_O en hojas anchas")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--widths", type=int, nargs="+", default=[20, 60, 120])
+    parser.add_argument("--read-cols", type=int, default=10)
+    parser.add_argument("--start-row", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'columnas hoja':>13} {'pandas s':>9} {'stream s':>9} {'aceleración':>12}")
+    with tempfile.TemporaryDirectory() as folder:
+        check_stream_reader(folder)
+        for width in args.widths:
+            path = os.path.join(folder, f"ITEM_O.2024.01.01.w{width}.xlsx")
+            write_item_o_workbook(path, rows=args.rows, cols=width)
+            columns_range = (0, min(args.read_cols, width) - 1)
+
+            expected, pandas_s = best_of(args.repeats, read_item_o, path, columns_range, args.start_row, engine="pandas")
+            result, stream_s = best_of(args.repeats, read_item_o, path, columns_range, args.start_row, engine="stream")
+            assert result.shape == expected.shape, (result.shape, expected.shape)
+
+            print(f"{width:>13} {pandas_s:>9.3f} {stream_s:>9.3f} {pandas_s / stream_s:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from analysis_core.dataset import BIOMARKERS
+
+# Función para enviar una petición POST y devolver el cuerpo de la respuesta
+def post(url, body, content_type='application/json'):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+    with urllib.request.urlopen(request) as response:
+        return response.read()
+
+# Función para generar pacientes sintéticos con las columnas del clasificador
+def synthetic_patients(n, seed=0):
+    rng = np.random.default_rng(seed)
+    patients = pd.DataFrame(rng.lognormal(3, 0.6, size=(n, len(BIOMARKERS))).round(1), columns=BIOMARKERS)
+    patients.insert(0, 'Age', rng.integers(19, 78, size=n))
+    return patients
+
+# Función para lanzar peticiones de una fila desde varios hilos y medir sus latencias
+def run_single_row_load(url, rows, threads, requests_per_thread):
+    latencies = [[] for _ in range(threads)]
+
+    def worker(index):
+        for i in range(requests_per_thread):
+            body = json.dumps(rows[(index * requests_per_thread + i) % len(rows)]).encode('utf-8')
+            start = time.perf_counter()
+            post(url + '/predict', body)
+            latencies[index].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return np.concatenate([np.array(l) for l in latencies]) * 1000, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de puntuación (analysis_core.service)")
+    parser.add_argument("--url", default=None, help="URL de un servicio en marcha; si se omite se arranca uno local")
+    parser.add_argument("--data", default="HepatitisCdata.csv")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones por hilo")
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        from analysis_core.dataset import dataset_hash, load_hepatitis_data
+        from analysis_core.models import get_category_classifier
+        from analysis_core.service import make_server
+        data = load_hepatitis_data(args.data)
+        server = make_server(get_category_classifier(data, dataset_hash(data)), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+    patients = synthetic_patients(max(args.batch_rows, 1000))
+    rows = patients.head(1000).to_dict(orient='records')
+
+    print(f"{'hilos':>6} {'peticiones':>10} {'pet/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for threads in args.threads:
+        latencies, elapsed = run_single_row_load(url, rows, threads, args.requests)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{threads:>6} {len(latencies):>10} {len(latencies) / elapsed:>9.0f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+
+    # Lote NDJSON y CSV en una sola petición
+    batch = patients.head(args.batch_rows)
+    for name, body, content_type in [
+        ("NDJSON", batch.to_json(orient='records', lines=True).encode('utf-8'), 'application/x-ndjson'),
+        ("CSV", batch.to_csv(index=False).encode('utf-8'), 'text/csv'),
+    ]:
+        start = time.perf_counter()
+        post(url + '/predict/batch', body, content_type)
+        elapsed = time.perf_counter() - start
+        print(f"Lote {name}: {len(batch)} filas en {elapsed:.3f} s ({len(batch) / elapsed:.0f} filas/s)")
+
+    with urllib.request.urlopen(url + '/metrics') as response:
+        print(json.dumps(json.loads(response.read()), indent=2))
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
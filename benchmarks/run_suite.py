@@ -0,0 +1,185 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_item_o_folder, write_hepatitis_csv
+from etl_core.perf import max_rss
+
+# Escalas por defecto (filas); 1M y 10M se piden con --scales
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+
+# Filas por libro ITEM_O en las etapas del ETL
+ROWS_PER_FILE = 2_000
+
+# Función para medir una etapa: mejor tiempo de varias repeticiones sin tracemalloc
+# y, aparte, una ejecución con tracemalloc para el pico de memoria
+def measure(func, repeats=1, memory=True):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, best, peak
+
+# Función para las etapas del ETL: lectura de los libros, consolidación y almacén
+def etl_stages(rows, folder, args):
+    from etl_core import combine_frames, iter_frames, list_excel_files
+    from etl_core.store import DEFAULT_BACKEND, load_dataset, save_dataset, store_path
+
+    rows_per_file = min(rows, ROWS_PER_FILE)
+    n_files = math.ceil(rows / rows_per_file)
+    make_item_o_folder(folder, n_files, rows=rows_per_file, cols=args.cols)
+    files = list_excel_files(folder)
+    columns_range = (0, args.cols - 1)
+    path = os.path.join(folder, os.path.basename(store_path(DEFAULT_BACKEND)))
+
+    stages = [
+        ('etl.read_combine', lambda: combine_frames(iter_frames(folder, files, columns_range, 1, workers=args.workers))),
+    ]
+    dataset = None
+    for name, func in stages:
+        dataset, seconds, peak = measure(func, args.repeats, not args.skip_memory)
+        yield name, seconds, peak, {'files': n_files, 'workers': args.workers}
+    for name, func in [
+        ('etl.store_save', lambda: save_dataset(dataset, DEFAULT_BACKEND, path)),
+        ('etl.store_load', lambda: load_dataset(path)),
+    ]:
+        _, seconds, peak = measure(func, args.repeats, not args.skip_memory)
+        yield name, seconds, peak, {'backend': DEFAULT_BACKEND}
+
+# Función para las etapas del análisis de biomarcadores (ProyectoFinal.py sin Streamlit)
+def analysis_stages(rows, folder, args):
+    from analysis_core import dataset as dataset_module
+    from analysis_core.density import HistogramDensity
+    from analysis_core.models import DEFAULT_PARAMS, TrainedModel, train_category_classifier
+    from analysis_core.regression import PolynomialSweep
+    from analysis_core.scoring import score_file
+    from analysis_core.stats_cube import build_stats_cube
+    from analysis_core.trend import TrendFits
+
+    csv_path = os.path.join(folder, "hepatitis.csv")
+    write_hepatitis_csv(csv_path, rows)
+
+    # Carga en frío: se vacía la caché de datasets antes de cada lectura
+    def load():
+        dataset_module._cache.clear()
+        return dataset_module.load_hepatitis_data(csv_path)
+    data, seconds, peak = measure(load, args.repeats, not args.skip_memory)
+    yield 'analysis.load_csv', seconds, peak, {}
+
+    _, seconds, peak = measure(lambda: build_stats_cube(data), args.repeats, not args.skip_memory)
+    yield 'analysis.stats_cube', seconds, peak, {}
+
+    for predictor, target in [('Age', 'ALB'), ('ALT', 'AST')]:
+        valid = data[[predictor, target]].dropna()
+        x, y = valid[predictor].to_numpy(), valid[target].to_numpy()
+        _, seconds, peak = measure(lambda: PolynomialSweep(x, y, args.max_degree), args.repeats, not args.skip_memory)
+        yield f'analysis.polynomial_sweep.{predictor}_{target}', seconds, peak, {'max_degree': args.max_degree}
+
+    # Rectas de tendencia de todos los biomarcadores contra la edad, con su banda de confianza
+    columns = [col for col in data.select_dtypes('number').columns if col != 'Age']
+    age, values = data['Age'].to_numpy(dtype=np.float64), data[columns].to_numpy(dtype=np.float64)
+    _, seconds, peak = measure(lambda: TrendFits(age, values, columns), args.repeats, not args.skip_memory)
+    yield 'analysis.trend_fits', seconds, peak, {'columns': len(columns)}
+
+    # Histograma y curva KDE de un biomarcador
+    values = data['ALB'].to_numpy(dtype=np.float64, na_value=np.nan)
+    _, seconds, peak = measure(lambda: HistogramDensity(values), args.repeats, not args.skip_memory)
+    yield 'analysis.histogram_density', seconds, peak, {}
+
+    (pipeline, metadata), seconds, peak = measure(lambda: train_category_classifier(data, DEFAULT_PARAMS), args.repeats, not args.skip_memory)
+    yield 'analysis.train_classifier', seconds, peak, {'accuracy': metadata['accuracy']}
+
+    model = TrainedModel(pipeline, metadata)
+    output = os.path.join(folder, "scored.csv")
+    _, seconds, peak = measure(lambda: score_file(model, csv_path, output), args.repeats, not args.skip_memory)
+    yield 'analysis.batch_scoring', seconds, peak, {}
+
+# Función para los metadatos de la ejecución (versiones, máquina, commit)
+def run_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+# Función para comparar dos ejecuciones por (etapa, filas)
+def compare_results(previous, current):
+    before = {(r['stage'], r['rows']): r for r in previous['results']}
+    lines = [f"{'etapa':<40} {'filas':>9} {'antes s':>9} {'ahora s':>9} {'ratio':>7} {'pico ratio':>10}"]
+    for r in current['results']:
+        old = before.get((r['stage'], r['rows']))
+        if old is None:
+            continue
+        ratio = r['seconds'] / old['seconds'] if old['seconds'] else float('nan')
+        peak_ratio = (r['peak_bytes'] / old['peak_bytes']
+                      if r.get('peak_bytes') and old.get('peak_bytes') else float('nan'))
+        lines.append(f"{r['stage']:<40} {r['rows']:>9} {old['seconds']:>9.3f} {r['seconds']:>9.3f} {ratio:>6.2f}x {peak_ratio:>9.2f}x")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las etapas del ETL y del análisis de biomarcadores")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Filas por escala (1000 a 10000000)")
+    parser.add_argument("--suites", nargs="+", choices=["etl", "analysis"], default=["etl", "analysis"])
+    parser.add_argument("--etl-max-rows", type=int, default=1_000_000, help="Escala máxima de las etapas del ETL (leer libros xlsx es lento)")
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-degree", type=int, default=150)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--skip-memory", action="store_true", help="No medir el pico de memoria (evita la ejecución extra)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="JSON de una ejecución anterior para comparar")
+    args = parser.parse_args()
+
+    report = {'meta': run_metadata(), 'args': vars(args), 'results': []}
+    for rows in args.scales:
+        for suite in args.suites:
+            if suite == "etl" and rows > args.etl_max_rows:
+                print(f"{'etl':<40} {rows:>9} omitida (--etl-max-rows {args.etl_max_rows})")
+                continue
+            stages = etl_stages if suite == "etl" else analysis_stages
+            with tempfile.TemporaryDirectory() as folder:
+                for stage, seconds, peak, extra in stages(rows, folder, args):
+                    result = {'stage': stage, 'rows': rows, 'seconds': seconds, 'rows_per_s': rows / seconds if seconds else None,
+                              'peak_bytes': peak, **extra}
+                    report['results'].append(result)
+                    peak_text = f"{peak / 2**20:9.1f} MiB" if peak is not None else ""
+                    print(f"{stage:<40} {rows:>9} {seconds:>9.3f} s {peak_text}", flush=True)
+
+    peak_rss = max_rss()
+    report['meta']['max_rss_mib'] = peak_rss / 2**20 if peak_rss is not None else None
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare_results(json.load(f), report))
+
+if __name__ == "__main__":
+    main()
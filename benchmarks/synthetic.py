@@ -0,0 +1,95 @@
+import os
+import re
+import shutil
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+# Función para crear un libro con la hoja "ITEM_O" con datos aleatorios
+def write_item_o_workbook(path, rows=200, cols=10, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(100, 15, size=(rows, cols)).round(2))
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="ITEM_O", index=False, header=False)
+
+# Función para crear un libro ITEM_O como lo guarda Excel: la raíz de la hoja declara el
+# prefijo x14ac y cada fila lleva el atributo x14ac:dyDescent
+def write_excel_style_workbook(path, rows=200, cols=10, seed=0):
+    write_item_o_workbook(path, rows, cols, seed)
+    with zipfile.ZipFile(path) as source:
+        parts = {name: source.read(name) for name in source.namelist()}
+    sheet = next(name for name in parts if name.startswith('xl/worksheets/sheet'))
+    xml = parts[sheet]
+    root_end = xml.index(b'>', xml.index(b'<worksheet'))
+    xml = (xml[:root_end]
+           + b' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+           + b' xmlns:x14ac="http://schemas.microsoft.com/office/spreadsheetml/2009/9/ac" mc:Ignorable="x14ac"'
+           + xml[root_end:])
+    parts[sheet] = re.sub(rb'<row( r="\d+")', rb'<row\1 x14ac:dyDescent="0.25"', xml)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for name, data in parts.items():
+            target.writestr(name, data)
+
+# Función para crear un libro ITEM_O con una fila de encabezado dada (puede tener nombres
+# repetidos o celdas vacías) y filas numeradas debajo
+def write_header_workbook(path, header, rows=5):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "ITEM_O"
+    sheet.append(header)
+    for row in range(rows):
+        sheet.append([row * len(header) + col for col in range(len(header))])
+    workbook.save(path)
+
+# Función para crear una carpeta con n_files libros ITEM_O con fecha en el nombre.
+# Se genera un solo libro y se copia, así crear miles de archivos tarda segundos.
+def make_item_o_folder(folder, n_files, rows=200, cols=10, seed=0):
+    os.makedirs(folder, exist_ok=True)
+    template = os.path.join(folder, "_plantilla.xlsx")
+    write_item_o_workbook(template, rows, cols, seed)
+
+    dates = pd.date_range("2020-01-01", periods=n_files, freq="D")
+    for date in dates:
+        name = f"ITEM_O.{date:%Y.%m.%d}.xlsx"
+        shutil.copyfile(template, os.path.join(folder, name))
+
+    # La plantilla no debe quedar en la carpeta, list_excel_files la leería
+    os.remove(template)
+    return folder
+
+# Media y desviación (escala log) de cada biomarcador, parecidas a HepatitisCdata.csv
+HEPATITIS_BIOMARKERS = {
+    'ALB': (3.7, 0.15), 'ALP': (4.2, 0.3), 'ALT': (3.2, 0.6), 'AST': (3.4, 0.5), 'BIL': (2.2, 0.6),
+    'CHE': (2.1, 0.25), 'CHOL': (1.7, 0.2), 'CREA': (4.4, 0.3), 'GGT': (3.4, 0.8), 'PROT': (4.3, 0.07),
+}
+HEPATITIS_CATEGORIES = ['0=Blood Donor', '0s=suspect Blood Donor', '1=Hepatitis', '2=Fibrosis', '3=Cirrhosis']
+HEPATITIS_WEIGHTS = [0.86, 0.01, 0.04, 0.04, 0.05]
+
+# Función para generar un bloque de filas con el formato de HepatitisCdata.csv
+def hepatitis_frame(rows, seed=0, start_id=1, missing_rate=0.005):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        '': np.arange(start_id, start_id + rows),
+        'Category': rng.choice(HEPATITIS_CATEGORIES, size=rows, p=HEPATITIS_WEIGHTS),
+        'Age': rng.integers(19, 78, size=rows),
+        'Sex': rng.choice(['m', 'f'], size=rows, p=[0.6, 0.4]),
+    })
+    for biomarker, (mean, sigma) in HEPATITIS_BIOMARKERS.items():
+        values = np.exp(rng.normal(mean, sigma, size=rows)).round(1)
+        values[rng.random(rows) < missing_rate] = np.nan
+        frame[biomarker] = values
+    return frame
+
+# Función para escribir un CSV con el formato de HepatitisCdata.csv por bloques,
+# así se pueden generar millones de filas sin tenerlas todas en memoria
+def write_hepatitis_csv(path, rows, seed=0, chunk_rows=1_000_000):
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        chunk = hepatitis_frame(n, seed + written, start_id=written + 1)
+        chunk.to_csv(path, mode='a' if written else 'w', header=written == 0, index=False)
+        written += n
+    return path
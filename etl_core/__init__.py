@@ -0,0 +1,15 @@
+# Núcleo del proceso ETL compartido por ETL.py, ETL2.py, ETL_Streamlit.py y la línea de comandos
+from etl_core.histogram import GroupedHistogram
+from etl_core.incremental import process_files_incremental
+from etl_core.ingest import (
+    combine_frames,
+    extract_date_from_filename,
+    iter_frames,
+    list_excel_files,
+    load_files,
+    read_item_o,
+)
+from etl_core.output import write_frames_to_excel
+from etl_core.outofcore import consolidate_to_store, iter_store_chunks, stream_statistics
+from etl_core.pipeline import consolidate_folder, run_etl, save_outputs
+from etl_core.schema import DATE_COLUMN, apply_schema, combine_typed_frames, infer_schema
@@ -0,0 +1,125 @@
+import io
+
+from etl_core.histogram import GroupedHistogram, date_years
+from etl_core.lod import MAX_POINTS, column_summary, label_figure, summary_caption
+from etl_core.perf import stage
+from etl_core.schema import DATE_COLUMN
+
+# Los gráficos se construyen con matplotlib.figure.Figure, sin pyplot: no dependen de un
+# backend de ventanas ni del estado global de pyplot, así sirven igual en Tk, Streamlit,
+# la línea de comandos o un proceso de trabajo. matplotlib se importa solo al graficar.
+
+# Columnas de fecha añadidas por el ETL (ANIO, MES y DIA en datasets anteriores a FECHA)
+DATE_COLUMNS = [DATE_COLUMN, 'ANIO', 'MES', 'DIA']
+
+# Barras del histograma por año
+YEAR_HISTOGRAM_BINS = 20
+
+# Función para obtener las columnas numéricas a graficar (incluye int8/float32 del esquema)
+def chart_columns(dataset, exclude=()):
+    import numpy as np
+    numeric_cols = dataset.select_dtypes(include=[np.number]).columns
+    return [col for col in numeric_cols if col not in exclude]
+
+# Función para resumir una columna del dataset para su histograma y boxplot: conteos y
+# cuartiles (etl_core.lod.column_summary), no todas las filas
+def histogram_boxplot_summary(dataset, col, max_fliers=MAX_POINTS):
+    with stage('resumen_columna', rows=len(dataset)):
+        return column_summary(dataset[col].to_numpy(dtype='float64', na_value=float('nan')), col,
+                              max_fliers=max_fliers)
+
+# Función para crear la figura con el histograma y el boxplot de una columna
+def histogram_boxplot_figure(dataset, col, max_fliers=MAX_POINTS):
+    return stats_histogram_boxplot_figure(col, histogram_boxplot_summary(dataset, col, max_fliers))
+
+# Función para crear la figura a partir del resumen de una columna (column_summary o
+# etl_core.outofcore.stream_statistics): histograma ya contado y boxplot con bxp
+def stats_histogram_boxplot_figure(col, col_stats):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 10))
+    ax = fig.subplots(2, 1)  # Dos gráficos por columna
+
+    if col_stats['edges'] is not None:
+        ax[0].stairs(col_stats['counts'], col_stats['edges'], fill=True)
+        ax[1].bxp([col_stats['box']])
+        label_figure(fig, summary_caption(col_stats))
+    ax[0].grid(True)
+    ax[0].set_title(f'Histograma de {col}')
+    ax[0].set_xlabel(col)
+    ax[0].set_ylabel('Frecuencia')
+    ax[1].grid(True)
+    ax[1].set_title(f'Boxplot de {col}')
+
+    # Se deja lugar al pie para el modo de representación
+    fig.tight_layout(rect=(0, 0.02, 1, 1))
+    return fig
+
+# Función para crear el gráfico de torta con los promedios de las columnas
+def averages_pie_figure(dataset, numeric_cols):
+    return means_pie_figure(dataset[numeric_cols].mean())
+
+# Función para crear el gráfico de torta a partir de las medias ya calculadas
+def means_pie_figure(averages):
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(averages, labels=averages.index, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')  # Asegurar que el gráfico sea un círculo
+    ax.set_title('Promedio de Columnas Numéricas (excluyendo fechas)')
+    return fig
+
+# Función para calcular el histograma por año de la primera columna numérica: bordes
+# comunes y un solo bincount sobre (año, barra) para todos los años. Devuelve un
+# GroupedHistogram (solo datos; se puede cachear y exportar).
+def year_histogram(df, bins=YEAR_HISTOGRAM_BINS):
+    import numpy as np
+
+    # Identify the numeric columns
+    numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    if not numeric_columns:
+        raise ValueError("No numeric columns found in the dataframe")
+
+    # Use the first numeric column for the graph, grouped by the year of the file date
+    value_column = numeric_columns[0]
+    if DATE_COLUMN in df.columns:
+        years = date_years(df[DATE_COLUMN])
+    else:
+        years = df['ANIO' if 'ANIO' in df.columns else 'AÑO']
+    with stage('histograma_por_anio', rows=len(df)):
+        return GroupedHistogram.compute(value_column, df[value_column], years, bins)
+
+# Función para crear el reporte de ETL.py: resumen descriptivo e histograma de la
+# primera columna numérica por año (el ya calculado, si se da). Devuelve (resumen, PNG en un BytesIO).
+def year_histogram_report(df, histogram=None):
+    # Create a summary report
+    summary = df.describe(include='all')
+    histogram = histogram or year_histogram(df)
+
+    # Only the precomputed bars are drawn
+    fig = year_histogram_figure(histogram)
+    img_stream = io.BytesIO()
+    with stage('savefig'):
+        fig.savefig(img_stream, format='png')
+    img_stream.seek(0)
+    return summary, img_stream
+
+# Función para dibujar un histograma por año ya calculado (GroupedHistogram), con el
+# estilo oscuro del reporte
+def year_histogram_figure(histogram):
+    from matplotlib import style
+    from matplotlib.figure import Figure
+
+    with style.context('dark_background'):
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
+        for year, counts in histogram.counts_by_group().items():
+            ax.stairs(counts, histogram.edges, fill=True, alpha=0.5, label=str(year), color='green')
+
+        ax.set_title(f"Histograma de {histogram.label} por Año", color='white')
+        ax.set_xlabel(histogram.label, color='white')
+        ax.set_ylabel("Frecuencia", color='white')
+        ax.legend(title="Año")
+        ax.grid(True, color='white')
+    return fig
@@ -0,0 +1,201 @@
+import argparse
+import os
+import sys
+import time
+
+from etl_core.outofcore import CHUNK_ROWS
+from etl_core.perf import PerfRecorder, format_mib, stage, summary_table
+from etl_core.reader import parse_column_letters
+from etl_core.store import BACKENDS, DEFAULT_BACKEND
+
+# Función para interpretar el rango de columnas: letras ("A:J") o números 1-indexados ("1:10")
+def parse_columns_range(spec):
+    start, _, end = spec.partition(':')
+    end = end or start
+    if start.isdigit() and end.isdigit():
+        columns_range = (int(start) - 1, int(end) - 1)
+    else:
+        columns = parse_column_letters(f"{start}:{end}")
+        columns_range = (columns[0], columns[-1])
+    if columns_range[0] < 0 or columns_range[1] < columns_range[0]:
+        raise argparse.ArgumentTypeError(f"Rango de columnas no válido: {spec}")
+    return columns_range
+
+# Función para el subcomando "run": consolidar la carpeta y guardar el dataset
+def command_run(args):
+    from etl_core.pipeline import run_etl
+
+    def report_error(file, error):
+        print(f"Error al procesar el archivo {file}: {error}", file=sys.stderr)
+
+    def report_mismatch(file, message):
+        print(f"Esquema distinto en {file}: {message}", file=sys.stderr)
+
+    if args.out_of_core:
+        return command_run_out_of_core(args, report_error, report_mismatch)
+
+    start = time.perf_counter()
+    dataset, summary, paths = run_etl(args.folder, args.cols, args.start_row, args.workers, args.incremental,
+                                      args.backend, args.xlsx, on_error=report_error, on_mismatch=report_mismatch)
+    elapsed = time.perf_counter() - start
+
+    if summary is not None:
+        print(f"Nuevos: {len(summary['added'])}, modificados: {len(summary['changed'])}, "
+              f"eliminados: {len(summary['removed'])}, sin cambios: {len(summary['unchanged'])}")
+    if dataset.empty:
+        print("No se obtuvieron datos de los archivos.", file=sys.stderr)
+        return 1
+    print(f"{len(dataset)} filas, {len(dataset.columns)} columnas en {elapsed:.2f} s")
+    for path in paths:
+        print(f"Guardado en '{path}'")
+    return 0
+
+# Función para "run --out-of-core": escribir el dataset archivo a archivo sin juntarlo en memoria
+def command_run_out_of_core(args, report_error, report_mismatch):
+    from etl_core.outofcore import consolidate_to_store
+
+    if args.incremental or args.xlsx:
+        print("El modo por bloques no admite --incremental ni --xlsx.", file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    _, rows, path = consolidate_to_store(args.folder, args.cols, args.start_row, args.workers, args.backend,
+                                         on_error=report_error, on_mismatch=report_mismatch)
+    elapsed = time.perf_counter() - start
+    if not rows:
+        print("No se obtuvieron datos de los archivos.", file=sys.stderr)
+        return 1
+    print(f"{rows} filas en {elapsed:.2f} s")
+    print(f"Guardado en '{path}'")
+    return 0
+
+# Función para el subcomando "report": resumen y gráficos del dataset consolidado
+def command_report(args):
+    from etl_core.charts import DATE_COLUMNS, averages_pie_figure, chart_columns, histogram_boxplot_figure, year_histogram
+    from etl_core.schema import DATE_COLUMN
+    from etl_core.store import latest_store_path, load_dataset, numeric_columns, store_columns
+
+    if args.out_of_core:
+        return command_report_out_of_core(args)
+
+    path = args.store or latest_store_path()
+    dataset = load_dataset(path, columns=numeric_columns(path))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    summary_path = os.path.join(args.output_dir, "resumen.csv")
+    dataset.describe().to_csv(summary_path)
+    print(f"Resumen guardado en '{summary_path}'")
+
+    for col in chart_columns(dataset):
+        chart_path = os.path.join(args.output_dir, f"histograma_boxplot_{col}.png")
+        with stage('savefig'):
+            histogram_boxplot_figure(dataset, col).savefig(chart_path)
+        print(f"Gráfico guardado en '{chart_path}'")
+
+    value_cols = chart_columns(dataset, exclude=DATE_COLUMNS)
+    if value_cols:
+        chart_path = os.path.join(args.output_dir, "promedios.png")
+        with stage('savefig'):
+            averages_pie_figure(dataset, value_cols).savefig(chart_path)
+        print(f"Gráfico guardado en '{chart_path}'")
+
+    # Histograma por año de la primera columna numérica
+    if value_cols and DATE_COLUMN in store_columns(path):
+        dates = load_dataset(path, columns=[DATE_COLUMN])
+        save_year_histogram(year_histogram(dataset[value_cols].join(dates)), args.output_dir)
+    return 0
+
+# Función para "report --out-of-core": el mismo reporte calculado por bloques
+def command_report_out_of_core(args):
+    from etl_core.charts import DATE_COLUMNS, means_pie_figure, stats_histogram_boxplot_figure
+    from etl_core.outofcore import column_means, stream_statistics, summary_frame
+    from etl_core.store import numeric_columns
+
+    path = args.store or None
+    report = stream_statistics(path, numeric_columns(path, exclude=DATE_COLUMNS), chunk_rows=args.chunk_rows)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    summary_path = os.path.join(args.output_dir, "resumen.csv")
+    summary_frame(report).to_csv(summary_path)
+    print(f"Resumen guardado en '{summary_path}' ({report['rows']} filas)")
+
+    saved = []
+    for col, col_stats in report['columns'].items():
+        chart_path = os.path.join(args.output_dir, f"histograma_boxplot_{col}.png")
+        with stage('savefig'):
+            stats_histogram_boxplot_figure(col, col_stats).savefig(chart_path)
+        saved.append(chart_path)
+
+    averages = column_means(report).dropna()
+    if not averages.empty:
+        chart_path = os.path.join(args.output_dir, "promedios.png")
+        with stage('savefig'):
+            means_pie_figure(averages).savefig(chart_path)
+        saved.append(chart_path)
+
+    for chart_path in saved:
+        print(f"Gráfico guardado en '{chart_path}'")
+
+    by_year = next((col_stats['years'] for col_stats in report['columns'].values() if col_stats['years'] is not None), None)
+    if by_year is not None:
+        save_year_histogram(by_year, args.output_dir)
+    return 0
+
+# Función para guardar el histograma por año: el gráfico y los conteos en CSV
+def save_year_histogram(histogram, output_dir):
+    from etl_core.charts import year_histogram_figure
+
+    chart_path = os.path.join(output_dir, "histograma_por_anio.png")
+    with stage('savefig'):
+        year_histogram_figure(histogram).savefig(chart_path)
+    print(f"Gráfico guardado en '{chart_path}'")
+
+    counts_path = os.path.join(output_dir, "histograma_por_anio.csv")
+    histogram.to_frame(group_name='anio').to_csv(counts_path, index=False)
+    print(f"Conteos guardados en '{counts_path}'")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m etl_core", description="Proceso ETL de los libros ITEM_O sin interfaz gráfica")
+    parser.add_argument("--profile", action="store_true", help="Perfilar la ejecución con cProfile (se guarda en .perf/)")
+    parser.add_argument("--timings", action="store_true", help="Mostrar el tiempo y la memoria de cada etapa")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Consolidar los archivos de una carpeta")
+    run.add_argument("--folder", required=True, help="Carpeta con los archivos Excel")
+    run.add_argument("--cols", required=True, type=parse_columns_range, help="Rango de columnas: letras (A:J) o números 1-indexados (1:10)")
+    run.add_argument("--start-row", type=int, default=1, help="Fila inicial (1-indexada)")
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos de lectura en paralelo")
+    run.add_argument("--incremental", action="store_true", help="Solo archivos nuevos o modificados")
+    run.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND, help="Formato del dataset consolidado")
+    run.add_argument("--xlsx", action="store_true", help="Exportar también a 'Out.xlsx'")
+    run.add_argument("--out-of-core", action="store_true",
+                     help="Escribir el dataset archivo a archivo, sin juntarlo en memoria (parquet o feather)")
+    run.set_defaults(func=command_run)
+
+    report = subparsers.add_parser("report", help="Resumen y gráficos del dataset consolidado")
+    report.add_argument("--store", default=None, help="Dataset consolidado (por defecto el más reciente)")
+    report.add_argument("--output-dir", default="reporte", help="Carpeta de salida")
+    report.add_argument("--out-of-core", action="store_true", help="Calcular el reporte por bloques, sin cargar el dataset")
+    report.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Filas por bloque en el modo por bloques")
+    report.set_defaults(func=command_report)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'start_row', 1) < 1:
+        print("La fila inicial debe ser mayor o igual a 1.", file=sys.stderr)
+        return 2
+    # Cada ejecución queda registrada en .perf/perf_log.jsonl
+    perf = PerfRecorder(f"etl_{args.command}", profile=args.profile or None).start()
+    try:
+        return args.func(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        entry = perf.finish()
+        if args.timings and perf.records:
+            print(summary_table(perf).to_string(index=False), file=sys.stderr)
+            print(f"Total: {entry['seconds']:.3f} s, memoria residente máxima: {format_mib(entry['max_rss_bytes'])}",
+                  file=sys.stderr)
+        if perf.profile_path:
+            print(f"Perfil cProfile guardado en '{perf.profile_path}'", file=sys.stderr)
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+# Barras por defecto de los histogramas por grupo
+DEFAULT_BINS = 20
+
+# Función para calcular bordes comunes a todos los grupos a partir de los valores finitos
+def histogram_edges(values, bins=DEFAULT_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    finite = values[np.isfinite(values)]
+    if not finite.size:
+        return None
+    return np.histogram_bin_edges([finite.min(), finite.max()], bins)
+
+# Función para obtener la barra de cada valor (-1 si es NaN o queda fuera de los bordes).
+# Con bordes equiespaciados la barra se calcula con aritmética y se corrige el redondeo
+# comparando con los bordes, igual que np.histogram; el borde derecho de la última barra
+# queda dentro.
+def bin_codes(values, edges):
+    values = np.asarray(values, dtype=np.float64)
+    n_bins = len(edges) - 1
+    inside = (values >= edges[0]) & (values <= edges[-1])
+    codes = np.full(values.shape, -1, dtype=np.int64)
+    selected = values[inside]
+    widths = np.diff(edges)
+    if np.allclose(widths, widths[0]):
+        found = ((selected - edges[0]) * (n_bins / (edges[-1] - edges[0]))).astype(np.int64)
+        np.clip(found, 0, n_bins - 1, out=found)
+        found -= selected < edges[found]
+        found += (selected >= edges[found + 1]) & (found != n_bins - 1)
+    else:
+        found = np.minimum(np.searchsorted(edges, selected, side='right') - 1, n_bins - 1)
+    codes[inside] = found
+    return codes
+
+# Función para obtener los años de una columna de fechas como enteros con nulos (Int64),
+# directamente de los datetime64 de numpy
+def date_years(dates):
+    values = pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]')
+    missing = np.isnat(values)
+    years = values.astype('datetime64[Y]').astype(np.int64) + 1970
+    years[missing] = 0
+    return pd.arrays.IntegerArray(years, missing)
+
+# Función para codificar los grupos como 0..n-1 en orden; devuelve (códigos, grupos).
+# Los nulos quedan en -1. Los enteros (como los años) se codifican por su distancia al
+# menor, sin ordenar ni usar tablas hash.
+def group_codes(groups):
+    groups = pd.Series(groups)
+    if not pd.api.types.is_integer_dtype(groups.dtype):
+        codes, uniques = pd.factorize(groups, sort=True)
+        return codes, list(uniques)
+
+    missing = groups.isna().to_numpy()
+    values = groups.to_numpy(dtype=np.int64, na_value=0)
+    if missing.all():
+        return np.full(len(values), -1, dtype=np.int64), []
+    low = values[~missing].min()
+    offsets = values - low
+    offsets[missing] = 0
+    present = np.bincount(offsets[~missing]) > 0
+    remap = np.cumsum(present) - 1
+    codes = remap[offsets]
+    codes[missing] = -1
+    return codes, [int(low + offset) for offset in np.flatnonzero(present)]
+
+# Función para contar en una sola pasada las filas de cada (grupo, barra) con un bincount
+# sobre el código combinado grupo * barras + barra; devuelve una matriz grupos x barras
+def grouped_bincount(group_codes, codes, n_groups, n_bins):
+    valid = (group_codes >= 0) & (codes >= 0)
+    combined = group_codes[valid].astype(np.int64) * n_bins + codes[valid]
+    return np.bincount(combined, minlength=n_groups * n_bins).reshape(n_groups, n_bins)
+
+# Histogramas de una columna por grupo (por ejemplo, por año) con bordes comunes, así las
+# barras de todos los grupos se pueden comparar. Solo guarda los conteos: se puede
+# cachear, exportar (to_frame, to_dict) y combinar por bloques (merge).
+class GroupedHistogram:
+    def __init__(self, label, edges, groups, counts):
+        self.label = label
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.groups = list(groups)
+        self.counts = np.asarray(counts, dtype=np.int64).reshape(len(self.groups), len(self.edges) - 1)
+
+    # Función para calcular el histograma de values por grupo; groups puede tener NaN
+    # (esas filas no se cuentan) y edges se calcula con los valores si no se da
+    @classmethod
+    def compute(cls, label, values, groups, bins=DEFAULT_BINS, edges=None):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+        if edges is None:
+            edges = histogram_edges(values, bins)
+        if edges is None:
+            return cls(label, [0.0, 1.0], [], np.zeros((0, 1)))
+        codes, uniques = group_codes(groups)
+        counts = grouped_bincount(codes, bin_codes(values, edges), len(uniques), len(edges) - 1)
+        return cls(label, edges, uniques, counts)
+
+    # Función para sumar otro histograma con los mismos bordes (por ejemplo, de otro bloque)
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Los histogramas tienen bordes distintos.")
+        groups = sorted(set(self.groups) | set(other.groups))
+        counts = np.zeros((len(groups), len(self.edges) - 1), dtype=np.int64)
+        for source in (self, other):
+            if source.groups:
+                counts[[groups.index(group) for group in source.groups]] += source.counts
+        return GroupedHistogram(self.label, self.edges, groups, counts)
+
+    # Función para obtener los conteos como diccionario grupo -> vector de conteos
+    def counts_by_group(self):
+        return dict(zip(self.groups, self.counts))
+
+    # Función para exportar los conteos como tabla: una fila por (grupo, barra)
+    def to_frame(self, group_name='grupo'):
+        n_groups, n_bins = self.counts.shape
+        return pd.DataFrame({
+            group_name: np.repeat(np.array(self.groups, dtype=object), n_bins),
+            'desde': np.tile(self.edges[:-1], n_groups),
+            'hasta': np.tile(self.edges[1:], n_groups),
+            'frecuencia': self.counts.ravel(),
+        })
+
+    # Función para serializar los conteos (por ejemplo, a JSON para cachearlos)
+    def to_dict(self):
+        return {
+            'label': self.label,
+            'edges': self.edges.tolist(),
+            'groups': [group.item() if isinstance(group, np.generic) else group for group in self.groups],
+            'counts': self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['label'], data['edges'], data['groups'], data['counts'])
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from etl_core.ingest import list_excel_files, load_files
+from etl_core.schema import SCHEMA_VERSION, combine_typed_frames
+
+# Carpeta donde se guardan el manifiesto y el dataset consolidado del modo incremental
+STATE_DIR = '.etl_estado'
+MANIFEST_NAME = 'manifest.json'
+STORE_NAME = 'dataset.pkl'
+
+# Columna que indica de qué archivo viene cada fila; permite reemplazar o borrar sus filas
+SOURCE_COLUMN = 'ARCHIVO'
+
+# Función para calcular el hash del contenido de un archivo leyéndolo por bloques
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Función para obtener tamaño, fecha de modificación y hash de cada archivo.
+# Si tamaño y fecha coinciden con el manifiesto anterior se reutiliza su hash.
+def scan_files(folder_path, files, previous_entries):
+    entries = {}
+    for file in files:
+        stat = os.stat(os.path.join(folder_path, file))
+        previous = previous_entries.get(file)
+        if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime_ns:
+            sha256 = previous['sha256']
+        else:
+            sha256 = file_sha256(os.path.join(folder_path, file))
+        entries[file] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': sha256}
+    return entries
+
+# Función para clasificar los archivos en nuevos, modificados, eliminados y sin cambios
+def diff_manifest(previous_entries, current_entries):
+    added = [f for f in current_entries if f not in previous_entries]
+    changed = [f for f in current_entries
+               if f in previous_entries and previous_entries[f]['sha256'] != current_entries[f]['sha256']]
+    removed = [f for f in previous_entries if f not in current_entries]
+    unchanged = [f for f in current_entries if f in previous_entries and f not in changed]
+    return added, changed, removed, unchanged
+
+# Función para leer el manifiesto; devuelve None si no existe
+def load_manifest(state_dir=STATE_DIR):
+    path = os.path.join(state_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+# Función para guardar el manifiesto de forma atómica
+def save_manifest(manifest, state_dir=STATE_DIR):
+    path = os.path.join(state_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+# Función para leer el dataset consolidado guardado por la ejecución anterior
+def load_store(state_dir=STATE_DIR):
+    path = os.path.join(state_dir, STORE_NAME)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_pickle(path)
+
+# Función para guardar el dataset consolidado de forma atómica
+def save_store(dataset, state_dir=STATE_DIR):
+    path = os.path.join(state_dir, STORE_NAME)
+    tmp_path = path + '.tmp'
+    dataset.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+# Función para procesar solo los archivos nuevos o modificados desde la última ejecución.
+# Las filas de archivos modificados o eliminados se quitan del dataset consolidado.
+# Las diferencias de esquema de los archivos nuevos se informan con on_mismatch(archivo, mensaje).
+# Devuelve el dataset completo, con las mismas columnas que una ejecución completa (SOURCE_COLUMN
+# solo se guarda en STATE_DIR), y un resumen con los archivos de cada tipo.
+def process_files_incremental(folder_path, columns_range, start_row, workers=1, on_error=None,
+                              state_dir=STATE_DIR, on_mismatch=None):
+    os.makedirs(state_dir, exist_ok=True)
+    params = {
+        'folder': os.path.abspath(folder_path),
+        'columns_range': list(columns_range),
+        'start_row': int(start_row),
+        'schema': SCHEMA_VERSION,
+    }
+
+    # Si cambia la carpeta o los parámetros de lectura, se reprocesa todo
+    manifest = load_manifest(state_dir)
+    if manifest is None or manifest.get('params') != params:
+        previous_entries = {}
+        store = pd.DataFrame()
+    else:
+        previous_entries = manifest['files']
+        store = load_store(state_dir)
+        # Sin el dataset guardado no se pueden conservar filas: se reprocesa todo
+        if store.empty:
+            previous_entries = {}
+
+    files = list_excel_files(folder_path)
+    current_entries = scan_files(folder_path, files, previous_entries)
+    added, changed, removed, unchanged = diff_manifest(previous_entries, current_entries)
+
+    # Quitar las filas de los archivos modificados o eliminados
+    if not store.empty and (changed or removed):
+        store = store[~store[SOURCE_COLUMN].isin(changed + removed)]
+
+    # Leer solo los archivos nuevos o modificados
+    to_process = sorted(added + changed)
+    frames = [store] if not store.empty else []
+    sources = [None] * len(frames)
+    failed = []
+    for file, df, error in load_files(folder_path, to_process, columns_range, start_row, workers):
+        if error is not None:
+            failed.append(file)
+            if on_error is not None:
+                on_error(file, error)
+            continue
+        df[SOURCE_COLUMN] = file
+        frames.append(df)
+        sources.append(file)
+
+    # Los archivos con error no entran al manifiesto para reintentarlos la próxima vez
+    for file in failed:
+        current_entries.pop(file)
+
+    if frames:
+        dataset = combine_typed_frames(frames, sources, on_mismatch)
+        dataset = dataset.sort_values(SOURCE_COLUMN, kind='stable', ignore_index=True)
+    else:
+        dataset = pd.DataFrame()
+
+    save_store(dataset, state_dir)
+    save_manifest({'params': params, 'files': current_entries}, state_dir)
+
+    summary = {
+        'added': sorted(set(added) - set(failed)),
+        'changed': sorted(set(changed) - set(failed)),
+        'removed': removed,
+        'unchanged': unchanged,
+        'failed': failed,
+    }
+    return dataset.drop(columns=SOURCE_COLUMN, errors='ignore'), summary
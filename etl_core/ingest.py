@@ -0,0 +1,80 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import pandas as pd
+
+from etl_core.reader import read_sheet_columns
+from etl_core.schema import add_date_column, apply_schema, combine_typed_frames
+
+# Función para extraer año, mes y día del nombre del archivo
+def extract_date_from_filename(filename):
+    match = re.search(r'\.(\d{4})\.(\d{2})\.(\d{2})\.', filename)
+    if match:
+        return match.groups()
+    return ("", "", "")
+
+# Función para obtener los archivos Excel de la carpeta, ordenados por nombre
+def list_excel_files(folder_path):
+    return sorted(f for f in os.listdir(folder_path) if f.endswith('.xlsx'))
+
+# Función para leer la hoja "ITEM_O" de un archivo, añadir la fecha del nombre y tipar
+# las columnas (etl_core.schema). engine="stream" usa el lector de solo lectura de
+# etl_core.reader; engine="pandas" conserva la lectura anterior con pd.read_excel
+# (hoja completa y luego iloc).
+def read_item_o(file_path, columns_range, start_row, engine="stream"):
+    columns = list(range(columns_range[0], columns_range[1] + 1))
+
+    if engine == "stream":
+        df = read_sheet_columns(file_path, columns, start_row, sheet_name="ITEM_O")
+    else:
+        # Leer solo la primera hoja con nombre "ITEM_O" y seleccionar columnas especificadas
+        df = pd.read_excel(file_path, sheet_name="ITEM_O", header=None, skiprows=start_row-1)
+        df = df.iloc[:, columns]
+
+    # Extraer fecha del nombre del archivo en una sola columna de tipo fecha
+    year, month, day = extract_date_from_filename(os.path.basename(file_path))
+    df = apply_schema(add_date_column(df, year, month, day))
+    df.attrs['source'] = os.path.basename(file_path)
+    return df
+
+# Función ejecutada por cada proceso: devuelve el DataFrame o el mensaje de error.
+# El error se devuelve como texto porque no todas las excepciones se pueden serializar.
+def _load_file(file_path, columns_range, start_row):
+    try:
+        return read_item_o(file_path, columns_range, start_row), None
+    except Exception as e:
+        return None, str(e)
+
+# Función para leer los archivos en orden, en serie o con un pool de procesos.
+# Devuelve tuplas (archivo, DataFrame, error) en el mismo orden que `files`.
+def load_files(folder_path, files, columns_range, start_row, workers=1):
+    paths = [os.path.join(folder_path, file) for file in files]
+
+    if workers <= 1 or len(paths) <= 1:
+        for file, path in zip(files, paths):
+            df, error = _load_file(path, columns_range, start_row)
+            yield file, df, error
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+        results = executor.map(_load_file, paths, repeat(columns_range), repeat(start_row))
+        for file, (df, error) in zip(files, results):
+            yield file, df, error
+
+# Función generadora: entrega el DataFrame de cada archivo sin acumularlos.
+# Los errores se informan por archivo mediante on_error(archivo, error).
+def iter_frames(folder_path, files, columns_range, start_row, workers=1, on_error=None):
+    for file, df, error in load_files(folder_path, files, columns_range, start_row, workers):
+        if error is not None:
+            if on_error is not None:
+                on_error(file, error)
+            continue
+        yield df
+
+# Función para materializar los DataFrames una sola vez al final (coste lineal).
+# Las diferencias de esquema entre archivos se informan con on_mismatch(archivo, mensaje).
+def combine_frames(frames, on_mismatch=None):
+    frames = list(frames)
+    return combine_typed_frames(frames, [df.attrs.get('source') for df in frames], on_mismatch)
@@ -0,0 +1,134 @@
+import numpy as np
+
+# Nivel de detalle de los gráficos: con pocos puntos se dibujan todos; con muchos, los
+# gráficos de dispersión pasan a una muestra estratificada (que conserva todos los valores
+# atípicos) o a un mapa de densidad, y los histogramas y boxplots se dibujan a partir de
+# conteos y cuartiles ya calculados. Cada figura indica con qué modo se dibujó.
+
+# Puntos a partir de los cuales se reduce el detalle
+MAX_POINTS = 20_000
+
+# Celdas por eje de la rejilla usada para estratificar la muestra
+GRID_CELLS = 50
+
+# Hexágonos por eje del mapa de densidad
+HEXBIN_GRIDSIZE = 60
+
+# Barras de los histogramas por columna
+HISTOGRAM_BINS = 30
+
+# Modos de representación: completo, muestra estratificada o densidad (hexbin)
+SCATTER_MODES = ('completo', 'muestra', 'densidad')
+
+# Función para marcar los valores atípicos según la regla de Tukey (1.5 veces el IQR); los NaN no lo son
+def outlier_mask(values):
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    if not present.any():
+        return np.zeros(values.shape, dtype=bool)
+    q1, q3 = np.percentile(values[present], [25, 75])
+    iqr = q3 - q1
+    with np.errstate(invalid='ignore'):
+        return (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+
+# Función para elegir una muestra de las filas de un gráfico de dispersión: se reparte en una
+# rejilla de celdas y de cada celda no vacía se toma al menos una fila (así las zonas con
+# pocos puntos no desaparecen) y el resto en proporción a sus filas. Los valores atípicos de
+# x o de y se conservan todos. Devuelve los índices (posiciones) elegidos, ordenados.
+def stratified_sample(x, y, max_points=MAX_POINTS, cells=GRID_CELLS, seed=0):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    rows = np.flatnonzero(~np.isnan(x) & ~np.isnan(y))
+    if rows.size <= max_points:
+        return rows
+    xs, ys = x[rows], y[rows]
+    outliers = outlier_mask(xs) | outlier_mask(ys)
+
+    # Celda de cada fila en la rejilla cells x cells
+    def axis_cells(values):
+        low, high = values.min(), values.max()
+        if high == low:
+            return np.zeros(values.size, dtype=np.int64)
+        return np.minimum(((values - low) / (high - low) * cells).astype(np.int64), cells - 1)
+    cell = axis_cells(xs) * cells + axis_cells(ys)
+
+    # Cupo de cada celda y orden aleatorio dentro de ella: se toman las primeras del cupo
+    counts = np.bincount(cell, minlength=cells * cells)
+    fraction = max(max_points - int(outliers.sum()), 0) / rows.size
+    quota = np.where(counts > 0, np.maximum(1, np.round(counts * fraction)), 0).astype(np.int64)
+    priority = np.random.default_rng(seed).random(rows.size)
+    order = np.lexsort((priority, cell))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.empty(rows.size, dtype=np.int64)
+    rank[order] = np.arange(rows.size) - starts[cell[order]]
+    return rows[(rank < quota[cell]) | outliers]
+
+# Función para decidir cómo dibujar un gráfico de dispersión: con hasta max_points filas
+# válidas se dibujan todas; con más, dense_mode ('muestra' o 'densidad'). Devuelve
+# (modo, posiciones de las filas a dibujar, filas válidas).
+def scatter_plan(x, y, max_points=MAX_POINTS, dense_mode='muestra'):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    rows = np.flatnonzero(~np.isnan(x) & ~np.isnan(y))
+    if rows.size <= max_points:
+        return 'completo', rows, rows.size
+    if dense_mode == 'densidad':
+        return 'densidad', rows, rows.size
+    return 'muestra', stratified_sample(x, y, max_points), rows.size
+
+# Función para tomar a lo sumo max_items valores repartidos por todo el rango (incluye el
+# menor y el mayor)
+def spread_subset(values, max_items):
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    if values.size <= max_items:
+        return values
+    return values[np.linspace(0, values.size - 1, max_items).round().astype(np.int64)]
+
+# Función para calcular los datos del boxplot de una columna (como ax.boxplot: cuartiles
+# lineales y bigotes a 1.5 veces el IQR) para dibujarlo con ax.bxp. De los valores atípicos
+# se guardan a lo sumo max_fliers, repartidos por todo su rango. Devuelve (datos, atípicos).
+def box_stats(values, label, max_fliers=MAX_POINTS):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    inside = values[(values >= low) & (values <= high)]
+    fliers = values[(values < low) | (values > high)]
+    box = {
+        'label': str(label), 'q1': q1, 'med': median, 'q3': q3,
+        'whislo': inside.min() if inside.size else q1, 'whishi': inside.max() if inside.size else q3,
+        'fliers': spread_subset(fliers, max_fliers).tolist(),
+    }
+    return box, fliers.size
+
+# Función para resumir una columna para su histograma y boxplot, con las mismas claves que
+# usa stream_statistics (etl_core.outofcore) para cada columna
+def column_summary(values, label, bins=HISTOGRAM_BINS, max_fliers=MAX_POINTS):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {'count': 0, 'edges': None, 'counts': None, 'box': None, 'outliers': 0}
+    counts, edges = np.histogram(values, bins)
+    box, outliers = box_stats(values, label, max_fliers)
+    return {'count': values.size, 'edges': edges, 'counts': counts, 'box': box, 'outliers': outliers}
+
+# Función para describir el modo con que se dibujó un gráfico de dispersión
+def scatter_caption(mode, shown, total):
+    if mode == 'muestra':
+        return f"Representación: muestra estratificada de {shown} de {total} puntos (incluye todos los atípicos)"
+    if mode == 'densidad':
+        return f"Representación: densidad (hexbin) de {total} puntos"
+    return f"Representación: todos los puntos ({total})"
+
+# Función para describir el modo con que se dibujó un histograma con boxplot
+def summary_caption(col_stats):
+    shown = len(col_stats['box']['fliers']) if col_stats.get('box') else 0
+    caption = f"Representación: conteos y cuartiles precalculados de {col_stats['count']} valores"
+    if shown < col_stats['outliers']:
+        caption += f"; se dibujan {shown} de {col_stats['outliers']} atípicos"
+    return caption
+
+# Función para escribir el modo de representación al pie de una figura
+def label_figure(fig, caption):
+    fig.text(0.99, 0.005, caption, ha='right', va='bottom', fontsize=8, color='gray')
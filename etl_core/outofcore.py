@@ -0,0 +1,263 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl_core.histogram import GroupedHistogram, bin_codes, date_years, group_codes, grouped_bincount
+from etl_core.ingest import iter_frames, list_excel_files
+from etl_core.perf import stage
+from etl_core.schema import DATE_COLUMN, frame_schema, merge_schemas
+from etl_core.sketch import QuantileSketch, RunningMoments
+from etl_core.store import backend_for_path, latest_store_path, numeric_columns, store_columns, store_path
+
+# Modo por bloques: el dataset consolidado se escribe archivo a archivo y se recorre por
+# bloques de filas, así la memoria usada depende del tamaño del bloque y no del dataset.
+# Parquet se lee por lotes y Feather con un mapa de memoria (pyarrow); pickle no se puede
+# leer por partes y se carga completo.
+
+# Filas por bloque al recorrer el dataset consolidado
+CHUNK_ROWS = 250_000
+
+# Tamaño del búfer de lectura de Parquet (bytes)
+PARQUET_BUFFER_SIZE = 1 << 20
+
+# Barras de los histogramas y valores atípicos que se guardan por columna para el boxplot
+HISTOGRAM_BINS = 30
+MAX_FLIERS = 200
+
+# Cuantiles de la tabla resumen (como describe() de pandas)
+SUMMARY_QUANTILES = (0.25, 0.5, 0.75)
+
+# Función para recorrer el dataset consolidado por bloques de filas, solo con las columnas pedidas
+def iter_store_chunks(path=None, columns=None, chunk_rows=CHUNK_ROWS):
+    path = path or latest_store_path()
+    backend = backend_for_path(path)
+    if backend == 'parquet':
+        import pyarrow.parquet as pq
+        # Sin pre_buffer pyarrow lee por adelantado todo el archivo y no solo el lote actual
+        parquet_file = pq.ParquetFile(path, pre_buffer=False, buffer_size=PARQUET_BUFFER_SIZE)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    elif backend == 'feather':
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        with pa.memory_map(path) as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for offset in range(0, batch.num_rows, chunk_rows):
+                    yield batch.slice(offset, chunk_rows).to_pandas()
+    else:
+        dataset = pd.read_pickle(path)
+        if columns is not None:
+            dataset = dataset[columns]
+        for offset in range(0, len(dataset), chunk_rows):
+            yield dataset.iloc[offset:offset + chunk_rows]
+
+# Tipo de pyarrow de cada tipo de columna. Las columnas numéricas se guardan como float64
+# porque el esquema queda fijo con el primer archivo y otro archivo puede traer decimales.
+def _arrow_type(kind):
+    import pyarrow as pa
+    return {
+        'boolean': pa.bool_(),
+        'datetime': pa.timestamp('ns'),
+        'text': pa.string(),
+    }.get(kind, pa.float64())
+
+# Función para preparar un DataFrame tipado para el esquema de pyarrow fijo
+def _to_arrow(df, schema, arrow_schema):
+    import pyarrow as pa
+    columns = {}
+    for col, kind in schema.items():
+        series = df[col]
+        if kind == 'text':
+            series = series.astype(object)
+            series = series.where(series.isna(), series.astype(str))
+        columns[str(col)] = series
+    frame = pd.DataFrame(columns, index=df.index)
+    return pa.Table.from_pandas(frame, schema=arrow_schema, preserve_index=False)
+
+# Backends que se pueden escribir por lotes
+STREAMING_BACKENDS = ('parquet', 'feather')
+
+# Función para abrir el escritor por lotes del backend
+def _open_writer(path, backend, arrow_schema):
+    if backend == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, arrow_schema)
+    import pyarrow.ipc as ipc
+    return ipc.new_file(path, arrow_schema)
+
+# Función para consolidar los archivos de una carpeta escribiéndolos uno a uno en el dataset
+# (Parquet o Feather), sin juntar todas las filas en memoria. El esquema lo fija el primer
+# archivo: un archivo con columnas o tipos incompatibles se informa con on_mismatch y se omite.
+# Devuelve (primeras filas para mostrar, filas escritas, ruta escrita).
+def consolidate_to_store(folder_path, columns_range, start_row, workers=1, backend='parquet', path=None,
+                         on_error=None, on_mismatch=None, preview_rows=1000):
+    if backend not in STREAMING_BACKENDS:
+        raise ValueError(f"El backend '{backend}' no admite el modo por bloques; use parquet o feather.")
+    if not os.path.isdir(folder_path):
+        raise FileNotFoundError(f"No existe la carpeta '{folder_path}'.")
+    files = list_excel_files(folder_path)
+    if not files:
+        raise FileNotFoundError("No se encontraron archivos Excel en la carpeta.")
+
+    import pyarrow as pa
+    path = path or store_path(backend)
+    tmp_path = path + '.tmp'
+    schema = None
+    arrow_schema = None
+    writer = None
+    rows = 0
+    preview = []
+    try:
+        for df in iter_frames(folder_path, files, columns_range, start_row, workers, on_error=on_error):
+            source = df.attrs.get('source')
+            file_schema = frame_schema(df)
+            for message in df.attrs.get('schema_issues', []):
+                if on_mismatch is not None:
+                    on_mismatch(source, message)
+
+            if schema is None:
+                # Una columna vacía en el primer archivo se guarda como numérica
+                schema = {col: 'float' if kind == 'empty' else kind for col, kind in file_schema.items()}
+                arrow_schema = pa.schema([(str(col), _arrow_type(kind)) for col, kind in schema.items()])
+                writer = _open_writer(tmp_path, backend, arrow_schema)
+            else:
+                merged, messages = merge_schemas(schema, file_schema, resolution=None)
+                compatible = not messages and all(_arrow_type(merged[col]) == _arrow_type(schema[col]) for col in schema)
+                if not compatible:
+                    if on_mismatch is not None:
+                        for message in messages:
+                            on_mismatch(source, message)
+                        on_mismatch(source, "El esquema no coincide con el del primer archivo; el archivo se omite.")
+                    continue
+
+            with stage('escritura_por_bloques', rows=len(df)):
+                writer.write_table(_to_arrow(df, schema, arrow_schema))
+            rows += len(df)
+            if sum(len(part) for part in preview) < preview_rows:
+                preview.append(df.head(preview_rows))
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            writer = None
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if schema is None:
+        return pd.DataFrame(), 0, None
+    os.replace(tmp_path, path)
+    preview = pd.concat(preview, ignore_index=True).head(preview_rows) if preview else pd.DataFrame()
+    return preview, rows, path
+
+# Función para obtener la columna de año de un bloque (de FECHA o, en datasets anteriores, ANIO)
+def _chunk_years(chunk, year_column):
+    if year_column == DATE_COLUMN:
+        return date_years(chunk[year_column])
+    return pd.to_numeric(chunk[year_column], errors='coerce').astype('Int64')
+
+# Función para calcular en dos pasadas por bloques, sin cargar el dataset, el resumen de las
+# columnas numéricas: conteo, media, desviación, mínimo, máximo y cuantiles (sketch KLL),
+# histograma, datos del boxplot (cuartiles aproximados, bigotes exactos y una muestra de
+# valores atípicos) e histogramas por año (GroupedHistogram). La primera pasada fija los bordes de los
+# histogramas y los límites de los bigotes; la segunda cuenta.
+def stream_statistics(path=None, columns=None, bins=HISTOGRAM_BINS, chunk_rows=CHUNK_ROWS, max_fliers=MAX_FLIERS):
+    path = path or latest_store_path()
+    columns = list(columns) if columns is not None else numeric_columns(path)
+    available = store_columns(path)
+    year_column = next((col for col in (DATE_COLUMN, 'ANIO') if col in available and col not in columns), None)
+    read_columns = columns + ([year_column] if year_column else [])
+
+    moments = {col: RunningMoments() for col in columns}
+    sketches = {col: QuantileSketch() for col in columns}
+    rows = 0
+    with stage('estadisticas_pasada_1') as timing:
+        for chunk in iter_store_chunks(path, read_columns, chunk_rows):
+            rows += len(chunk)
+            for col in columns:
+                values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+                moments[col].update(values)
+                sketches[col].update(values)
+        timing.rows = rows
+
+    stats = {}
+    for col in columns:
+        q1, median, q3 = sketches[col].quantiles(SUMMARY_QUANTILES)
+        iqr = q3 - q1
+        stats[col] = {
+            'count': moments[col].count,
+            'mean': moments[col].mean if moments[col].count else np.nan,
+            'std': moments[col].std,
+            'min': moments[col].min if moments[col].count else np.nan,
+            'max': moments[col].max if moments[col].count else np.nan,
+            'quantiles': dict(zip(SUMMARY_QUANTILES, (q1, median, q3))),
+            'edges': np.histogram_bin_edges([moments[col].min, moments[col].max], bins) if moments[col].count else None,
+            'counts': np.zeros(bins, dtype=np.int64),
+            'fences': (q1 - 1.5 * iqr, q3 + 1.5 * iqr),
+            'box': {'label': str(col), 'q1': q1, 'med': median, 'q3': q3, 'whislo': np.inf, 'whishi': -np.inf,
+                    'fliers': []},
+            'outliers': 0,
+            'years': None,
+        }
+
+    with stage('estadisticas_pasada_2', rows=rows):
+        for chunk in iter_store_chunks(path, read_columns, chunk_rows):
+            years = _chunk_years(chunk, year_column) if year_column else None
+            for col in columns:
+                col_stats = stats[col]
+                if col_stats['edges'] is None:
+                    continue
+                values = pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64)
+                present = ~np.isnan(values)
+                codes = bin_codes(values, col_stats['edges'])
+                col_stats['counts'] += np.bincount(codes[codes >= 0], minlength=bins)
+
+                low, high = col_stats['fences']
+                inside = present & (values >= low) & (values <= high)
+                box = col_stats['box']
+                if inside.any():
+                    box['whislo'] = min(box['whislo'], float(values[inside].min()))
+                    box['whishi'] = max(box['whishi'], float(values[inside].max()))
+                outliers = values[present & ~inside]
+                col_stats['outliers'] += outliers.size
+                room = max_fliers - len(box['fliers'])
+                if room > 0:
+                    box['fliers'].extend(outliers[:room].tolist())
+
+                if years is not None:
+                    # Todos los años del bloque en un solo bincount sobre (año, barra)
+                    year_codes, uniques = group_codes(years)
+                    counts = grouped_bincount(year_codes, codes, len(uniques), bins)
+                    by_year = GroupedHistogram(col, col_stats['edges'], uniques, counts)
+                    col_stats['years'] = by_year if col_stats['years'] is None else col_stats['years'].merge(by_year)
+
+    for col_stats in stats.values():
+        box = col_stats['box']
+        if not np.isfinite(box['whislo']):
+            box['whislo'], box['whishi'] = col_stats['min'], col_stats['max']
+    return {'path': path, 'rows': rows, 'year_column': year_column, 'columns': stats}
+
+# Función para convertir el resultado de stream_statistics en una tabla como describe()
+def summary_frame(report):
+    rows = {}
+    for col, col_stats in report['columns'].items():
+        rows[col] = {
+            'count': col_stats['count'],
+            'mean': col_stats['mean'],
+            'std': col_stats['std'],
+            'min': col_stats['min'],
+            **{f"{q:.0%}": value for q, value in col_stats['quantiles'].items()},
+            'max': col_stats['max'],
+        }
+    return pd.DataFrame(rows)
+
+# Función para obtener las medias de las columnas del resultado de stream_statistics
+def column_means(report, exclude=()):
+    return pd.Series({col: col_stats['mean'] for col, col_stats in report['columns'].items() if col not in exclude})
@@ -0,0 +1,22 @@
+from openpyxl import Workbook
+
+# Función para escribir los DataFrames en un Excel fila a fila, sin reunirlos en memoria.
+# Usa el modo write_only de openpyxl; devuelve el número de filas escritas.
+def write_frames_to_excel(frames, path, sheet_name="Sheet1"):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    rows = 0
+    header = None
+
+    for df in frames:
+        if header is None:
+            header = list(df.columns)
+            sheet.append([str(col) for col in header])
+        values = df[header].astype(object)
+        values = values.where(values.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(list(row))
+        rows += len(df)
+
+    workbook.save(path)
+    return rows
@@ -0,0 +1,213 @@
+import contextvars
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # resource solo existe en Unix; en Windows el pico de memoria se lee con psutil si está
+    resource = None
+
+# Carpeta de los registros de rendimiento y de los volcados de cProfile
+PERF_DIR = '.perf'
+PERF_LOG = 'perf_log.jsonl'
+
+# Tamaño a partir del cual el registro se rota a perf_log.jsonl.1 (se guarda una sola copia
+# anterior), así las apps de Streamlit, que añaden una línea por ejecución, no lo hacen crecer sin límite
+PERF_LOG_MAX_BYTES = 5 * 2**20
+
+# Variable de entorno para activar cProfile sin tocar el código (ETL_PROFILE=1)
+PROFILE_ENV = 'ETL_PROFILE'
+
+# ru_maxrss está en KiB en Linux y en bytes en macOS
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+_current = contextvars.ContextVar('perf_recorder', default=None)
+
+# Función para leer la memoria residente actual del proceso (bytes); None si no se puede
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+# Función para leer el pico de memoria residente del proceso (bytes); None si no se puede
+def max_rss():
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss)
+
+# Función para escribir una cantidad de memoria en MiB (la memoria puede no estar disponible)
+def format_mib(value):
+    return f"{value / 2**20:.1f} MiB" if value is not None else "no disponible"
+
+def _growth(after, before):
+    return after - before if after is not None and before is not None else None
+
+# Datos de una etapa en curso; el código instrumentado puede fijar rows y bytes
+class StageHandle:
+    def __init__(self, name, rows=None, bytes=None):
+        self.name = name
+        self.rows = rows
+        self.bytes = bytes
+
+# Registro de etapas de una ejecución: tiempo real y de CPU, filas/s, bytes/s y memoria.
+# Cada etapa cuesta unos pocos microsegundos (perf_counter, getrusage y /proc), así que
+# puede quedar activo en producción. Con trace_memory=True se usa además tracemalloc
+# para el pico exacto de memoria de Python por etapa (más caro, solo para diagnóstico).
+# Con profile=True se perfila toda la ejecución con cProfile y se guarda un .prof.
+class PerfRecorder:
+    def __init__(self, run_name, perf_dir=PERF_DIR, profile=None, trace_memory=False):
+        self.run_name = run_name
+        self.perf_dir = perf_dir
+        self.profile = profile if profile is not None else os.environ.get(PROFILE_ENV) == '1'
+        self.trace_memory = trace_memory
+        self.records = []
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._profiler = None
+        self._token = None
+        self.profile_path = None
+
+    # Función para iniciar la ejecución: la convierte en el registro actual y arranca cProfile
+    def start(self):
+        self._token = _current.set(self)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Ya hay otro perfilador activo en este proceso
+                self._profiler = None
+        return self
+
+    @contextmanager
+    def stage(self, name, rows=None, bytes=None):
+        handle = StageHandle(name, rows, bytes)
+        max_rss_before = max_rss()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield handle
+        finally:
+            seconds = time.perf_counter() - start
+            cpu_seconds = time.process_time() - cpu_start
+            record = {
+                'stage': name,
+                'seconds': seconds,
+                'cpu_seconds': cpu_seconds,
+                'rows': handle.rows,
+                'bytes': handle.bytes,
+                'rows_per_s': handle.rows / seconds if handle.rows is not None and seconds > 0 else None,
+                'bytes_per_s': handle.bytes / seconds if handle.bytes is not None and seconds > 0 else None,
+                'rss_bytes': current_rss(),
+                'max_rss_bytes': max_rss(),
+            }
+            record['max_rss_growth_bytes'] = _growth(record['max_rss_bytes'], max_rss_before)
+            if self.trace_memory and tracemalloc.is_tracing():
+                record['traced_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            self.records.append(record)
+
+    # Función para obtener las etapas agregadas por nombre (veces, tiempo total, filas, ...)
+    def summary(self):
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['stage'], {
+                'stage': record['stage'], 'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0,
+                'rows': None, 'bytes': None, 'max_rss_bytes': None, 'max_rss_growth_bytes': None,
+            })
+            total['calls'] += 1
+            total['seconds'] += record['seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            for key in ('rows', 'bytes', 'max_rss_growth_bytes'):
+                if record[key] is not None:
+                    total[key] = (total[key] or 0) + record[key]
+            if record['max_rss_bytes'] is not None:
+                total['max_rss_bytes'] = max(total['max_rss_bytes'] or 0, record['max_rss_bytes'])
+            if 'traced_peak_bytes' in record:
+                total['traced_peak_bytes'] = max(total.get('traced_peak_bytes', 0), record['traced_peak_bytes'])
+        for total in totals.values():
+            seconds = total['seconds']
+            total['rows_per_s'] = total['rows'] / seconds if total['rows'] is not None and seconds > 0 else None
+            total['bytes_per_s'] = total['bytes'] / seconds if total['bytes'] is not None and seconds > 0 else None
+        return sorted(totals.values(), key=lambda total: total['seconds'], reverse=True)
+
+    # Función para cerrar la ejecución: detiene cProfile, escribe el .prof y añade una
+    # línea JSON al registro (rotándolo si pasa de PERF_LOG_MAX_BYTES). Devuelve el registro escrito.
+    def finish(self):
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        os.makedirs(self.perf_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path = os.path.join(self.perf_dir, f"{self.run_name}_{stamp}_{os.getpid()}.prof")
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+
+        entry = {
+            'run': self.run_name,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'seconds': time.perf_counter() - self._start,
+            'max_rss_bytes': max_rss(),
+            'profile': self.profile_path,
+            'stages': self.records,
+        }
+        log_path = os.path.join(self.perf_dir, PERF_LOG)
+        if os.path.exists(log_path) and os.path.getsize(log_path) >= PERF_LOG_MAX_BYTES:
+            os.replace(log_path, log_path + '.1')
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, default=str) + '\n')
+        return entry
+
+# Función para obtener el registro de la ejecución actual (None si no hay ninguno)
+def current_recorder():
+    return _current.get()
+
+# Función para medir una etapa en el registro actual; sin registro activo no mide nada,
+# así las bibliotecas pueden instrumentarse sin depender de quién las llame
+@contextmanager
+def stage(name, rows=None, bytes=None):
+    recorder = _current.get()
+    if recorder is None:
+        yield StageHandle(name, rows, bytes)
+        return
+    with recorder.stage(name, rows, bytes) as handle:
+        yield handle
+
+# Función para convertir el resumen de un registro en una tabla para mostrar
+def summary_table(recorder):
+    import pandas as pd
+
+    mib = 2 ** 20
+    rows = []
+    for total in recorder.summary():
+        rows.append({
+            'etapa': total['stage'],
+            'llamadas': total['calls'],
+            'segundos': round(total['seconds'], 4),
+            'cpu_s': round(total['cpu_seconds'], 4),
+            'filas': total['rows'],
+            'filas/s': round(total['rows_per_s']) if total['rows_per_s'] is not None else None,
+            'MiB/s': round(total['bytes_per_s'] / mib, 2) if total['bytes_per_s'] is not None else None,
+            'RSS máx MiB': round(total['max_rss_bytes'] / mib, 1) if total['max_rss_bytes'] is not None else None,
+            'crecimiento RSS MiB': round(total['max_rss_growth_bytes'] / mib, 1)
+                                   if total['max_rss_growth_bytes'] is not None else None,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,58 @@
+import os
+
+from etl_core.incremental import STATE_DIR, process_files_incremental
+from etl_core.ingest import combine_frames, iter_frames, list_excel_files
+from etl_core.output import write_frames_to_excel
+from etl_core.perf import stage
+from etl_core.store import DEFAULT_BACKEND, save_dataset
+
+# Ruta de la exportación opcional a Excel
+XLSX_PATH = 'Out.xlsx'
+
+# Función para consolidar los archivos ITEM_O de una carpeta, completa o incrementalmente.
+# Devuelve (dataset, resumen); el resumen es el del modo incremental o None.
+# Los errores por archivo se informan con on_error(archivo, error) y el archivo se omite;
+# las diferencias de esquema entre archivos, con on_mismatch(archivo, mensaje).
+def consolidate_folder(folder_path, columns_range, start_row, workers=1, incremental=False, on_error=None,
+                       state_dir=STATE_DIR, on_mismatch=None):
+    if not os.path.isdir(folder_path):
+        raise FileNotFoundError(f"No existe la carpeta '{folder_path}'.")
+    files = list_excel_files(folder_path)
+    if not files:
+        raise FileNotFoundError("No se encontraron archivos Excel en la carpeta.")
+
+    if incremental:
+        with stage('lectura_incremental') as timing:
+            dataset, summary = process_files_incremental(folder_path, columns_range, start_row, workers, on_error,
+                                                        state_dir, on_mismatch)
+            timing.rows = len(dataset)
+        return dataset, summary
+
+    # Los DataFrames se generan archivo a archivo y se concatenan una sola vez al final
+    with stage('lectura_xlsx', bytes=sum(os.path.getsize(os.path.join(folder_path, f)) for f in files)) as timing:
+        frames = list(iter_frames(folder_path, files, columns_range, start_row, workers, on_error=on_error))
+        timing.rows = sum(len(df) for df in frames)
+    with stage('concatenacion', rows=timing.rows):
+        return combine_frames(frames, on_mismatch), None
+
+# Función para guardar el dataset en el backend elegido y, si se pide, en Excel.
+# Devuelve la lista de rutas escritas.
+def save_outputs(dataset, backend=DEFAULT_BACKEND, export_xlsx=False, xlsx_path=XLSX_PATH):
+    with stage(f'guardar_{backend}', rows=len(dataset)) as timing:
+        paths = [save_dataset(dataset, backend)]
+        timing.bytes = os.path.getsize(paths[0])
+    if export_xlsx:
+        with stage('exportar_xlsx', rows=len(dataset)) as timing:
+            write_frames_to_excel([dataset], xlsx_path)
+            timing.bytes = os.path.getsize(xlsx_path)
+        paths.append(xlsx_path)
+    return paths
+
+# Función para ejecutar el proceso completo sin interfaz: consolidar y guardar.
+# Devuelve (dataset, resumen, rutas escritas).
+def run_etl(folder_path, columns_range, start_row, workers=1, incremental=False, backend=DEFAULT_BACKEND,
+            export_xlsx=False, on_error=None, state_dir=STATE_DIR, on_mismatch=None):
+    dataset, summary = consolidate_folder(folder_path, columns_range, start_row, workers, incremental, on_error,
+                                          state_dir, on_mismatch)
+    paths = save_outputs(dataset, backend, export_xlsx) if not dataset.empty else []
+    return dataset, summary, paths
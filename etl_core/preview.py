@@ -0,0 +1,165 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Vista previa paginada de un DataFrame: solo se toman (y se formatean) las filas de la
+# página visible. El orden y el filtro se calculan una vez sobre la columna elegida, como
+# posiciones de filas, y se reutilizan al cambiar de página.
+
+# Filas por página
+PAGE_SIZE = 100
+
+# Comparaciones admitidas en el filtro de columnas numéricas y de fecha
+_COMPARISON = re.compile(r'^\s*(<=|>=|!=|==|=|<|>)?\s*(.+?)\s*$')
+_OPERATORS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+    '=': np.equal, '==': np.equal, '!=': np.not_equal,
+}
+
+# Función para marcar las filas de una columna que cumplen un filtro. En columnas
+# numéricas y de fecha el filtro es un valor o una comparación ('>= 10', '< 2024-01-01');
+# en las demás, un texto que la celda debe contener (sin distinguir mayúsculas).
+def filter_mask(series, text):
+    text = text.strip()
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) \
+            or pd.api.types.is_datetime64_any_dtype(series):
+        operator, value = _COMPARISON.match(text).groups()
+        try:
+            value = pd.Timestamp(value) if pd.api.types.is_datetime64_any_dtype(series) else float(value)
+        except ValueError:
+            raise ValueError(f"Filtro no válido para la columna {series.name}: '{text}'.") from None
+        with np.errstate(invalid='ignore'):
+            return np.asarray(_OPERATORS[operator or '='](series, value), dtype=bool) & series.notna().to_numpy()
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Solo se comparan las categorías, no cada fila
+        matches = series.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+        return np.isin(series.cat.codes.to_numpy(), np.flatnonzero(matches))
+    return series.astype(str).str.contains(text, case=False, regex=False).to_numpy() & series.notna().to_numpy()
+
+# Paginador de un DataFrame con orden y filtro opcionales
+class FramePager:
+    def __init__(self, frame, page_size=PAGE_SIZE):
+        self.frame = frame
+        self.page_size = page_size
+        self.sort_column = None
+        self.ascending = True
+        self.filter_column = None
+        self.filter_text = ''
+        self._positions = None
+        self._stale = False
+
+    # Función para ordenar por una columna (None quita el orden)
+    def set_sort(self, column=None, ascending=True):
+        if (column, ascending) != (self.sort_column, self.ascending):
+            self.sort_column, self.ascending = column, ascending
+            self._stale = True
+
+    # Función para filtrar una columna (texto vacío o None quita el filtro)
+    def set_filter(self, column=None, text=''):
+        text = (text or '').strip()
+        if not column or not text:
+            column, text = None, ''
+        if (column, text) != (self.filter_column, self.filter_text):
+            if column is not None:
+                # Se valida antes de cambiar el estado, así un filtro no válido no borra el anterior
+                filter_mask(self.frame[column], text)
+            self.filter_column, self.filter_text = column, text
+            self._stale = True
+
+    # Posiciones de las filas visibles en orden (None si no hay orden ni filtro)
+    def _rows(self):
+        if self._stale:
+            self._positions = self._compute_positions()
+            self._stale = False
+        return self._positions
+
+    def _compute_positions(self):
+        if self.sort_column is None and self.filter_column is None:
+            return None
+        positions = np.arange(len(self.frame))
+        if self.filter_column is not None:
+            positions = np.flatnonzero(filter_mask(self.frame[self.filter_column], self.filter_text))
+        if self.sort_column is not None:
+            values = self.frame[self.sort_column].iloc[positions].reset_index(drop=True)
+            order = values.sort_values(ascending=self.ascending, kind='stable', na_position='last').index.to_numpy()
+            positions = positions[order]
+        return positions
+
+    # Filas después del filtro
+    def __len__(self):
+        rows = self._rows()
+        return len(self.frame) if rows is None else len(rows)
+
+    @property
+    def total_rows(self):
+        return len(self.frame)
+
+    @property
+    def page_count(self):
+        return max(1, -(-len(self) // self.page_size))
+
+    # Función para obtener las filas [start, stop) de la vista
+    def window(self, start, stop):
+        rows = self._rows()
+        if rows is None:
+            return self.frame.iloc[start:stop]
+        return self.frame.iloc[rows[start:stop]]
+
+    # Función para obtener una página (numeradas desde 0)
+    def page(self, number):
+        number = min(max(number, 0), self.page_count - 1)
+        return self.window(number * self.page_size, (number + 1) * self.page_size)
+
+    # Función para describir una página: filas mostradas y totales
+    def describe(self, number):
+        number = min(max(number, 0), self.page_count - 1)
+        shown = len(self)
+        first = number * self.page_size + 1 if shown else 0
+        last = min((number + 1) * self.page_size, shown)
+        text = f"Página {number + 1} de {self.page_count}: filas {first}-{last} de {shown}"
+        if shown != self.total_rows:
+            text += f" (filtradas de {self.total_rows})"
+        return text
+
+# Función para mostrar un DataFrame paginado en Streamlit, con orden y filtro por columna.
+# Es un fragmento: al cambiar de página solo se vuelve a ejecutar la vista previa, aunque
+# se haya mostrado dentro de un botón. El paginador (y su orden) queda en la sesión bajo key.
+def st_paged_preview(frame, key, page_size=PAGE_SIZE):
+    import streamlit as st
+
+    @st.fragment
+    def preview():
+        pager = st.session_state.get(key)
+        if pager is None or pager.frame is not frame:
+            pager = st.session_state[key] = FramePager(frame, page_size)
+
+        columns = [str(col) for col in frame.columns]
+        by_name = dict(zip(columns, frame.columns))
+        col1, col2, col3, col4 = st.columns([2, 1, 2, 2])
+        with col1:
+            sort_name = st.selectbox("Ordenar por", ["(sin orden)"] + columns, key=f"{key}_sort")
+        with col2:
+            descending = st.checkbox("Descendente", key=f"{key}_descending")
+        with col3:
+            filter_name = st.selectbox("Filtrar columna", ["(sin filtro)"] + columns, key=f"{key}_filter_column")
+        with col4:
+            filter_text = st.text_input("Filtro", key=f"{key}_filter",
+                                        help="Texto contenido en la celda; en columnas numéricas o de fecha, "
+                                             "un valor o una comparación como '>= 10'")
+
+        pager.set_sort(by_name.get(sort_name), not descending)
+        try:
+            pager.set_filter(by_name.get(filter_name), filter_text)
+        except ValueError as e:
+            st.warning(str(e))
+
+        # Si el filtro deja menos páginas, se vuelve a la última
+        if st.session_state.get(f"{key}_page", 1) > pager.page_count:
+            st.session_state[f"{key}_page"] = pager.page_count
+        page = st.number_input("Página", min_value=1, max_value=pager.page_count, key=f"{key}_page")
+        st.dataframe(pager.page(page - 1))
+        st.caption(pager.describe(page - 1))
+
+    preview()
@@ -0,0 +1,259 @@
+import re
+from functools import lru_cache
+from io import BytesIO
+from xml.etree.ElementTree import fromstring, iterparse
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.datetime import from_excel, from_ISO8601
+from openpyxl.xml.constants import SHEET_MAIN_NS
+
+ROW_TAG = '{%s}row' % SHEET_MAIN_NS
+_ROW_NUMBER = re.compile(rb'\sr="(\d+)"')
+_ROOT_TAG = re.compile(rb'<(?![?!])[^>]*>')
+_PREFIX_DECLARATION = re.compile(rb'\sxmlns:[\w.-]+="[^"]*"')
+
+# Función para convertir un rango de columnas en letras ("A:I", "A,C:E") a índices 0-based
+def parse_column_letters(spec):
+    columns = []
+    for part in spec.replace(' ', '').upper().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition(':')
+        start = column_index_from_string(first) - 1
+        end = column_index_from_string(last) - 1 if last else start
+        if end < start:
+            raise ValueError(f"Rango de columnas inválido: {part}")
+        columns.extend(range(start, end + 1))
+    if not columns:
+        raise ValueError("No se indicaron columnas.")
+    return sorted(set(columns))
+
+# Función para obtener el índice 1-based de la columna de una referencia como "AB12"
+@lru_cache(maxsize=None)
+def _column_of(reference):
+    return column_index_from_string(reference.rstrip('0123456789'))
+
+# Función para decodificar el valor de una celda del XML, con las mismas reglas que openpyxl.
+# ns es el prefijo de namespace de las etiquetas ('' si la fila se parseó sin namespace).
+def _cell_value(cell, ns, shared_strings, date_formats, timedelta_formats, epoch):
+    data_type = cell.get('t', 'n')
+    if data_type == 'inlineStr':
+        child = cell.find(ns + 'is')
+        if child is None:
+            return None
+        runs = [child.findtext(ns + 't') or ''] + [run.findtext(ns + 't') or '' for run in child.findall(ns + 'r')]
+        return ''.join(runs)
+
+    value = cell.findtext(ns + 'v') or None
+    if value is None:
+        return None
+    if data_type == 'n':
+        number = float(value) if ('.' in value or 'E' in value or 'e' in value) else int(value)
+        style_id = int(cell.get('s', 0))
+        if style_id in date_formats:
+            try:
+                return from_excel(number, epoch, timedelta=style_id in timedelta_formats)
+            except (OverflowError, ValueError):
+                return None
+        return number
+    if data_type == 's':
+        return shared_strings[int(value)]
+    if data_type == 'b':
+        return bool(int(value))
+    if data_type == 'str':
+        return value
+    if data_type == 'd':
+        return from_ISO8601(value)
+    # Celdas con error (#N/A, #DIV/0!, ...) quedan vacías, como en pd.read_excel
+    return None
+
+# Función generadora que corta el XML de la hoja en fragmentos <row>...</row> sin parsearlo.
+# Devuelve (número de fila o None, fragmento); así las filas saltadas nunca se parsean.
+def _iter_row_chunks(source, head, block_size=1 << 16):
+    buffer = head
+    pos = 0
+    while True:
+        start = buffer.find(b'<row', pos)
+        # Si el bloque termina justo después de '<row' hace falta el siguiente para ver la etiqueta
+        if start != -1 and start + 5 > len(buffer):
+            start = -1
+        if start != -1 and buffer[start + 4:start + 5] not in (b' ', b'>', b'/'):
+            # Otra etiqueta que empieza igual (p. ej. <rowBreaks>): fin de los datos
+            return
+
+        tag_end = buffer.find(b'>', start) if start != -1 else -1
+        if tag_end != -1:
+            if buffer[tag_end - 1:tag_end] == b'/':
+                end = tag_end + 1
+            else:
+                end = buffer.find(b'</row>', tag_end)
+                end = end + 6 if end != -1 else -1
+            if end != -1:
+                match = _ROW_NUMBER.search(buffer, start, tag_end)
+                yield (int(match.group(1)) if match else None), buffer[start:end]
+                pos = end
+                continue
+
+        if buffer.find(b'</sheetData>', pos) != -1:
+            return
+        block = source.read(block_size)
+        if not block:
+            return
+        buffer = buffer[pos:] + block
+        pos = 0
+
+# Función para obtener las declaraciones de prefijos (xmlns:x14ac="...") de la etiqueta raíz
+# de la hoja. Excel escribe atributos con prefijo en las filas (x14ac:dyDescent), así que
+# cada fragmento <row> las necesita para poder parsearse por separado.
+def _prefix_declarations(head):
+    root = _ROOT_TAG.search(head)
+    return b''.join(_PREFIX_DECLARATION.findall(root.group())) if root else b''
+
+# Función para parsear un fragmento <row> con las declaraciones de prefijos de la raíz
+def _parse_row(chunk, declarations):
+    if declarations:
+        chunk = b'<row' + declarations + chunk[4:]
+    return fromstring(chunk)
+
+# Función generadora que recorre la hoja fila a fila. Las filas anteriores a start_row se
+# descartan sin parsear y de cada fila solo se decodifican las celdas de las columnas pedidas.
+def _iter_selected_rows(sheet, columns, start_row):
+    workbook = sheet.parent
+    context = (sheet._shared_strings, workbook._date_formats, workbook._timedelta_formats, workbook.epoch)
+
+    positions = {col + 1: i for i, col in enumerate(columns)}
+    last_column = max(positions)
+    width = len(columns)
+
+    with sheet._get_source() as source:
+        head = source.read(1 << 16)
+        if b'<sheetData' in head:
+            # Etiquetas sin prefijo: cada fila se parsea por separado (en C) y sin namespace
+            declarations = _prefix_declarations(head)
+            rows = ((number, _parse_row(chunk, declarations)) for number, chunk in _iter_row_chunks(source, head)
+                    if number is None or number >= start_row)
+            ns = ''
+        else:
+            rows = _iter_parsed_rows(BytesIO(head + source.read()))
+            ns = '{%s}' % SHEET_MAIN_NS
+
+        row_number = 0
+        next_row = start_row
+        for number, element in rows:
+            row_number = number if number is not None else row_number + 1
+            if row_number < start_row:
+                continue
+
+            # Filas ausentes en el XML equivalen a filas vacías
+            while next_row < row_number:
+                yield [None] * width
+                next_row += 1
+
+            values = [None] * width
+            column = 0
+            for cell in element:
+                reference = cell.get('r')
+                column = _column_of(reference) if reference else column + 1
+                if column > last_column:
+                    break
+                position = positions.get(column)
+                if position is not None:
+                    values[position] = _cell_value(cell, ns, *context)
+
+            next_row = row_number + 1
+            yield values
+
+# Función generadora para hojas con etiquetas con prefijo: usa iterparse sobre el XML completo
+def _iter_parsed_rows(source):
+    for _, element in iterparse(source):
+        if element.tag == ROW_TAG:
+            reference = element.get('r')
+            yield (int(reference) if reference else None), element
+            element.clear()
+
+# Función generadora con la API pública de openpyxl, para hojas sin acceso al XML
+def _iter_rows_openpyxl(sheet, columns, start_row):
+    first = min(columns)
+    offsets = [col - first for col in columns]
+    for row in sheet.iter_rows(min_row=start_row, min_col=first + 1, max_col=max(columns) + 1, values_only=True):
+        yield [row[offset] if offset < len(row) else None for offset in offsets]
+
+# Función para convertir los valores de una columna en un arreglo tipado.
+# Los números enteros guardados como decimales (5.0) pasan a enteros, como en pd.read_excel.
+def _column_array(values):
+    kinds = {type(value) for value in values}
+    kinds.discard(type(None))
+
+    if kinds and kinds <= {int, float}:
+        array = np.array(values, dtype=np.float64)
+        if not np.isnan(array).any() and np.all(np.abs(array) < 2**53) and np.all(array == np.floor(array)):
+            return array.astype(np.int64)
+        return array
+    if kinds == {bool} and None not in values:
+        return np.array(values, dtype=bool)
+
+    # Texto, fechas o tipos mezclados: pandas infiere el tipo y las celdas vacías quedan como NaN
+    series = pd.Series(values, dtype=object).replace('', None)
+    series = series.infer_objects()
+    if series.dtype == object:
+        # Una columna que queda toda vacía pasa a float64, como en pd.read_excel
+        series = series.where(series.notna(), np.nan).infer_objects()
+    return series.to_numpy()
+
+# Función para renombrar los nombres de columna repetidos como pandas: x, x.1, x.2, ...
+def _deduplicate_names(names):
+    counts = {}
+    unique = []
+    for original in names:
+        name = original
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            # Se salta un sufijo si ese nombre ya está en el encabezado
+            count = count + 1 if name in names else counts.get(name, 0)
+        counts[name] = count + 1
+        unique.append(name)
+    return unique
+
+# Función para leer solo algunas columnas de una hoja en modo de solo lectura (streaming).
+# Las filas anteriores a start_row no se materializan y solo se decodifican las columnas
+# pedidas. Con header=True la primera fila leída da los nombres de columna; si no, las
+# columnas se nombran con su índice 0-based, igual que pd.read_excel(header=None). Los
+# nombres repetidos se renombran como en pd.read_excel (x, x.1, ...).
+# Las filas finales vacías en las columnas pedidas se descartan.
+def read_sheet_columns(source, columns, start_row=1, sheet_name="ITEM_O", header=False):
+    columns = list(columns)
+    data = [[] for _ in columns]
+    names = columns
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name]
+        if sheet.max_column is not None and max(columns) >= sheet.max_column:
+            raise IndexError(f"La hoja {sheet_name} tiene {sheet.max_column} columnas; se pidió la columna {max(columns) + 1}.")
+
+        if hasattr(sheet, '_get_source'):
+            rows = _iter_selected_rows(sheet, columns, start_row)
+        else:
+            rows = _iter_rows_openpyxl(sheet, columns, start_row)
+
+        if header:
+            header_row = next(rows, [None] * len(columns))
+            names = _deduplicate_names([f"Unnamed: {i}" if value is None else value
+                                        for i, value in enumerate(header_row)])
+
+        last_filled = 0
+        for row in rows:
+            for values, value in zip(data, row):
+                values.append(value)
+            if any(value is not None for value in row):
+                last_filled = len(data[0])
+    finally:
+        workbook.close()
+
+    return pd.DataFrame({name: _column_array(values[:last_filled]) for name, values in zip(names, data)},
+                        columns=names)
@@ -0,0 +1,110 @@
+import io
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from etl_core.charts import stats_histogram_boxplot_figure
+
+# Renderizado de los gráficos en segundo plano: un hilo calcula los resúmenes de las columnas
+# y los manda a un pool de procesos que dibuja cada figura con Agg y devuelve el PNG. La
+# interfaz solo recibe los PNG ya listos (results) y puede cancelar el trabajo.
+
+# Resolución de los PNG (la de las figuras que mostraba FigureCanvasTkAgg)
+RENDER_DPI = 100
+
+# Gráficos en curso por proceso: limita los resúmenes y PNG en memoria a la vez
+IN_FLIGHT_PER_WORKER = 2
+
+# Segundos entre comprobaciones de la cancelación mientras se espera a los procesos
+CANCEL_CHECK_S = 0.1
+
+# Función para dibujar el histograma y boxplot de una columna a un PNG; se ejecuta en un
+# proceso de trabajo. La figura se vacía al terminar, así no queda nada vivo en el proceso.
+def render_summary_png(col, col_stats, dpi=RENDER_DPI):
+    fig = stats_histogram_boxplot_figure(col, col_stats)
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=dpi)
+    finally:
+        fig.clear()
+    return buffer.getvalue()
+
+# Trabajo de renderizado de los gráficos de varias columnas. summaries es un iterable de
+# (columna, resumen) que se consume en el hilo del trabajo, así calcular los resúmenes
+# tampoco bloquea la interfaz. Cada gráfico terminado se pone en results como
+# (posición, columna, PNG), en el orden en que terminan.
+class ChartRenderJob:
+    def __init__(self, summaries, workers=None, dpi=RENDER_DPI):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.dpi = dpi
+        self.results = queue.Queue()
+        self.submitted = 0
+        self.rendered = 0
+        self.error = None
+        self._summaries = summaries
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="chart-render", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # Función para cancelar: no se envían más gráficos y se descartan los que esperan
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    # Función para esperar a que termine el trabajo (True si terminó dentro del plazo)
+    def join(self, timeout=None):
+        return self._done.wait(timeout)
+
+    # Función para tomar los gráficos terminados desde la última llamada, sin esperar
+    def drain(self):
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    # Función para pasar a results los gráficos terminados; espera a lo sumo CANCEL_CHECK_S
+    # para notar pronto una cancelación
+    def _collect(self, pending):
+        finished, _ = wait(pending, timeout=CANCEL_CHECK_S, return_when=FIRST_COMPLETED)
+        for future in finished:
+            position, col = pending.pop(future)
+            if not future.cancelled():
+                self.results.put((position, col, future.result()))
+                self.rendered += 1
+
+    def _run(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        pending = {}
+        try:
+            for col, col_stats in self._summaries:
+                if self.cancelled:
+                    break
+                future = executor.submit(render_summary_png, col, col_stats, self.dpi)
+                pending[future] = (self.submitted, col)
+                self.submitted += 1
+                while len(pending) >= self.workers * IN_FLIGHT_PER_WORKER and not self.cancelled:
+                    self._collect(pending)
+            while pending and not self.cancelled:
+                self._collect(pending)
+        except Exception as e:
+            self.error = e
+        finally:
+            # Al cancelar no se espera a los gráficos que ya se estaban dibujando
+            executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+            pending.clear()
+            self._summaries = None
+            self._done.set()
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+
+# Columna con la fecha tomada del nombre del archivo (reemplaza a ANIO, MES y DIA)
+DATE_COLUMN = 'FECHA'
+
+# Versión del esquema de salida; si cambia, el modo incremental reprocesa todo
+SCHEMA_VERSION = 1
+
+# Valores no vacíos de cada columna usados para deducir su tipo
+SAMPLE_ROWS = 1000
+
+# Una columna de texto se codifica como categoría si sus valores distintos son a lo sumo
+# esta proporción de sus valores no vacíos
+CATEGORY_MAX_RATIO = 0.5
+
+# Mayor entero que float32 representa sin pérdida
+_FLOAT32_EXACT_INT = 2 ** 24
+
+# Nombres de los tipos para los mensajes
+KIND_NAMES = {
+    'empty': 'vacía',
+    'boolean': 'booleano',
+    'integer': 'entero',
+    'float': 'decimal',
+    'datetime': 'fecha',
+    'text': 'texto',
+}
+
+_NUMERIC_KINDS = {'boolean', 'integer', 'float'}
+
+# Función para crear la columna de fecha a partir de año, mes y día (textos o números);
+# si el nombre del archivo no tenía fecha la columna queda vacía (NaT)
+def add_date_column(df, year, month, day):
+    try:
+        date = pd.Timestamp(year=int(year), month=int(month), day=int(day))
+    except (TypeError, ValueError):
+        date = pd.NaT
+    df[DATE_COLUMN] = pd.Series(date, index=df.index, dtype='datetime64[ns]')
+    return df
+
+# Función para deducir el tipo de una columna a partir de una muestra de sus valores no vacíos
+def infer_kind(series, sample_rows=SAMPLE_ROWS):
+    if pd.api.types.is_bool_dtype(series):
+        return 'boolean'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    sample = series.dropna().iloc[:sample_rows]
+    if sample.empty:
+        return 'empty'
+
+    inferred = pd.api.types.infer_dtype(sample, skipna=True)
+    if inferred == 'boolean':
+        return 'boolean'
+    if inferred == 'integer':
+        return 'integer'
+    if inferred in ('floating', 'mixed-integer-float', 'decimal'):
+        values = sample.astype(np.float64)
+        return 'integer' if (values % 1 == 0).all() else 'float'
+    if inferred in ('datetime64', 'datetime', 'date'):
+        return 'datetime'
+    if inferred == 'string':
+        # Números guardados como texto en Excel
+        values = pd.to_numeric(sample, errors='coerce')
+        if values.notna().all():
+            return 'integer' if (values % 1 == 0).all() else 'float'
+    return 'text'
+
+# Función para deducir el esquema de un DataFrame: columna -> tipo
+def infer_schema(df, sample_rows=SAMPLE_ROWS):
+    return {col: infer_kind(df[col], sample_rows) for col in df.columns}
+
+# Función para reducir una columna numérica al tipo más pequeño que la representa sin
+# pérdida: enteros de 8/16/32 bits, float32 o float64
+def downcast_numeric(values):
+    values = pd.to_numeric(values)
+    if pd.api.types.is_bool_dtype(values):
+        return values
+    as_float = values.to_numpy(dtype=np.float64)
+    finite = as_float[~np.isnan(as_float)]
+    integral = bool((finite % 1 == 0).all())
+    if integral and len(finite) == len(as_float):
+        return pd.to_numeric(values, downcast='integer')
+    if integral and (finite.size == 0 or np.abs(finite).max() <= _FLOAT32_EXACT_INT):
+        return values.astype(np.float32)
+    if np.array_equal(as_float.astype(np.float32).astype(np.float64), as_float, equal_nan=True):
+        return values.astype(np.float32)
+    return values.astype(np.float64)
+
+# Función para guardar una columna de texto como categoría si tiene muchos valores repetidos
+def encode_text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    non_null = series.notna()
+    values = series.where(~non_null, series.astype(str))
+    count = int(non_null.sum())
+    if count and values.nunique() <= CATEGORY_MAX_RATIO * count:
+        return values.astype('category')
+    return values
+
+# Función para convertir una columna al tipo deducido. Si algún valor fuera de la muestra no
+# se puede convertir, la columna se guarda como texto en lugar de perder esos valores.
+# Devuelve (columna, tipo final, valores que no encajaban).
+def apply_kind(series, kind):
+    if kind in ('integer', 'float', 'datetime'):
+        if kind == 'datetime':
+            converted = pd.to_datetime(series, errors='coerce')
+        else:
+            converted = pd.to_numeric(series, errors='coerce')
+        failures = int((converted.isna() & series.notna()).sum())
+        if failures:
+            return encode_text(series), 'text', failures
+        if kind == 'datetime':
+            return converted, kind, 0
+        return downcast_numeric(converted), kind, 0
+    if kind == 'text':
+        return encode_text(series), kind, 0
+    return series, kind, 0
+
+# Función para aplicar el esquema (deducido si no se da) a un DataFrame. El esquema final
+# queda en df.attrs['schema'] y los avisos de conversión en df.attrs['schema_issues'].
+def apply_schema(df, schema=None, sample_rows=SAMPLE_ROWS):
+    schema = schema or infer_schema(df, sample_rows)
+    typed = {}
+    final_schema = {}
+    issues = []
+    for col in df.columns:
+        kind = schema.get(col) or infer_kind(df[col], sample_rows)
+        typed[col], final_schema[col], failures = apply_kind(df[col], kind)
+        if failures:
+            issues.append(f"La columna {col} parecía {KIND_NAMES[kind]} en la muestra, pero {failures} "
+                          f"valores no lo son; se guarda como texto.")
+    result = pd.DataFrame(typed, index=df.index)
+    result.attrs['schema'] = final_schema
+    result.attrs['schema_issues'] = issues
+    return result
+
+# Función para obtener el esquema de un DataFrame ya tipado (o deducirlo de sus tipos)
+def frame_schema(df):
+    schema = df.attrs.get('schema') or {}
+    return {col: schema[col] if col in schema else infer_kind(df[col]) for col in df.columns}
+
+# Función para unificar dos tipos: devuelve el tipo común y si son incompatibles.
+# Entero y decimal se unifican como decimal sin aviso; los demás pares distintos pasan a texto.
+def widen_kind(a, b):
+    if a == b or b == 'empty':
+        return a, False
+    if a == 'empty':
+        return b, False
+    if a in _NUMERIC_KINDS and b in _NUMERIC_KINDS:
+        return ('float' if 'float' in (a, b) else 'integer'), False
+    return 'text', True
+
+# Función para comparar el esquema de un archivo con el de los anteriores.
+# Devuelve (esquema unificado, lista de mensajes de diferencias); resolution se añade a los
+# mensajes de tipos incompatibles para decir qué se hace con la columna.
+def merge_schemas(reference, schema, resolution='se guarda como texto'):
+    merged = dict(reference)
+    messages = []
+    if reference:
+        missing = [col for col in reference if col not in schema]
+        extra = [col for col in schema if col not in reference]
+        if missing:
+            messages.append(f"Faltan las columnas {', '.join(map(str, missing))}.")
+        if extra:
+            messages.append(f"Tiene columnas nuevas: {', '.join(map(str, extra))}.")
+    for col, kind in schema.items():
+        if col not in merged:
+            merged[col] = kind
+            continue
+        merged[col], incompatible = widen_kind(merged[col], kind)
+        if incompatible:
+            message = f"La columna {col} es {KIND_NAMES[kind]} y en los archivos anteriores es {KIND_NAMES[reference[col]]}"
+            messages.append(f"{message}; {resolution}." if resolution else f"{message}.")
+    return merged, messages
+
+# Función para llevar una columna ya tipada al tipo unificado
+def _cast_column(series, kind):
+    if series.isna().all():
+        # Columna vacía en este archivo: se crea directamente con el tipo común
+        if kind == 'datetime':
+            return pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+        if kind in _NUMERIC_KINDS:
+            return pd.Series(np.nan, index=series.index, dtype=np.float32)
+        return series.astype(object)
+    if kind == 'text':
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series.astype(object)
+        return series.where(series.isna(), series.astype(str)).astype(object)
+    if kind == 'float' and not pd.api.types.is_float_dtype(series):
+        return series.astype(np.float64)
+    return series
+
+# Función para concatenar DataFrames tipados con un esquema común. Las diferencias de
+# esquema entre archivos se informan con on_mismatch(archivo, mensaje) en vez de convertirse
+# en silencio; sources da el nombre de cada DataFrame para los mensajes.
+def combine_typed_frames(frames, sources=None, on_mismatch=None):
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    sources = list(sources) if sources is not None else [None] * len(frames)
+
+    schema = {}
+    for df, source in zip(frames, sources):
+        messages = list(df.attrs.get('schema_issues', []))
+        schema, mismatches = merge_schemas(schema, frame_schema(df))
+        messages.extend(mismatches)
+        if on_mismatch is not None:
+            for message in messages:
+                on_mismatch(source, message)
+
+    # Las columnas de texto quedan como categoría solo si lo son en todos los DataFrames
+    categorical = {col for col, kind in schema.items() if kind == 'text'
+                   and all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames if col in df.columns)}
+    aligned = []
+    for df in frames:
+        columns = {}
+        for col in df.columns:
+            if col in categorical:
+                columns[col] = df[col]
+            else:
+                columns[col] = _cast_column(df[col], schema[col])
+        aligned.append(pd.DataFrame(columns, index=df.index))
+
+    for col in categorical:
+        categories = pd.Index(sorted(set().union(*(df[col].cat.categories for df in aligned if col in df.columns)),
+                                     key=str))
+        for df in aligned:
+            if col in df.columns:
+                df[col] = df[col].cat.set_categories(categories)
+
+    dataset = pd.concat(aligned, ignore_index=True)
+    for col, kind in schema.items():
+        if col in categorical:
+            dataset[col] = dataset[col].cat.remove_unused_categories()
+        elif kind == 'text':
+            dataset[col] = encode_text(dataset[col])
+        elif kind in ('integer', 'float'):
+            dataset[col] = downcast_numeric(dataset[col])
+    dataset.attrs['schema'] = schema
+    dataset.attrs['schema_issues'] = []
+    return dataset
@@ -0,0 +1,124 @@
+import numpy as np
+
+# Tamaño del compactador superior del sketch KLL: el error de rango es del orden de 1/k
+# (con k=256, alrededor de 1 % en el peor caso) y se guardan a lo sumo unos 3k valores
+DEFAULT_K = 256
+
+# Cada nivel inferior guarda 2/3 de los valores del nivel de arriba, con un mínimo de 2
+_DECAY = 2 / 3
+_MIN_CAPACITY = 2
+
+# Media, varianza, mínimo y máximo de una columna acumulados por bloques (fórmula de Chan
+# para combinar medias y sumas de cuadrados), sin guardar los valores
+class RunningMoments:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    # Función para añadir un bloque de valores (los NaN se ignoran)
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        other = RunningMoments()
+        other.count = values.size
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    # Función para combinar con otro acumulador (por ejemplo, de otro proceso)
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    # Desviación estándar muestral, como pandas (ddof=1)
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+# Sketch de cuantiles KLL (Karnin, Lang y Liberty): una pila de compactadores donde los
+# valores del nivel h pesan 2**h. Cuando un nivel se llena se ordena y se sube al nivel
+# siguiente uno de cada dos valores, empezando al azar en el primero o el segundo.
+# Ocupa memoria constante sin importar cuántas filas se procesen y se puede combinar.
+class QuantileSketch:
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(int(np.ceil(self.k * _DECAY ** depth)), _MIN_CAPACITY)
+
+    # Función para añadir un bloque de valores (los NaN se ignoran)
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # Con un número impar de valores, el mayor se queda en su nivel
+                keep = items[items.size - items.size % 2:]
+                promoted = items[self._rng.integers(2):items.size - keep.size:2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    # Función para combinar con otro sketch
+    def merge(self, other):
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    # Función para estimar los cuantiles pedidos (valores entre 0 y 1); 0 y 1 son exactos
+    def quantiles(self, qs):
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(items.size, 2.0 ** level) for level, items in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = items[np.clip(index, 0, items.size - 1)]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
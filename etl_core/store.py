@@ -0,0 +1,121 @@
+import importlib.util
+import os
+
+import pandas as pd
+
+# Nombre base del dataset consolidado; la extensión depende del backend
+STORE_BASENAME = 'Out'
+
+# Función para guardar en Parquet (columnar, comprimido)
+def _write_parquet(dataset, path):
+    dataset.to_parquet(path, index=False)
+
+# Función para leer Parquet cargando solo las columnas pedidas
+def _read_parquet(path, columns=None):
+    return pd.read_parquet(path, columns=columns)
+
+# Función para leer el esquema de un Parquet sin cargar los datos
+def _schema_parquet(path):
+    import pyarrow.parquet as pq
+    return pq.read_schema(path).empty_table().to_pandas().dtypes
+
+def _write_feather(dataset, path):
+    dataset.to_feather(path)
+
+def _read_feather(path, columns=None):
+    return pd.read_feather(path, columns=columns)
+
+def _schema_feather(path):
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        return reader.schema.empty_table().to_pandas().dtypes
+
+# Pickle no necesita pyarrow, pero no permite leer solo algunas columnas
+def _write_pickle(dataset, path):
+    dataset.to_pickle(path)
+
+def _read_pickle(path, columns=None):
+    dataset = pd.read_pickle(path)
+    return dataset if columns is None else dataset[columns]
+
+def _schema_pickle(path):
+    return pd.read_pickle(path).dtypes
+
+# Backends disponibles: nombre -> (extensión, escritura, lectura, esquema)
+BACKENDS = {
+    'parquet': ('.parquet', _write_parquet, _read_parquet, _schema_parquet),
+    'feather': ('.feather', _write_feather, _read_feather, _schema_feather),
+    'pickle': ('.pkl', _write_pickle, _read_pickle, _schema_pickle),
+}
+
+# Parquet por defecto; si pyarrow no está instalado se usa pickle
+DEFAULT_BACKEND = 'parquet' if importlib.util.find_spec('pyarrow') else 'pickle'
+
+# Función para registrar un backend adicional
+def register_backend(name, extension, writer, reader, schema_reader):
+    BACKENDS[name] = (extension, writer, reader, schema_reader)
+
+# Función para obtener la ruta del dataset consolidado para un backend
+def store_path(backend=DEFAULT_BACKEND, basename=STORE_BASENAME):
+    return basename + BACKENDS[backend][0]
+
+# Función para deducir el backend a partir de la extensión del archivo
+def backend_for_path(path):
+    extension = os.path.splitext(path)[1]
+    for name, (backend_extension, *_) in BACKENDS.items():
+        if backend_extension == extension:
+            return name
+    raise ValueError(f"No hay un backend para archivos '{extension}'.")
+
+# Función para buscar el dataset consolidado escrito más recientemente
+def latest_store_path(basename=STORE_BASENAME):
+    candidates = [store_path(name, basename) for name in BACKENDS]
+    candidates = [path for path in candidates if os.path.exists(path)]
+    if not candidates:
+        raise FileNotFoundError("No existe un dataset consolidado. Ejecute primero el proceso ETL.")
+    return max(candidates, key=os.path.getmtime)
+
+# Función para preparar el dataset para formatos columnares: nombres de columna
+# como texto y columnas object con tipos mezclados convertidas a texto
+def _prepare_for_columnar(dataset):
+    dataset = dataset.rename(columns=str)
+    for col in dataset.columns:
+        if dataset[col].dtype == object:
+            kind = pd.api.types.infer_dtype(dataset[col], skipna=True)
+            if kind.startswith('mixed'):
+                dataset[col] = dataset[col].where(dataset[col].isna(), dataset[col].astype(str))
+    return dataset
+
+# Función para guardar el dataset consolidado; devuelve la ruta escrita
+def save_dataset(dataset, backend=DEFAULT_BACKEND, path=None):
+    extension, writer, _, _ = BACKENDS[backend]
+    path = path or store_path(backend)
+    if backend != 'pickle':
+        dataset = _prepare_for_columnar(dataset)
+
+    # Escribir en un archivo temporal y reemplazar para no dejar archivos a medias
+    tmp_path = path + '.tmp'
+    writer(dataset, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+# Función para leer el dataset consolidado, opcionalmente solo algunas columnas
+def load_dataset(path=None, columns=None):
+    path = path or latest_store_path()
+    _, _, reader, _ = BACKENDS[backend_for_path(path)]
+    return reader(path, columns=columns)
+
+# Función para obtener los nombres de columna del dataset sin leer los datos
+def store_columns(path=None):
+    path = path or latest_store_path()
+    _, _, _, schema_reader = BACKENDS[backend_for_path(path)]
+    return list(schema_reader(path).index)
+
+# Función para obtener las columnas numéricas del dataset sin leer los datos
+def numeric_columns(path=None, exclude=()):
+    path = path or latest_store_path()
+    _, _, _, schema_reader = BACKENDS[backend_for_path(path)]
+    dtypes = schema_reader(path)
+    return [col for col, dtype in dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+            and col not in exclude]